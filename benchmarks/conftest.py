@@ -0,0 +1,83 @@
+"""Бенчмарки горячих путей игры на { pytest-benchmark }.
+
+Запуск с сохранением результатов в каталог .benchmarks:
+    pytest benchmarks/ --benchmark-autosave
+Сравнение с последним сохранённым запуском:
+    pytest benchmarks/ --benchmark-compare --benchmark-compare-fail=mean:10%
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BASE_DIR = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(BASE_DIR))
+
+# Hide the pygame screen
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+
+pytest.importorskip('pytest_benchmark')
+
+import snake_engine  # noqa: E402
+
+OBJECT_COUNTS = (60, 300, 600)
+SNAKE_LENGTHS = (1, 50, 150)
+
+
+def _serpentine(length):
+    """Клетки змейки длиной {length}, уложенной по строкам поля змейкой,
+    от хвоста к голове.
+    """
+    width = snake_engine.GRID_WIDTH
+    for index in range(length):
+        row, column = divmod(index, width)
+        if row % 2:
+            column = width - 1 - column
+        yield column * snake_engine.GRID_SIZE, row * snake_engine.GRID_SIZE
+
+
+def build_state(objects, length):
+    """Возвращает игру с {objects} препятствиями (поровну яблок, плохих
+    яблок и камней) и змейкой длиной {length}. Голова смотрит в
+    свободную клетку.
+    """
+    state = snake_engine.GameState()
+    for obstacle in state.obstacles:
+        obstacle.remove_from_field()
+    snake = state.snake
+    snake.remove_from_field()
+    snake.positions.clear()
+    for cell in _serpentine(length):
+        snake.grow_up(cell)
+
+    row = (length - 1) // snake_engine.GRID_WIDTH
+    at_row_end = length % snake_engine.GRID_WIDTH == 0
+    if at_row_end:
+        snake.update_direction(snake_engine.DOWN)
+    else:
+        snake.update_direction(
+            snake_engine.LEFT if row % 2 else snake_engine.RIGHT
+        )
+
+    free_cells = state.free_cells
+    new_head = snake.new_head()
+    free_cells.take(new_head)
+    count = min(objects, len(free_cells)) // 3
+    state.obstacles = [
+        *snake_engine.get_good_apples(count, [], free_cells)[0],
+        *snake_engine.get_bad_apples(count, [], free_cells)[0],
+        *snake_engine.get_stones(count, [], free_cells)[0],
+    ]
+    free_cells.release(new_head)
+    return state
+
+
+@pytest.fixture(params=OBJECT_COUNTS, ids=lambda count: f'objects={count}')
+def objects(request):
+    return request.param
+
+
+@pytest.fixture(params=SNAKE_LENGTHS, ids=lambda length: f'length={length}')
+def length(request):
+    return request.param
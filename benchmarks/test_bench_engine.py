@@ -0,0 +1,112 @@
+import random
+
+import pytest
+
+import snake_arena
+import snake_autopilot
+import snake_engine
+import snake_server
+from conftest import build_state
+
+GRID_SIDES = (32, 256, 1024)
+
+
+def test_snake_can_move(benchmark, objects, length):
+    state = build_state(objects, length)
+    new_head = state.snake.new_head()
+
+    assert benchmark(
+        snake_engine.snake_can_move, new_head, state.snake,
+        state.obstacles, state.stats
+    )
+
+
+def test_step(benchmark, objects, length):
+    random.seed(0)
+    state = build_state(objects, length)
+    turns = (snake_engine.UP, snake_engine.LEFT)
+    tick = iter(range(10 ** 9))
+
+    benchmark(lambda: snake_engine.step(state, turns[next(tick) % 2]))
+
+
+@pytest.mark.parametrize('side', GRID_SIDES, ids=lambda side: f'grid={side}')
+def test_randomize_position(benchmark, side):
+    size = side * snake_engine.GRID_SIZE
+    free_cells = snake_engine.FreeCells(size, size)
+    apple = snake_engine.Apple(free_cells=free_cells)
+
+    benchmark(apple.randomize_position)
+
+
+def test_init_game_objects(benchmark):
+    benchmark.pedantic(
+        snake_engine.init_game_obgects,
+        setup=lambda: ((snake_engine.FreeCells(),), {}), rounds=200
+    )
+
+
+def test_reset_game(benchmark):
+    state = snake_engine.GameState()
+
+    benchmark(state.reset)
+
+
+@pytest.mark.parametrize('side', GRID_SIDES, ids=lambda side: f'grid={side}')
+def test_env_step(benchmark, side):
+    snake_env = pytest.importorskip('snake_env')
+    env = snake_env.SnakeEnv(side, side, seed=0)
+    actions = iter(range(10 ** 9))
+
+    benchmark(lambda: env.step(next(actions) % 2 * 2))
+
+
+@pytest.mark.parametrize('weight', (5, 50, 500), ids=lambda w: f'weight={w}')
+def test_clear_stone_trace(benchmark, weight):
+    size = 1024 * snake_engine.GRID_SIZE
+    state = snake_engine.GameState(width=size, height=size, seed=0)
+    snake = state.snake
+    snake.update_direction(snake_engine.RIGHT)
+    stone = snake_engine.Stone(weight=weight, free_cells=state.free_cells)
+    stone.set_position(snake.new_head())
+    crowd = [
+        snake_engine.Apple(free_cells=state.free_cells)
+        for _ in range(5000)
+    ]
+    state.obstacles.extend([stone, *crowd])
+    origin = stone.position
+
+    def knock_back():
+        stone.set_position(origin)
+        snake_engine.clear_stone_trace(
+            stone, snake, state.obstacles, state.stats
+        )
+
+    benchmark(knock_back)
+
+
+def test_arena_tick(benchmark):
+    side = 512 * snake_engine.GRID_SIZE
+    arena = snake_arena.Arena(side, side, seed=0)
+    for player in range(600):
+        arena.add_player(snake_arena.cautious_bot if player % 2 else None)
+    tick = iter(range(10 ** 9))
+
+    def play():
+        for player in arena.snakes:
+            arena.turn(player, (player + next(tick)) % 4)
+        arena.tick()
+        return snake_server.delta_frame(arena, 0)
+
+    benchmark(play)
+
+
+def test_autopilot_tick(benchmark):
+    side = 1024 * snake_engine.GRID_SIZE
+    state = snake_engine.GameState(width=side, height=side, seed=0)
+    pilot = snake_autopilot.Autopilot()
+
+    def play():
+        return snake_engine.step(state, pilot(state))
+
+    benchmark(play)
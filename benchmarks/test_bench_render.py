@@ -0,0 +1,43 @@
+import pytest
+
+import snake_engine
+import the_snake
+from conftest import build_state
+
+TEXTURE_SIZES = ((640, 480), (1920, 1080), (3840, 2160))
+
+
+@pytest.fixture
+def context():
+    return the_snake.GameContext()
+
+
+def test_draw_texture_on_background(benchmark, context):
+    benchmark(the_snake.draw_texture_on_background, context)
+
+
+@pytest.mark.parametrize(
+    'size', TEXTURE_SIZES, ids=lambda size: '{}x{}'.format(*size)
+)
+def test_generate_texture(benchmark, size):
+    benchmark(the_snake.generate_texture, *size)
+
+
+@pytest.mark.parametrize('full', (True, False), ids=('full', 'dirty'))
+def test_render_frame(benchmark, context, objects, length, full):
+    state = build_state(objects, length)
+    the_snake.render_game(context, state, full=True)
+
+    benchmark(the_snake.render_game, context, state, full)
+
+
+@pytest.mark.parametrize('cells', (100, 2000), ids=lambda cells: f'{cells}^2')
+def test_render_huge_board(benchmark, context, cells):
+    size = cells * snake_engine.GRID_SIZE
+    state = snake_engine.GameState(width=size, height=size)
+
+    def tick_and_render():
+        snake_engine.step(state)
+        the_snake.render_game(context, state, full=False)
+
+    benchmark(tick_and_render)
@@ -0,0 +1,324 @@
+"""Арена: много змеек на одном поле.
+
+Змейки игроков и ботов ходят одновременно. Клетки всех змеек отмечены в
+общей сетке занятости {Arena.owners} (клетка -> номер змейки), поэтому
+столкновения змеек разбираются за один проход по змейкам, без попарных
+проверок:
+    - новые головы всех змеек считаются по клеткам; если в клетку пришло
+    больше одной головы, врезались все эти змейки (лоб в лоб);
+    - голова, которая пришла в клетку чужой змейки, врезалась. Исключение
+    - клетка хвоста, который на этом ходу уйдёт: его змейка сдвинется
+    или укоротится и при этом сама не врежется;
+    - укус себя и яблоки разбирают правила ядра
+    { snake_engine.resolve_move }. Змейки, которые бьют камни, ходят
+    последними: сначала все они теряют сегменты, затем камни отлетают
+    (см. { snake_engine.clear_stone_trace }). Камень, отбитый на чужую
+    змейку, остаётся на месте, а врезается эта змейка.
+Решения о столкновениях принимаются по сетке на начало хода, поэтому
+исход не зависит от порядка змеек. Врезавшаяся змейка появляется заново
+в случайной свободной клетке, поле при этом не сбрасывается.
+
+Ходом бота управляет функция {ArenaPolicy}: она получает арену и змейку
+и возвращает новое направление или {None}.
+"""
+from collections import Counter
+from random import Random
+from typing import Callable, Iterable, Optional
+
+from snake_batch import DIRECTIONS
+from snake_engine import (
+    EVENT_APPLE, EVENT_BAD_APPLE, EVENT_BITE, EVENT_MOVE, EVENT_STONE,
+    OPPOSITE, SCREEN_HEIGHT, SCREEN_WIDTH, FreeCells, GameStats,
+    ObstacleTable, Snake, Stone, clear_stone_trace, get_bad_apples,
+    get_good_apples, get_stones, resolve_move
+)
+
+"""Номер, которым не называется ни одна змейка: змейки нумеруются с 1."""
+NO_PLAYER = 0
+
+
+class PlayerSnake(Snake):
+    """Змейка игрока или бота на общем поле.
+
+    Клетки сегментов дополнительно отмечаются в общем словаре {owners}
+    (клетка -> номер игрока), чтобы найти хозяина клетки одним
+    обращением к словарю, а змейки поля доступны по номеру в {snakes}.
+    """
+
+    __slots__ = ('player', 'owners', 'snakes', 'stats', 'turn', 'policy')
+
+    def __init__(self, player: int, arena: 'Arena',
+                 policy: Optional['ArenaPolicy'] = None) -> None:
+        """Создаёт змейку игрока {player} в случайной свободной клетке, а
+        не в центре поля, где может быть другая змейка. Клетку и
+        направление выбирает генератор поля арены {arena}. Змейкой с
+        {policy} управляет бот.
+        """
+        self.player = player
+        self.owners = arena.owners
+        self.snakes = arena.snakes
+        self.stats = GameStats()
+        self.turn: Optional[tuple[int, int]] = None
+        self.policy = policy
+        free_cells = arena.free_cells
+        super().__init__(free_cells=free_cells, position=free_cells.choice())
+
+    def occupy(self, cell: tuple[int, int]) -> None:
+        """Добавляет клетку сегмента в тело змейки и в словарь хозяев."""
+        super().occupy(cell)
+        if self.free_cells is not None:
+            self.owners[cell] = self.player
+
+    def vacate(self, cell: tuple[int, int]) -> None:
+        """Убирает клетку сегмента из тела змейки и из словаря хозяев."""
+        super().vacate(cell)
+        if self.free_cells is not None and not self.occupies(cell) and (
+                self.owners.get(cell) == self.player):
+            del self.owners[cell]
+
+    def set_body(self, cells: Iterable[tuple[int, int]]) -> None:
+        """Заменяет сегменты змейки и отмечает их в словаре хозяев."""
+        super().set_body(cells)
+        if self.free_cells is not None:
+            self.owners.update(dict.fromkeys(self.positions, self.player))
+
+    def stone_falls_on(self, cell: tuple[int, int],
+                       stats: GameStats) -> bool:
+        """Проверяет, падает ли камень, отбитый в клетку {cell}, на эту
+        или на чужую змейку. Врезается змейка, на которую он падает.
+        """
+        player = self.owners.get(cell, self.player)
+        if player == self.player:
+            return super().stone_falls_on(cell, stats)
+        self.snakes[player].stats.reset = True
+        return True
+
+    def respawn(self) -> None:
+        """Переносит змейку длиной в один сегмент в свободную клетку."""
+        self.position = self.free_cells.choice()
+        self.reset()
+
+
+ArenaPolicy = Callable[['Arena', PlayerSnake], Optional[tuple[int, int]]]
+
+
+def cautious_bot(arena: 'Arena',
+                 snake: PlayerSnake) -> Optional[tuple[int, int]]:
+    """Бот, который не заходит в клетки змеек, плохих яблок и камней:
+    продолжает путь, если клетка впереди свободна, иначе поворачивает в
+    первую свободную сторону.
+    """
+    object_at = arena.free_cells.object_at
+    directions = [snake.direction] + [
+        direction for direction in DIRECTIONS
+        if direction not in (snake.direction, OPPOSITE[snake.direction])
+    ]
+    for direction in directions:
+        cell = snake.new_head(direction)
+        obstacle = object_at(cell)
+        if cell not in arena.owners and (
+                obstacle is None or obstacle.name == EVENT_APPLE):
+            return direction
+
+    return None
+
+
+class Arena():
+    """Общее поле нескольких змеек, см. описание модуля."""
+
+    def __init__(self, width: int = SCREEN_WIDTH,
+                 height: int = SCREEN_HEIGHT,
+                 seed: Optional[int] = None) -> None:
+        """Создаёт поле {width} x {height} пикселей с препятствиями."""
+        self.free_cells = FreeCells(width, height, Random(seed))
+        self.owners: dict[tuple[int, int], int] = {}
+        self.snakes: dict[int, PlayerSnake] = {}
+        table = ObstacleTable()
+        self.obstacles = [
+            obstacle
+            for create in (get_good_apples, get_bad_apples, get_stones)
+            for obstacle in create(
+                used_cells=[], free_cells=self.free_cells, table=table
+            )[0]
+        ]
+        self.free_cells.track_changes = True
+        self.__next_player = NO_PLAYER + 1
+
+    def add_player(self, policy: Optional[ArenaPolicy] = None) -> int:
+        """Добавляет змейку нового игрока и возвращает его номер. Змейкой
+        с {policy} управляет бот.
+        """
+        player = self.__next_player
+        self.__next_player += 1
+        self.snakes[player] = PlayerSnake(player, self, policy)
+        return player
+
+    def remove_player(self, player: int) -> None:
+        """Убирает змейку игрока с поля."""
+        snake = self.snakes.pop(player, None)
+        if snake is not None:
+            snake.remove_from_field()
+
+    def turn(self, player: int, action: int) -> None:
+        """Запоминает поворот игрока на следующий ход. Неизвестные номера
+        направлений игнорируются.
+        """
+        snake = self.snakes.get(player)
+        if snake is not None and 0 <= action < len(DIRECTIONS):
+            snake.turn = DIRECTIONS[action]
+
+    def new_head(self, snake: PlayerSnake) -> tuple[int, int]:
+        """Применяет поворот игрока или бота и возвращает новую голову."""
+        if snake.policy is not None:
+            snake.turn = snake.policy(self, snake)
+        if snake.turn is not None and snake.turn != OPPOSITE[
+                snake.direction]:
+            snake.update_direction(snake.turn)
+        snake.turn = None
+        return snake.new_head()
+
+    def keeps_tail(self, snake: PlayerSnake, head: tuple[int, int]) -> bool:
+        """Проверяет, остаётся ли хвост змейки на месте, когда её голова
+        идёт в клетку {head}: змейка кусает себя, ест хорошее яблоко или
+        слишком короткая, чтобы укоротиться от плохого яблока или камня.
+        """
+        if snake.can_bite_itself(head):
+            return True
+        obstacle = self.free_cells.object_at(head)
+        if obstacle is None:
+            return False
+        if obstacle.name == EVENT_APPLE:
+            return True
+        if obstacle.name == EVENT_BAD_APPLE:
+            return snake.length == 1
+        if obstacle.name == EVENT_STONE:
+            return snake.length <= obstacle.weight
+        return False
+
+    def leaving_tails(self, heads: dict[int, tuple[int, int]]
+                      ) -> dict[tuple[int, int], int]:
+        """Возвращает клетки хвостов, которые уйдут на этом ходу, и номера
+        их змеек. Столкновения змеек здесь не учитываются, см.
+        { crashed }.
+        """
+        tails = {}
+        for player, head in heads.items():
+            snake = self.snakes[player]
+            if not self.keeps_tail(snake, head):
+                tails[snake.positions[-1]] = player
+        return tails
+
+    def crashed(self, heads: dict[int, tuple[int, int]]) -> set[int]:
+        """Возвращает номера змеек, врезавшихся в другие змейки: головы
+        {heads} сравниваются между собой и с сеткой занятости на начало
+        хода. Врезавшаяся змейка не двигается, поэтому её хвост не
+        уходит, и голова, которая шла за этим хвостом, тоже врезается.
+        """
+        counts = Counter(heads.values())
+        tails = self.leaving_tails(heads)
+        owners = self.owners
+        crashed = {
+            player for player, head in heads.items()
+            if counts[head] > 1 or (
+                owners.get(head, player) != player and head not in tails
+            )
+        }
+        followers = {
+            head: player for player, head in heads.items() if head in tails
+        }
+        pending = list(crashed)
+        while pending:
+            tail = self.snakes[pending.pop()].positions[-1]
+            follower = followers.get(tail)
+            if tails.pop(tail, None) is not None and (
+                    follower is not None and follower not in crashed):
+                crashed.add(follower)
+                pending.append(follower)
+        return crashed
+
+    def move_snake(self, snake: PlayerSnake, new_head: tuple[int, int],
+                   crashed: bool) -> str:
+        """Выполняет ход одной змейки и возвращает событие хода."""
+        stats = snake.stats
+        if crashed:
+            stats.reset = True
+            event = EVENT_BITE
+        else:
+            event = resolve_move(new_head, snake, self.obstacles, stats)
+        if event == EVENT_MOVE:
+            snake.move(new_head)
+        return event
+
+    def knock_stones(self, knocks: dict[int, tuple[Stone, tuple[int, int]]]
+                     ) -> None:
+        """Змейки {knocks} (номер -> камень и клетка новой головы) бьют
+        камни, как в { snake_engine.hit_stone }. Сначала все змейки теряют
+        сегменты, и только потом камни отлетают по порядку номеров
+        игроков, поэтому камень падает на змейки уже после их ходов.
+        Камень, который уже сбила с места другая змейка, не отлетает.
+        """
+        knocked = []
+        for player in sorted(knocks):
+            snake = self.snakes[player]
+            stone, head = knocks[player]
+            if snake.length <= stone.weight:
+                snake.stats.reset = True
+                continue
+            for _ in range(stone.weight):
+                snake.cut_tail()
+            knocked.append((snake, stone, head))
+
+        for snake, stone, head in knocked:
+            if stone.position == head:
+                clear_stone_trace(stone, snake, self.obstacles, snake.stats)
+
+    def move_snakes(self, heads: dict[int, tuple[int, int]],
+                    crashed: set[int]) -> dict[int, str]:
+        """Выполняет ходы змеек и возвращает события по игрокам. Удары
+        по камням откладываются до конца хода, см. { knock_stones }.
+        """
+        object_at = self.free_cells.object_at
+        events = {}
+        knocks = {}
+        for player, head in heads.items():
+            obstacle = object_at(head)
+            if player not in crashed and obstacle is not None and (
+                    obstacle.name == EVENT_STONE):
+                knocks[player] = (obstacle, head)
+                events[player] = EVENT_STONE
+            else:
+                events[player] = self.move_snake(
+                    self.snakes[player], head, player in crashed
+                )
+        self.knock_stones(knocks)
+        return events
+
+    def tick(self) -> dict[int, str]:
+        """Выполняет ход всех змеек и возвращает события по игрокам.
+        Пока змейки ходят, клетки их новых голов заняты в индексе поля,
+        чтобы съеденное яблоко не появилось там и не изменило исход хода,
+        рассчитанный в { crashed }. Врезавшиеся змейки появляются заново
+        после ходов остальных.
+        """
+        snakes = self.snakes
+        free_cells = self.free_cells
+        heads = {
+            player: self.new_head(snake) for player, snake in snakes.items()
+        }
+        crashed = self.crashed(heads)
+        reserved = [
+            head for player, head in heads.items() if player not in crashed
+        ]
+        for head in reserved:
+            free_cells.take(head)
+        events = self.move_snakes(heads, crashed)
+        for head in reserved:
+            free_cells.release(head)
+        for snake in snakes.values():
+            stats = snake.stats
+            if stats.reset:
+                stats.reset = False
+                stats.update_count_of_resets()
+                snake.respawn()
+            stats.update_snake_length(snake.length)
+        return events
@@ -0,0 +1,361 @@
+"""Автопилот змейки на ядре { snake_engine }.
+
+Автопилот ведёт змейку к ближайшему хорошему яблоку по полю расстояний
+{ DistanceField }: для каждой клетки хранится число ходов до ближайшего
+хорошего яблока в обход стен. Стены - плохие яблоки, камни не легче
+змейки ({ Stone.weight } >= длины змейки) и тело самой змейки. Поле
+замкнуто: соседи крайних клеток - клетки у противоположного края.
+
+Поле не строится заново на каждом ходу, а чинится по изменениям:
+    - у каждой клетки запоминается сосед, через которого найдено её
+    расстояние (родитель). Когда клетка становится стеной или яблоко
+    съедено, проверяются только клетки, путь которых проходил через эту
+    клетку (её поддерево родителей). Клетка, у которой есть другой
+    сосед на шаг ближе к яблоку, просто меняет родителя, остальные
+    забывают расстояние;
+    - забытые и освободившиеся клетки (ушедший хвост) получают
+    расстояние от соседей, и уменьшение расстояний расходится по полю
+    очередью с приоритетом.
+Вся эта работа за ход ограничена бюджетом {AUTOPILOT_BUDGET} клеток.
+Пока очереди не разобраны, часть расстояний неизвестна или неточна, но
+в стену змейка всё равно не пойдёт: соседние клетки проверяются
+напрямую.
+
+{ Autopilot } подходит вместо клавиш клиента и как бот турнира
+{ snake_tournament }: он вызывается с состоянием игры и возвращает
+направление.
+"""
+from array import array
+from collections import deque
+from heapq import heappop, heappush
+from typing import Optional
+
+from snake_engine import (
+    EVENT_APPLE, EVENT_BAD_APPLE, EVENT_STONE, GRID_SIZE, OPPOSITE,
+    GameState, Snake
+)
+
+"""Сколько клеток поля расстояний разбирается за один ход."""
+AUTOPILOT_BUDGET = 1024
+"""Сколько новых голов может появиться у змейки за ход: сверх этого
+тело сверяется целиком.
+"""
+MAX_NEW_HEADS = 1
+"""Значение расстояния и родителя клетки, расстояние до которой не
+известно.
+"""
+UNKNOWN = -1
+
+
+class DistanceField():
+    """Расстояния от клеток поля до ближайшего источника (хорошего
+    яблока) в обход стен, см. описание модуля.
+
+    Клетки нумеруются по строкам: номер клетки (x, y) - y * {width} + x.
+    Расстояния, родители и счётчики стен хранятся в массивах по всем
+    клеткам поля. Изменения поля только ставят работу в очереди, а
+    разбирает их { DistanceField.update } в пределах бюджета.
+    """
+
+    def __init__(self, width: int, height: int) -> None:
+        """Создаёт поле {width} x {height} клеток без источников и стен."""
+        self.width = width
+        self.height = height
+        size = width * height
+        self.distances = array('i', [UNKNOWN]) * size
+        self.parents = array('i', [UNKNOWN]) * size
+        self.walls = bytearray(size)
+        self.sources: set[int] = set()
+        self.__stale: list[tuple[int, int]] = []
+        self.__forgotten: list[int] = []
+        self.__queue: list[tuple[int, int]] = []
+
+    @property
+    def pending(self) -> bool:
+        """Остались ли неразобранные изменения поля."""
+        return bool(self.__stale or self.__forgotten or self.__queue)
+
+    def neighbours(self, index: int) -> tuple[int, int, int, int]:
+        """Возвращает номера четырёх соседних клеток с учётом перехода
+        сквозь края поля.
+        """
+        width, size = self.width, len(self.walls)
+        pos_x = index % width
+        left = index - 1 if pos_x else index + width - 1
+        right = index + 1 if pos_x < width - 1 else index - width + 1
+        up = index - width if index >= width else index - width + size
+        down = index + width if index + width < size else index + width - size
+        return left, right, up, down
+
+    def distance(self, index: int) -> Optional[int]:
+        """Возвращает расстояние от клетки до источника или {None}."""
+        distance = self.distances[index]
+        return None if distance == UNKNOWN else distance
+
+    def add_source(self, index: int) -> None:
+        """Делает клетку источником."""
+        self.sources.add(index)
+        if not self.walls[index]:
+            self.__lower(index, 0, index)
+
+    def remove_source(self, index: int) -> None:
+        """Убирает источник из клетки."""
+        self.sources.discard(index)
+        self.__forget(index)
+
+    def block(self, index: int) -> None:
+        """Добавляет в клетку стену. Стены в одной клетке считаются."""
+        self.walls[index] += 1
+        if self.walls[index] == 1:
+            self.__forget(index)
+
+    def unblock(self, index: int) -> None:
+        """Убирает из клетки одну стену."""
+        self.walls[index] -= 1
+        if not self.walls[index]:
+            self.__restore(index)
+
+    def __lower(self, index: int, distance: int, parent: int) -> None:
+        """Задаёт клетке расстояние через соседа {parent} и ставит её в
+        очередь, чтобы расстояние разошлось по соседям.
+        """
+        self.distances[index] = distance
+        self.parents[index] = parent
+        heappush(self.__queue, (distance, index))
+
+    def __forget(self, index: int) -> None:
+        """Ставит клетку в очередь клеток, расстояние которых могло
+        вырасти.
+        """
+        distance = self.distances[index]
+        if distance != UNKNOWN:
+            heappush(self.__stale, (distance, index))
+
+    def __restore(self, index: int) -> None:
+        """Задаёт свободной клетке без расстояния расстояние от ближайшего
+        соседа или от источника в ней самой.
+        """
+        if self.walls[index] or self.distances[index] != UNKNOWN:
+            return
+        if index in self.sources:
+            self.__lower(index, 0, index)
+            return
+
+        distances = self.distances
+        best = min(
+            (neighbour for neighbour in self.neighbours(index)
+             if distances[neighbour] != UNKNOWN),
+            key=distances.__getitem__, default=None
+        )
+        if best is not None:
+            self.__lower(index, distances[best] + 1, best)
+
+    def __keep(self, index: int, distance: int) -> bool:
+        """Проверяет, что у клетки осталась опора: источник в ней самой
+        или сосед на шаг ближе к источнику, который становится её
+        родителем.
+        """
+        if self.walls[index]:
+            return False
+        if index in self.sources:
+            return not distance
+        distances = self.distances
+        for neighbour in self.neighbours(index):
+            if distance and distances[neighbour] == distance - 1:
+                self.parents[index] = neighbour
+                return True
+        return False
+
+    def __drop_stale(self, budget: int) -> int:
+        """Разбирает клетки, расстояние которых могло вырасти, по
+        возрастанию расстояния. Клетка без опоры забывает расстояние, а
+        клетки, расстояние которых найдено через неё, проверяются
+        следующими. Соседи ближе к источнику к этому времени уже
+        проверены, поэтому опоре можно верить.
+        """
+        distances, parents = self.distances, self.parents
+        stale, forgotten = self.__stale, self.__forgotten
+        processed = 0
+        while stale and processed < budget:
+            distance, index = heappop(stale)
+            if distances[index] != distance:
+                continue
+            processed += 1
+            if self.__keep(index, distance):
+                continue
+            distances[index] = parents[index] = UNKNOWN
+            forgotten.append(index)
+            for neighbour in self.neighbours(index):
+                if parents[neighbour] == index and neighbour != index:
+                    heappush(stale, (distances[neighbour], neighbour))
+        return processed
+
+    def __lower_queue(self, budget: int) -> int:
+        """Разносит уменьшения расстояний из очереди по соседям."""
+        distances, parents, walls = self.distances, self.parents, self.walls
+        queue = self.__queue
+        processed = 0
+        while queue and processed < budget:
+            distance, index = heappop(queue)
+            if distances[index] != distance:
+                continue
+            processed += 1
+            distance += 1
+            for neighbour in self.neighbours(index):
+                known = distances[neighbour]
+                if not walls[neighbour] and (
+                        known == UNKNOWN or known > distance):
+                    distances[neighbour] = distance
+                    parents[neighbour] = index
+                    heappush(queue, (distance, neighbour))
+        return processed
+
+    def update(self, budget: int = AUTOPILOT_BUDGET) -> int:
+        """Разбирает очереди поля, не больше {budget} клеток: сначала
+        забывает расстояния без опоры, затем задаёт забытым клеткам
+        расстояния от соседей и разносит уменьшения расстояний.
+        Возвращает количество разобранных клеток.
+        """
+        processed = self.__drop_stale(budget)
+        forgotten = self.__forgotten
+        while not self.__stale and forgotten and processed < budget:
+            self.__restore(forgotten.pop())
+            processed += 1
+        if not self.__stale and not forgotten:
+            processed += self.__lower_queue(budget - processed)
+        return processed
+
+
+class Autopilot():
+    """Водитель змейки по полю расстояний до хороших яблок.
+
+    Поле расстояний привязано к индексу поля игры и создаётся заново,
+    если игра начата с новым индексом (см. { GameState.start }). После
+    каждого хода поле сверяется с игрой: источники и стены по
+    препятствиям, тело змейки - по новым головам и ушедшим хвостам.
+    """
+
+    def __init__(self, budget: int = AUTOPILOT_BUDGET) -> None:
+        """Создаёт автопилот с бюджетом {budget} клеток поля за ход."""
+        self.budget = budget
+        self.field: Optional[DistanceField] = None
+        self.__free_cells = None
+        self.__snake: Optional[Snake] = None
+        self.__body: deque[int] = deque()
+        self.__sources: set[int] = set()
+        self.__walls: set[int] = set()
+
+    def cell_index(self, cell: tuple[int, int]) -> int:
+        """Возвращает номер клетки поля расстояний."""
+        return cell[1] // GRID_SIZE * self.field.width + cell[0] // GRID_SIZE
+
+    def __bind(self, state: GameState) -> None:
+        """Создаёт поле расстояний для индекса поля игры {state}."""
+        free_cells = state.free_cells
+        self.__free_cells = free_cells
+        self.field = DistanceField(
+            -(-free_cells.width // GRID_SIZE),
+            -(-free_cells.height // GRID_SIZE)
+        )
+        self.__snake = None
+        self.__body = deque()
+        self.__sources = set()
+        self.__walls = set()
+
+    def __sync_obstacles(self, state: GameState) -> None:
+        """Сверяет источники и стены поля с препятствиями игры."""
+        length = state.snake.length
+        sources, walls = set(), set()
+        for obstacle in state.obstacles:
+            name = obstacle.name
+            if name == EVENT_APPLE:
+                sources.add(self.cell_index(obstacle.position))
+            elif name == EVENT_BAD_APPLE or (
+                    name == EVENT_STONE and obstacle.weight >= length):
+                walls.add(self.cell_index(obstacle.position))
+
+        field = self.field
+        for index in self.__walls - walls:
+            field.unblock(index)
+        for index in walls - self.__walls:
+            field.block(index)
+        for index in self.__sources - sources:
+            field.remove_source(index)
+        for index in sources - self.__sources:
+            field.add_source(index)
+        self.__sources, self.__walls = sources, walls
+
+    def __new_heads(self, positions: deque[tuple[int, int]]
+                    ) -> Optional[int]:
+        """Возвращает, сколько новых голов у змейки с прошлой сверки, или
+        {None}, если прежней головы нет среди первых сегментов.
+        """
+        if not self.__body:
+            return None
+        head = self.__body[0]
+        return next(
+            (count for count in range(min(MAX_NEW_HEADS + 1, len(positions)))
+             if self.cell_index(positions[count]) == head),
+            None
+        )
+
+    def __sync_body(self, snake: Snake) -> None:
+        """Сверяет стены тела змейки с её сегментами. Обычно за ход у
+        змейки меняются голова и хвост; после сброса игры и других
+        больших изменений тело сверяется целиком.
+        """
+        field, body = self.field, self.__body
+        positions = snake.positions
+        heads = self.__new_heads(positions) if snake is self.__snake else None
+        if heads is not None:
+            for count in range(heads - 1, -1, -1):
+                body.appendleft(self.cell_index(positions[count]))
+                field.block(body[0])
+            while len(body) > len(positions):
+                field.unblock(body.pop())
+            if body[-1] == self.cell_index(positions[-1]):
+                return
+
+        for index in body:
+            field.unblock(index)
+        body.clear()
+        body.extend(self.cell_index(cell) for cell in positions)
+        for index in body:
+            field.block(index)
+        self.__snake = snake
+
+    def sync(self, state: GameState) -> None:
+        """Переносит в поле расстояний изменения игры {state} и чинит
+        поле в пределах бюджета.
+        """
+        if state.free_cells is not self.__free_cells:
+            self.__bind(state)
+        self.__sync_obstacles(state)
+        self.__sync_body(state.snake)
+        self.field.update(self.budget)
+
+    def choose(self, snake: Snake) -> Optional[tuple[int, int]]:
+        """Возвращает направление в соседнюю клетку без стены, ближайшую
+        к яблоку. Клетки с неизвестным расстоянием хуже известных, при
+        равенстве змейка не поворачивает. {None} - свободных клеток нет.
+        """
+        field = self.field
+        best, best_key = None, None
+        for direction in OPPOSITE:
+            if direction == OPPOSITE[snake.direction]:
+                continue
+            index = self.cell_index(snake.new_head(direction))
+            if field.walls[index]:
+                continue
+            distance = field.distance(index)
+            key = (distance is None, distance or 0,
+                   direction != snake.direction)
+            if best_key is None or key < best_key:
+                best, best_key = direction, key
+
+        return best
+
+    def __call__(self, state: GameState) -> Optional[tuple[int, int]]:
+        """Возвращает направление змейки игры {state} на следующий ход."""
+        self.sync(state)
+        return self.choose(state.snake)
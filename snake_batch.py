@@ -0,0 +1,296 @@
+"""Пакетное ядро игры змейка на { numpy }.
+
+Модуль одновременно продвигает N независимых игр. Каждое поле хранится
+как слой тензора {boards} формы (N, GRID_HEIGHT, GRID_WIDTH) с кодами
+клеток, тело каждой змейки - как кольцевой буфер номеров клеток. Ход
+всех игр выполняется векторными операциями, без Python-объекта на игру.
+
+Правила повторяют { snake_engine }:
+    - голова проходит сквозь стену, как в { Snake.new_head };
+    - хорошее яблоко увеличивает змейку, плохое - уменьшает (но не меньше
+    одного сегмента), яблоко переносится в свободную клетку;
+    - укус себя или камня тяжелее змейки сбрасывает игру;
+    - более лёгкий камень отнимает {stone_weight} сегментов и отлетает по
+    следу { Stone.get_trace }, препятствия со следа переносятся в
+    свободные клетки. Если камень падает на змейку - игра сбрасывается;
+    - встретив другой камень, камень останавливается перед ним, а
+    встреченный отлетает дальше, не больше {knock_back_limit} полётов
+    за удар (по умолчанию {KNOCK_BACK_LIMIT}), см. { clear_stone_trace }.
+"""
+from typing import Optional
+
+import numpy as np
+
+from snake_engine import (
+    DEFAULT_COUNT_APPLES, DEFAULT_COUNT_BAD_APPLES, DEFAULT_COUNT_STONES,
+    DEFAULT_STONE_WEIGHT, DOWN, GRID_HEIGHT, GRID_WIDTH, KNOCK_BACK_LIMIT,
+    LEFT, RIGHT, UP
+)
+
+"""Коды клеток поля."""
+CELL_EMPTY = 0
+CELL_SNAKE = 1
+CELL_APPLE = 2
+CELL_BAD_APPLE = 3
+CELL_STONE = 4
+"""Коды событий хода, возвращаемые { SnakeBatch.step }."""
+BATCH_MOVE = 0
+BATCH_APPLE = 1
+BATCH_BAD_APPLE = 2
+BATCH_STONE = 3
+BATCH_BITE = 4
+"""Событие хода по коду клетки, в которую идёт голова."""
+CELL_EVENTS = np.array(
+    [BATCH_MOVE, BATCH_BITE, BATCH_APPLE, BATCH_BAD_APPLE, BATCH_STONE],
+    dtype=np.int8
+)
+"""Направления по номеру действия и номер противоположного направления."""
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+DIRECTION_DX = np.array([dx for dx, _ in DIRECTIONS])
+DIRECTION_DY = np.array([dy for _, dy in DIRECTIONS])
+OPPOSITE_ACTIONS = np.array([1, 0, 3, 2])
+"""Попыток случайного выбора свободной клетки до точного поиска."""
+SPAWN_ATTEMPTS = 8
+
+
+def direction_index(direction: tuple[int, int]) -> int:
+    """Возвращает номер действия для направления из { snake_engine }."""
+    return DIRECTIONS.index(direction)
+
+
+class SnakeBatch():
+    """N независимых игр, которые ходят синхронно."""
+
+    def __init__(self, count: int,
+                 width: int = GRID_WIDTH,
+                 height: int = GRID_HEIGHT,
+                 apples: int = DEFAULT_COUNT_APPLES,
+                 bad_apples: int = DEFAULT_COUNT_BAD_APPLES,
+                 stones: int = DEFAULT_COUNT_STONES,
+                 stone_weight: int = DEFAULT_STONE_WEIGHT,
+                 seed: Optional[int] = None,
+                 knock_back_limit: int = KNOCK_BACK_LIMIT) -> None:
+        """Создаёт {count} игр на полях {width} x {height} клеток."""
+        self.count = count
+        self.width = width
+        self.height = height
+        self.objects = (
+            (CELL_APPLE, apples),
+            (CELL_BAD_APPLE, bad_apples),
+            (CELL_STONE, stones),
+        )
+        self.stone_weight = stone_weight
+        self.knock_back_limit = knock_back_limit
+        self.rng = np.random.default_rng(seed)
+        cells = width * height
+
+        self.boards = np.zeros((count, height, width), dtype=np.int8)
+        self.__cells = self.boards.reshape(count, cells)
+        self.body = np.zeros((count, cells), dtype=np.int32)
+        self.head = np.zeros(count, dtype=np.int64)
+        self.length = np.zeros(count, dtype=np.int64)
+        self.direction = np.zeros(count, dtype=np.int64)
+        self.eaten_apples = np.zeros(count, dtype=np.int64)
+        self.reset_count = np.zeros(count, dtype=np.int64)
+        self.__games = np.arange(count)
+
+        self.reset_games(self.__games)
+
+    def reset_games(self, games: np.ndarray) -> None:
+        """Сбрасывает игры {games}: змейка длиной в один сегмент в центре
+        поля со случайным направлением, препятствия в случайных клетках.
+        """
+        center = (self.height // 2) * self.width + self.width // 2
+        self.__cells[games] = CELL_EMPTY
+        self.__cells[games, center] = CELL_SNAKE
+        self.body[games, 0] = center
+        self.head[games] = 0
+        self.length[games] = 1
+        self.direction[games] = self.rng.integers(0, 4, size=len(games))
+
+        for code, count in self.objects:
+            for _ in range(count):
+                self.spawn(games, code)
+
+    def free_cells(self, games: np.ndarray) -> np.ndarray:
+        """Возвращает по случайной свободной клетке для каждой игры из
+        {games} или -1, если свободных клеток нет. Сначала клетки
+        выбираются случайно с проверкой, и только для неудачных игр
+        свободная клетка ищется перебором поля.
+        """
+        cells = np.full(len(games), -1)
+        pending = np.arange(len(games))
+        for _ in range(SPAWN_ATTEMPTS):
+            candidates = self.rng.integers(
+                0, self.__cells.shape[1], size=len(pending)
+            )
+            free = self.__cells[games[pending], candidates] == CELL_EMPTY
+            cells[pending[free]] = candidates[free]
+            pending = pending[~free]
+            if not len(pending):
+                return cells
+
+        for index in pending:
+            free = np.flatnonzero(self.__cells[games[index]] == CELL_EMPTY)
+            if len(free):
+                cells[index] = self.rng.choice(free)
+
+        return cells
+
+    def spawn(self, games: np.ndarray, code: int) -> np.ndarray:
+        """Ставит объект {code} в свободную клетку каждой игры из {games}.
+        Возвращает маску игр, в которых свободных клеток не осталось.
+        """
+        cells = self.free_cells(games)
+        placed = cells >= 0
+        self.__cells[games[placed], cells[placed]] = code
+        return ~placed
+
+    def head_cells(self) -> np.ndarray:
+        """Возвращает номера клеток с головами всех змеек."""
+        return self.body[self.__games, self.head]
+
+    def next_cells(self, cells: np.ndarray, direction: np.ndarray,
+                   distance: int = 1) -> np.ndarray:
+        """Сдвигает клетки на {distance} шагов в направлениях {direction}
+        с переходом сквозь стены.
+        """
+        pos_y, pos_x = np.divmod(cells, self.width)
+        pos_y = (pos_y + DIRECTION_DY[direction] * distance) % self.height
+        pos_x = (pos_x + DIRECTION_DX[direction] * distance) % self.width
+        return pos_y * self.width + pos_x
+
+    def push_head(self, games: np.ndarray, cells: np.ndarray) -> None:
+        """Добавляет змейкам игр {games} новую голову."""
+        capacity = self.body.shape[1]
+        self.head[games] = (self.head[games] + 1) % capacity
+        self.body[games, self.head[games]] = cells
+        self.__cells[games, cells] = CELL_SNAKE
+        self.length[games] += 1
+
+    def cut_tail(self, games: np.ndarray) -> None:
+        """Укорачивает змейки игр {games} на один сегмент с конца."""
+        capacity = self.body.shape[1]
+        tail = (self.head[games] - self.length[games] + 1) % capacity
+        self.__cells[games, self.body[games, tail]] = CELL_EMPTY
+        self.length[games] -= 1
+
+    def step(self, actions: Optional[np.ndarray] = None
+             ) -> tuple[np.ndarray, np.ndarray]:
+        """Выполняет один ход во всех играх. {actions} - номера
+        направлений из {DIRECTIONS} для каждой игры, -1 - без поворота.
+        Развороты назад игнорируются. Возвращает коды событий хода и
+        маску игр, которые были сброшены.
+        """
+        if actions is not None:
+            actions = np.asarray(actions)
+            turn = (actions >= 0) & (
+                actions != OPPOSITE_ACTIONS[self.direction]
+            )
+            self.direction[turn] = actions[turn]
+
+        games = self.__games
+        new_heads = self.next_cells(self.head_cells(), self.direction)
+        targets = self.__cells[games, new_heads]
+        events = CELL_EVENTS[targets]
+        reset = targets == CELL_SNAKE
+
+        moved = games[targets == CELL_EMPTY]
+        self.cut_tail(moved)
+        self.push_head(moved, new_heads[moved])
+
+        reset |= self.eat(games[targets == CELL_APPLE], new_heads, True)
+        reset |= self.eat(games[targets == CELL_BAD_APPLE], new_heads, False)
+        reset |= self.hit_stone(games[targets == CELL_STONE], new_heads)
+
+        resets = games[reset]
+        self.reset_count[resets] += 1
+        self.reset_games(resets)
+        return events, reset
+
+    def eat(self, games: np.ndarray, new_heads: np.ndarray,
+            good: bool) -> np.ndarray:
+        """Змейки игр {games} съедают яблоко в клетке {new_heads}: хорошее
+        увеличивает змейку, плохое уменьшает. Яблоко переносится в
+        свободную клетку. Возвращает маску сброса для всех игр.
+        """
+        reset = np.zeros(self.count, dtype=bool)
+        self.eaten_apples[games] += 1
+        if good:
+            self.push_head(games, new_heads[games])
+            code = CELL_APPLE
+        else:
+            self.__cells[games, new_heads[games]] = CELL_EMPTY
+            self.cut_tail(games[self.length[games] > 1])
+            code = CELL_BAD_APPLE
+
+        reset[games[self.spawn(games, code)]] = True
+        return reset
+
+    def fly_stones(self, games: np.ndarray, stones: np.ndarray,
+                   direction: np.ndarray, chain: bool,
+                   displaced: list) -> tuple[np.ndarray, np.ndarray]:
+        """Проводит камни {stones} игр {games} по следу, как
+        { fly_stone }. Возвращает клетки, куда камни упадут, и клетки
+        камней, перед которыми они остановились (если {chain} = {True}),
+        или -1. Остальные препятствия на следе убираются с поля и
+        добавляются в {displaced} парами (игры, коды).
+        """
+        landing = stones.copy()
+        hit = np.full(len(games), -1)
+        flying = np.ones(len(games), dtype=bool)
+        for distance in range(1, self.stone_weight):
+            trace = self.next_cells(stones, direction, distance)
+            codes = self.__cells[games, trace]
+            if chain:
+                stop = flying & (codes == CELL_STONE)
+                hit[stop] = trace[stop]
+                flying &= ~stop
+            pushed = flying & (codes != CELL_EMPTY) & (codes != CELL_SNAKE)
+            self.__cells[games[pushed], trace[pushed]] = CELL_EMPTY
+            displaced.append((games[pushed], codes[pushed]))
+            landing[flying] = trace[flying]
+
+        return landing, hit
+
+    def hit_stone(self, games: np.ndarray,
+                  new_heads: np.ndarray) -> np.ndarray:
+        """Змейки игр {games} врезаются в камень в клетке {new_heads}.
+        Камни отлетают цепочкой, как в { clear_stone_trace }.
+        Возвращает маску сброса для всех игр.
+        """
+        reset = np.zeros(self.count, dtype=bool)
+        heavy = self.length[games] <= self.stone_weight
+        reset[games[heavy]] = True
+        games = games[~heavy]
+        for _ in range(self.stone_weight):
+            self.cut_tail(games)
+
+        stones = new_heads[games]
+        direction = self.direction[games]
+        displaced: list = []
+        for flight in range(1, self.knock_back_limit + 1):
+            landing, hit = self.fly_stones(
+                games, stones, direction,
+                flight < self.knock_back_limit, displaced
+            )
+            crushed = self.__cells[games, landing] == CELL_SNAKE
+            reset[games[crushed]] = True
+            landed = games[~crushed]
+            self.__cells[landed, stones[~crushed]] = CELL_EMPTY
+            self.__cells[landed, landing[~crushed]] = CELL_STONE
+
+            chained = ~crushed & (hit >= 0)
+            games, stones = games[chained], hit[chained]
+            direction = direction[chained]
+            if not len(games):
+                break
+
+        for hit_games, codes in displaced:
+            kept = ~reset[hit_games]
+            hit_games, codes = hit_games[kept], codes[kept]
+            for code in np.unique(codes):
+                respawn = hit_games[codes == code]
+                reset[respawn[self.spawn(respawn, code)]] = True
+
+        return reset
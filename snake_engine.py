@@ -0,0 +1,1183 @@
+"""Ядро игры змейка без зависимости от { pygame }.
+
+Модуль содержит игровые объекты и правила игры. Ничего не рисует и не
+обращается к экрану, поэтому игру можно моделировать без дисплея и SDL.
+
+Основной интерфейс - функция { step(state, action) }: она выполняет один
+игровой ход над состоянием { GameState } и возвращает состояние и список
+произошедших событий. Клиент с отрисовкой (см. { the_snake }) - лишь один
+из пользователей ядра.
+"""
+from array import array
+from collections import Counter, deque
+from random import Random, getrandbits
+from time import perf_counter
+from typing import Callable, Iterable, Iterator, Optional
+
+"""Настройки игрового поля."""
+SCREEN_WIDTH, SCREEN_HEIGHT = 640, 480
+MIDDLE_SCREEN = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+GRID_SIZE = 20
+GRID_WIDTH = SCREEN_WIDTH // GRID_SIZE
+GRID_HEIGHT = SCREEN_HEIGHT // GRID_SIZE
+FIELD_SIZE = GRID_WIDTH * GRID_HEIGHT
+FIELD_CELLS = set(
+    (x * GRID_SIZE, y * GRID_SIZE)
+    for x in range(GRID_WIDTH)
+    for y in range(GRID_HEIGHT)
+)
+"""Направления движения змейки."""
+UP = (0, -1)
+DOWN = (0, 1)
+LEFT = (-1, 0)
+RIGHT = (1, 0)
+OPPOSITE = {UP: DOWN, DOWN: UP, LEFT: RIGHT, RIGHT: LEFT}
+"""Цвета игровых объектов."""
+APPLE_COLOR = (255, 0, 0)
+BAD_APPLE_COLOR = (255, 100, 55)
+SNAKE_COLOR = (0, 255, 0)
+STONE_COLOR = (107, 99, 92)
+DEFAULT_COLOR = (0, 0, 0)
+"""Количество игровых объектов на поле."""
+DEFAULT_COUNT_APPLES = 20
+DEFAULT_COUNT_BAD_APPLES = 20
+DEFAULT_COUNT_STONES = 20
+DEFAULT_STONE_WEIGHT = 5
+"""Наибольшее количество полётов камней при одном ударе змейки. Камень
+останавливается перед другим камнем на своём следе, и тот отлетает
+дальше на свой вес. Последний по пределу камень переносит встреченные
+камни в свободные клетки, как и яблоки.
+"""
+KNOCK_BACK_LIMIT = 8
+"""Поле, в котором клеток больше этого числа, хранит в индексе свободных
+клеток только занятые клетки, а случайную свободную клетку выбирает
+повторными попытками (не больше {SPARSE_CHOICE_ATTEMPTS}, затем
+перебором поля).
+"""
+SPARSE_FIELD_CELLS = 100_000
+SPARSE_CHOICE_ATTEMPTS = 64
+"""Частота игровых ходов в секунду (ход на каждый 11-й кадр при 60
+кадрах в секунду) и предел ходов, которые часы симуляции выполнят за
+один кадр, догоняя отставание. Клиенты берут их отсюда.
+"""
+TICK_RATE = 60 / 11
+MAX_CATCH_UP_TICKS = 5
+"""Генератор случайных чисел для объектов без индекса поля и разрядность
+случайного зерна новой игры.
+"""
+DEFAULT_RNG = Random()
+SEED_BITS = 63
+"""События игрового хода, возвращаемые функцией { step }."""
+EVENT_MOVE = 'move'
+EVENT_APPLE = 'apple'
+EVENT_BAD_APPLE = 'bad_apple'
+EVENT_STONE = 'stone'
+EVENT_BITE = 'bite'
+EVENT_RESET = 'reset'
+"""Коды видов препятствий в таблице { ObstacleTable }, имена и цвета
+препятствий по коду.
+"""
+KIND_APPLE = 0
+KIND_BAD_APPLE = 1
+KIND_STONE = 2
+KIND_NAMES = (EVENT_APPLE, EVENT_BAD_APPLE, EVENT_STONE)
+KIND_COLORS = (APPLE_COLOR, BAD_APPLE_COLOR, STONE_COLOR)
+
+
+class FreeCells():
+    """Индекс свободных клеток игрового поля.
+
+    Свободные клетки хранятся в списке, а позиция каждой клетки в списке -
+    в словаре. Занятая клетка удаляется перестановкой с последним элементом,
+    поэтому занять, освободить и выбрать случайную клетку можно за O(1).
+    Для занятых клеток ведётся счётчик объектов: клетка становится
+    свободной, только когда её покинет последний объект.
+
+    Кроме того индекс хранит препятствия по координатам, чтобы найти
+    объект в клетке одним обращением к словарю. При включённом
+    {track_changes} индекс запоминает клетки, состояние которых менялось,
+    чтобы клиент мог перерисовать только их.
+
+    На большом поле (больше {SPARSE_FIELD_CELLS} клеток) список свободных
+    клеток не строится: память индекса зависит только от числа объектов,
+    а не от размера поля.
+    """
+
+    def __init__(self, width: int = SCREEN_WIDTH,
+                 height: int = SCREEN_HEIGHT,
+                 rng: Optional[Random] = None) -> None:
+        """Создаёт индекс, в котором свободны все клетки поля
+        размером {width} x {height} пикселей. Случайные клетки
+        выбираются генератором {rng} игры.
+        """
+        self.width = width
+        self.height = height
+        self.rng = rng if rng is not None else Random()
+        self.size = (-(-width // GRID_SIZE)) * (-(-height // GRID_SIZE))
+        self.sparse = self.size > SPARSE_FIELD_CELLS
+        self.center = (width // 2 // GRID_SIZE * GRID_SIZE,
+                       height // 2 // GRID_SIZE * GRID_SIZE)
+        self.__free_count = self.size
+        self.__cells: list[tuple[int, int]] = [] if self.sparse else [
+            (x, y)
+            for x in range(0, width, GRID_SIZE)
+            for y in range(0, height, GRID_SIZE)
+        ]
+        self.__index: dict[tuple[int, int], int] = {
+            cell: index for index, cell in enumerate(self.__cells)
+        }
+        self.__used: dict[tuple[int, int], int] = {}
+        self.__objects: dict[tuple[int, int], 'GameObject'] = {}
+        self.track_changes: bool = False
+        self.__changed: set[tuple[int, int]] = set()
+
+    def __len__(self) -> int:
+        """Возвращает количество свободных клеток."""
+        return self.__free_count
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        """Перебирает свободные клетки."""
+        if not self.sparse:
+            return iter(self.__cells)
+
+        return (
+            (x, y)
+            for x in range(0, self.width, GRID_SIZE)
+            for y in range(0, self.height, GRID_SIZE)
+            if (x, y) not in self.__used
+        )
+
+    def is_free(self, cell: tuple[int, int]) -> bool:
+        """Возвращает {True} если клетка на поле и не занята."""
+        if self.sparse:
+            return self.on_field(cell) and cell not in self.__used
+        return cell in self.__index
+
+    def on_field(self, cell: tuple[int, int]) -> bool:
+        """Проверяет, что координаты являются клеткой игрового поля."""
+        pos_x, pos_y = cell
+        return (0 <= pos_x < self.width and 0 <= pos_y < self.height
+                and not pos_x % GRID_SIZE and not pos_y % GRID_SIZE)
+
+    def wrap(self, cell: tuple[int, int]) -> tuple[int, int]:
+        """Переносит координаты сквозь края поля."""
+        return cell[0] % self.width, cell[1] % self.height
+
+    def pop_changed(self) -> set[tuple[int, int]]:
+        """Возвращает клетки, изменившиеся с прошлого вызова."""
+        changed, self.__changed = self.__changed, set()
+        return changed
+
+    def object_at(self, cell: tuple[int, int]) -> Optional['GameObject']:
+        """Возвращает препятствие в клетке или {None}."""
+        return self.__objects.get(cell)
+
+    def take(self, cell: tuple[int, int],
+             owner: Optional['GameObject'] = None) -> None:
+        """Отмечает клетку как занятую ещё одним объектом. Если передан
+        {owner}, клетка запоминается как позиция этого препятствия.
+        """
+        if owner is not None:
+            self.__objects[cell] = owner
+        if self.track_changes:
+            self.__changed.add(cell)
+        count = self.__used.get(cell, 0)
+        self.__used[cell] = count + 1
+        if not count and self.on_field(cell):
+            self.__free_count -= 1
+            self.__remove_free(cell)
+
+    def take_all(self, counts: dict[tuple[int, int], int]) -> None:
+        """Отмечает занятыми сразу много клеток поля, например сегменты
+        змейки из снимка игры. {counts} - количество объектов в каждой
+        клетке. Множества клеток сравниваются целиком, а если занимается
+        большая часть свободных клеток, их список строится заново одним
+        проходом вместо перестановки на каждую клетку.
+        """
+        used = self.__used
+        fresh = [cell for cell in counts.keys() - used.keys()
+                 if self.on_field(cell)]
+        merged = dict(counts)
+        for cell in counts.keys() & used.keys():
+            merged[cell] += used[cell]
+        used.update(merged)
+        if self.track_changes:
+            self.__changed.update(counts)
+        self.__free_count -= len(fresh)
+
+        if len(fresh) * 8 < len(self.__cells):
+            for cell in fresh:
+                self.__remove_free(cell)
+        elif not self.sparse:
+            self.__cells = [cell for cell in self.__cells
+                            if cell not in used]
+            self.__index = {
+                cell: index for index, cell in enumerate(self.__cells)
+            }
+
+    def __remove_free(self, cell: tuple[int, int]) -> None:
+        """Убирает клетку из списка свободных перестановкой с последней."""
+        index = self.__index.pop(cell, None)
+        if index is None:
+            return
+
+        last = self.__cells.pop()
+        if index < len(self.__cells):
+            self.__cells[index] = last
+            self.__index[last] = index
+
+    def release(self, cell: tuple[int, int],
+                owner: Optional['GameObject'] = None) -> None:
+        """Отмечает, что объект покинул клетку. Клетки, которые не были
+        заняты или лежат за пределами поля, игнорируются.
+        """
+        if owner is not None and self.__objects.get(cell) is owner:
+            del self.__objects[cell]
+        if self.track_changes:
+            self.__changed.add(cell)
+        count = self.__used.get(cell, 0)
+        if count > 1:
+            self.__used[cell] = count - 1
+        elif count == 1:
+            del self.__used[cell]
+            if self.on_field(cell):
+                self.__free_count += 1
+                if not self.sparse:
+                    self.__index[cell] = len(self.__cells)
+                    self.__cells.append(cell)
+
+    def choice(self) -> tuple[int, int]:
+        """Возвращает случайную свободную клетку. На большом поле клетка
+        выбирается случайно, пока не найдётся свободная.
+        """
+        if not self.sparse:
+            return self.rng.choice(self.__cells)
+
+        for _ in range(SPARSE_CHOICE_ATTEMPTS):
+            cell = (self.rng.randrange(0, self.width, GRID_SIZE),
+                    self.rng.randrange(0, self.height, GRID_SIZE))
+            if cell not in self.__used:
+                return cell
+
+        return self.rng.choice(list(self))
+
+
+class GameObject():
+    """Базовый класс от которого наследуются все игровые объекты."""
+
+    __slots__ = ('position', 'body_color', 'name', 'free_cells')
+
+    def __init__(self,
+                 body_color: tuple[int, int, int] = DEFAULT_COLOR,
+                 name: Optional[str] = None,
+                 free_cells: Optional[FreeCells] = None) -> None:
+        """Инициализирует новый экземпляр класса {GameObject}. Если
+        передан индекс {free_cells}, объект отмечает в нём свою клетку
+        и обновляет индекс при каждом перемещении.
+        """
+        self.position: tuple[int, int] = (
+            MIDDLE_SCREEN if free_cells is None else free_cells.center
+        )
+        self.body_color = body_color
+        self.name = name or str(type(self).__name__).lower()
+        self.free_cells = free_cells
+        if free_cells is not None:
+            self.occupy(self.position)
+
+    def draw(self) -> None:
+        """Базовый метод рисования объектов. Ядро ничего не рисует,
+        отрисовкой занимается клиент (например { the_snake }).
+        """
+
+    def occupy(self, cell: tuple[int, int]) -> None:
+        """Отмечает клетку занятой в индексе свободных клеток."""
+        if self.free_cells is not None:
+            self.free_cells.take(cell, self)
+
+    def vacate(self, cell: tuple[int, int]) -> None:
+        """Отмечает клетку освобождённой в индексе свободных клеток."""
+        if self.free_cells is not None:
+            self.free_cells.release(cell, self)
+
+    def wrap(self, cell: tuple[int, int]) -> tuple[int, int]:
+        """Переносит координаты сквозь края поля: индекса свободных
+        клеток, если он есть, иначе экрана.
+        """
+        if self.free_cells is not None:
+            return self.free_cells.wrap(cell)
+        return cell[0] % SCREEN_WIDTH, cell[1] % SCREEN_HEIGHT
+
+    def get_rng(self) -> Random:
+        """Возвращает генератор случайных чисел игры из индекса свободных
+        клеток, а без индекса - общий {DEFAULT_RNG}.
+        """
+        if self.free_cells is not None:
+            return self.free_cells.rng
+        return DEFAULT_RNG
+
+    def set_position(self, position: tuple[int, int]) -> None:
+        """Переставляет объект в новую клетку."""
+        self.vacate(self.position)
+        self.position = position
+        self.occupy(position)
+
+    def place(self, position: tuple[int, int]) -> None:
+        """Ставит в клетку объект, который сейчас не на поле, например
+        препятствие прошлой игры. В отличие от { set_position } старая
+        клетка не освобождается: в новом поле её может занимать другой
+        объект.
+        """
+        self.position = position
+        self.occupy(position)
+
+    def remove_from_field(self) -> None:
+        """Освобождает все клетки, занятые объектом."""
+        self.vacate(self.position)
+
+    def randomize_position(self,
+                           used_cells: list[tuple[int, int]] = []) -> None:
+        """Задаёт объекту случайные координаты. При наличии индекса
+        свободных клеток выбор выполняется за O(1) и {used_cells}
+        не используется.
+        """
+        if self.free_cells is None:
+            self.position = self.get_rng().choice(
+                tuple(FIELD_CELLS - set(used_cells))
+            )
+        else:
+            self.set_position(self.free_cells.choice())
+
+
+class ObstacleTable():
+    """Таблица препятствий поля по столбцам: координаты, коды видов,
+    веса и номера цветов в палитре {palette} хранятся в массивах
+    { array }, по строке на препятствие.
+
+    Объекты { Apple } и { Stone } не хранят своих данных: это окна в
+    строку таблицы. Поэтому препятствие стоит несколько байт в таблице и
+    небольшой объект со слотами, а при сбросе игры объекты и таблица
+    используются заново (см. { reuse_obstacles }).
+    """
+
+    __slots__ = ('xs', 'ys', 'kinds', 'weights', 'colors', 'palette')
+
+    def __init__(self) -> None:
+        """Создаёт пустую таблицу."""
+        self.xs = array('i')
+        self.ys = array('i')
+        self.kinds = array('B')
+        self.weights = array('I')
+        self.colors = array('B')
+        self.palette: list[tuple[int, int, int]] = list(KIND_COLORS)
+
+    def __len__(self) -> int:
+        """Возвращает количество строк."""
+        return len(self.kinds)
+
+    def append(self, kind: int, weight: int = 0,
+               body_color: Optional[tuple[int, int, int]] = None) -> int:
+        """Добавляет строку препятствия вида {kind} и возвращает её номер.
+        Без цвета {body_color} препятствие получает цвет своего вида.
+        """
+        if body_color is None:
+            body_color = KIND_COLORS[kind]
+        if body_color not in self.palette:
+            self.palette.append(body_color)
+        self.xs.append(0)
+        self.ys.append(0)
+        self.kinds.append(kind)
+        self.weights.append(weight)
+        self.colors.append(self.palette.index(body_color))
+        return len(self.kinds) - 1
+
+
+def obstacle_kind(name: Optional[str], default: int) -> int:
+    """Возвращает код вида препятствия по имени {name} или {default},
+    если имя не задано. Неизвестное имя вызывает { ValueError }.
+    """
+    if name is None:
+        return default
+    if name not in KIND_NAMES:
+        raise ValueError(f'Неизвестный вид препятствия: {name}.')
+    return KIND_NAMES.index(name)
+
+
+class Obstacle(GameObject):
+    """Препятствие - окно в строку {index} таблицы {table}. Координаты,
+    вид, цвет и вес читаются из таблицы и записываются в неё, имя
+    определяется видом. Слоты { GameObject } для этих полей остаются
+    пустыми.
+    """
+
+    __slots__ = ('table', 'index')
+
+    def __init__(self, kind: int,
+                 used_cells: list = [],
+                 free_cells: Optional[FreeCells] = None,
+                 table: Optional[ObstacleTable] = None,
+                 weight: int = 0,
+                 body_color: Optional[tuple[int, int, int]] = None,
+                 position: Optional[tuple[int, int]] = None) -> None:
+        """Добавляет в таблицу {table} (без неё - в собственную таблицу
+        объекта) строку препятствия вида {kind} и ставит препятствие в
+        клетку {position}, а без неё - в случайную свободную клетку.
+        """
+        self.free_cells = free_cells
+        self.table = table if table is not None else ObstacleTable()
+        self.index = self.table.append(kind, weight, body_color)
+        if position is not None:
+            self.place(position)
+            return
+        self.position = (
+            MIDDLE_SCREEN if free_cells is None else free_cells.center
+        )
+        if free_cells is not None:
+            self.occupy(self.position)
+        self.randomize_position(used_cells)
+
+    @property
+    def position(self) -> tuple[int, int]:
+        """Координаты препятствия."""
+        return self.table.xs[self.index], self.table.ys[self.index]
+
+    @position.setter
+    def position(self, position: tuple[int, int]) -> None:
+        self.table.xs[self.index], self.table.ys[self.index] = position
+
+    @property
+    def kind(self) -> int:
+        """Код вида препятствия."""
+        return self.table.kinds[self.index]
+
+    @property
+    def name(self) -> str:
+        """Имя вида препятствия."""
+        return KIND_NAMES[self.table.kinds[self.index]]
+
+    @property
+    def body_color(self) -> tuple[int, int, int]:
+        """Цвет препятствия."""
+        return self.table.palette[self.table.colors[self.index]]
+
+
+class Apple(Obstacle):
+    """Класс описывающий игровой объект Яблоко."""
+
+    __slots__ = ()
+
+    def __init__(self,
+                 body_color: tuple[int, int, int] = APPLE_COLOR,
+                 used_cells: list = [],
+                 name: Optional[str] = None,
+                 free_cells: Optional[FreeCells] = None,
+                 table: Optional[ObstacleTable] = None,
+                 position: Optional[tuple[int, int]] = None) -> None:
+        """Инициализирует экземпляр класса {Apple}. Плохое яблоко - с
+        именем {EVENT_BAD_APPLE}.
+        """
+        super().__init__(obstacle_kind(name, KIND_APPLE), used_cells,
+                         free_cells, table, 0, body_color, position)
+
+
+class Stone(Obstacle):
+    """Класс описывающий игровой объект Камень."""
+
+    __slots__ = ()
+
+    def __init__(self,
+                 body_color: tuple[int, int, int] = STONE_COLOR,
+                 used_cells: list = [],
+                 weight: int = DEFAULT_STONE_WEIGHT,
+                 free_cells: Optional[FreeCells] = None,
+                 table: Optional[ObstacleTable] = None,
+                 position: Optional[tuple[int, int]] = None) -> None:
+        """Инициализирует экземпляр класса."""
+        super().__init__(KIND_STONE, used_cells, free_cells, table, weight,
+                         body_color, position)
+
+    @property
+    def weight(self) -> int:
+        """Вес камня."""
+        return self.table.weights[self.index]
+
+    @weight.setter
+    def weight(self, weight: int) -> None:
+        self.table.weights[self.index] = weight
+
+    def iter_trace(self, direction: tuple[int, int]
+                   ) -> Iterator[tuple[int, int]]:
+        """Перебирает клетки следа, по которому пролетит камень, начиная
+        с его собственной клетки. Как и змейка, камень проходит сквозь
+        стену и появляется с противоположной стороны поля.
+        """
+        pos_x, pos_y = self.position
+        new_x, new_y = (GRID_SIZE * direction[0], GRID_SIZE * direction[1])
+        for step in range(self.weight):
+            yield self.wrap((pos_x + new_x * step, pos_y + new_y * step))
+
+    def get_trace(self, direction: tuple[int, int]) -> list[tuple[int, int]]:
+        """Возвращает след по которому пролетит камень."""
+        return list(self.iter_trace(direction))
+
+    def move(self, new_position: tuple[int, int]) -> None:
+        """Сдивгает камень в новую позицию."""
+        self.set_position(new_position)
+
+
+class Snake(GameObject):
+    """Класс описывающий игровой объект 'Змейка'.
+
+    Сегменты хранятся в очереди {positions} (голова - первый элемент),
+    а занятые клетки - в мультимножестве. Поэтому движение, рост,
+    укорачивание и проверка самоукуса выполняются за O(1) при любой длине.
+    """
+
+    __slots__ = ('positions', 'length', 'last', 'direction', '__body')
+
+    def __init__(self,
+                 body_color: tuple[int, int, int] = SNAKE_COLOR,
+                 free_cells: Optional[FreeCells] = None,
+                 position: Optional[tuple[int, int]] = None) -> None:
+        """Инициализирует экземпляр класса {Snake}. Сегменты змейки
+        отмечаются в индексе {free_cells}, если он передан. Змейка
+        появляется в клетке {position}, по умолчанию - в центре поля.
+        """
+        super().__init__(body_color)
+        self.free_cells = free_cells
+        if position is not None:
+            self.position = position
+        elif free_cells is not None:
+            self.position = free_cells.center
+        self.positions: deque[tuple[int, int]] = deque()
+        self.__body: dict[tuple[int, int], int] = {}
+        self.reset()
+        self.direction: tuple[int, int] = RIGHT
+
+    def reset(self) -> None:
+        """Сбрасывает змейку в начальное состояние."""
+        self.remove_from_field()
+        self.positions = deque([self.position])
+        self.occupy(self.position)
+        self.length = 1
+        self.last: Optional[tuple[int, int]] = None
+        self.direction = self.get_rng().choice([RIGHT, LEFT, UP, DOWN])
+
+    def update_direction(self, direction: tuple[int, int]) -> None:
+        """Обновляет направление движения змейки."""
+        self.direction = direction
+
+    def new_head(self,
+                 direction: Optional[tuple[int, int]] = None
+                 ) -> tuple[int, int]:
+        """Возвращает координаты новой головы при движении в направлении
+        {direction} (по умолчанию - в текущем направлении змейки).
+        """
+        direction = direction or self.direction
+        pos_x, pos_y = self.get_head_position()
+        return self.wrap(
+            (pos_x + direction[0] * GRID_SIZE,
+             pos_y + direction[1] * GRID_SIZE)
+        )
+
+    def grow_up(self, new_segment: tuple[int, int]) -> None:
+        """Увиличивает змейку на один сегмент."""
+        self.positions.appendleft(new_segment)
+        self.occupy(new_segment)
+        self.update_size_info()
+
+    def cut_tail(self) -> None:
+        """Уменьшает змейку на один сегмент с конца."""
+        self.vacate(self.positions.pop())
+        self.update_size_info()
+
+    def occupy(self, cell: tuple[int, int]) -> None:
+        """Добавляет клетку сегмента в тело змейки и в индекс."""
+        if self.free_cells is not None:
+            self.free_cells.take(cell)
+        self.__body[cell] = self.__body.get(cell, 0) + 1
+
+    def vacate(self, cell: tuple[int, int]) -> None:
+        """Убирает клетку сегмента из тела змейки и из индекса."""
+        if self.free_cells is not None:
+            self.free_cells.release(cell)
+        count = self.__body.pop(cell, 0)
+        if count > 1:
+            self.__body[cell] = count - 1
+
+    def set_body(self, cells: Iterable[tuple[int, int]]) -> None:
+        """Заменяет все сегменты змейки клетками {cells} (от головы к
+        хвосту) без пошагового роста, например при загрузке снимка.
+        """
+        self.remove_from_field()
+        self.positions = deque(cells)
+        self.__body = dict(Counter(self.positions))
+        if self.free_cells is not None:
+            self.free_cells.take_all(self.__body)
+        self.last = None
+        self.update_size_info()
+
+    def occupies(self, cell: tuple[int, int]) -> bool:
+        """Проверяет, занята ли клетка одним из сегментов змейки."""
+        return cell in self.__body
+
+    def stone_falls_on(self, cell: tuple[int, int],
+                       stats: 'GameStats') -> bool:
+        """Проверяет, падает ли на змейку камень, отбитый в клетку
+        {cell}. Если падает, выставляет флаг сброса {stats.reset}.
+        """
+        if not self.occupies(cell):
+            return False
+        stats.reset = True
+        return True
+
+    def remove_from_field(self) -> None:
+        """Освобождает все клетки, занятые сегментами змейки."""
+        for position in self.positions:
+            self.vacate(position)
+
+    def update_size_info(self) -> None:
+        """Обновляет информацию о размере змейки."""
+        self.length = len(self.positions)
+
+    def get_head_position(self) -> tuple[int, int]:
+        """Возвращает позицию головы змейки."""
+        return self.positions[0]
+
+    def move(self, new_head: tuple[int, int]) -> None:
+        """Сдвигает змейку на одну клетку игрового поля."""
+        self.positions.appendleft(new_head)
+        self.occupy(new_head)
+        self.last = self.positions.pop()
+        self.vacate(self.last)
+
+    def can_bite_itself(self, new_head: tuple[int, int]) -> bool:
+        """Проверяет может ли следующим ходом змейка укусить сама себя."""
+        return self.occupies(new_head)
+
+    def try_bite(self, new_head: tuple[int, int], object: GameObject) -> bool:
+        """Принимает на вход объект и проверяет можно ли его укусить."""
+        return object.position == new_head
+
+
+class GameStats():
+    """Счётчики текущей игры. Не зависят от интерфейса и обновляются
+    правилами игры во время хода. Время игры {duration} в секундах
+    добавляет клиент, который отсчитывает ходы по часам.
+    """
+
+    __slots__ = ('reset', 'snake_length', 'best_length', 'eaten_apples',
+                 'reset_count', 'duration')
+
+    def __init__(self) -> None:
+        """Инициализирует счётчики и флаг сброса игры."""
+        self.reset: bool = False
+        self.snake_length: int = 1
+        self.best_length: int = 1
+        self.eaten_apples: int = 0
+        self.reset_count: int = 0
+        self.duration: float = 0
+
+    def update_eaten_apples(self) -> None:
+        """Обновляет количество съеденных яблок."""
+        self.eaten_apples += 1
+
+    def update_count_of_resets(self) -> None:
+        """Обновляет количество врезаний в препятствие."""
+        self.reset_count += 1
+
+    def update_snake_length(self, length: int) -> None:
+        """Обновляет значение длины зъмейки и лучшую длину за игру."""
+        self.snake_length = length
+        if length > self.best_length:
+            self.best_length = length
+
+    def update_duration(self, seconds: float) -> None:
+        """Добавляет ко времени игры {seconds} секунд игровых ходов."""
+        self.duration += seconds
+
+    def reset_info(self) -> None:
+        """Сбрасывает информаци о текущей игре."""
+        self.snake_length = 1
+        self.best_length = 1
+        self.eaten_apples = 0
+        self.reset_count = 0
+        self.duration = 0
+
+
+def get_good_apples(count: int = DEFAULT_COUNT_APPLES,
+                    used_cells: list = [],
+                    free_cells: Optional[FreeCells] = None,
+                    table: Optional[ObstacleTable] = None
+                    ) -> tuple[list, list]:
+    """Создает список хороших яблок в таблице {table} (без неё - в
+    новой таблице). И возвращает его.
+    """
+    table = table if table is not None else ObstacleTable()
+    apples = []
+    for _ in range(count):
+        apple = Apple(used_cells=used_cells, free_cells=free_cells,
+                      table=table)
+        apples.append(apple)
+        used_cells.append(apple.position)
+
+    return apples, used_cells
+
+
+def get_stones(count: int = DEFAULT_COUNT_STONES,
+               used_cells: list = [],
+               free_cells: Optional[FreeCells] = None,
+               table: Optional[ObstacleTable] = None) -> tuple[list, list]:
+    """Создает список камней в таблице {table} (без неё - в новой
+    таблице). И возвращает его.
+    """
+    table = table if table is not None else ObstacleTable()
+    stones = []
+    for _ in range(count):
+        stone = Stone(used_cells=used_cells, free_cells=free_cells,
+                      table=table)
+        stones.append(stone)
+        used_cells.append(stone.position)
+
+    return stones, used_cells
+
+
+def get_bad_apples(count: int = DEFAULT_COUNT_BAD_APPLES,
+                   used_cells: list = [],
+                   free_cells: Optional[FreeCells] = None,
+                   table: Optional[ObstacleTable] = None
+                   ) -> tuple[list, list]:
+    """Создает список плохих яблок в таблице {table} (без неё - в
+    новой таблице). И возвращает его.
+    """
+    table = table if table is not None else ObstacleTable()
+    bad_apples = []
+    for _ in range(0, count):
+        bad_apple = Apple(
+            BAD_APPLE_COLOR, used_cells, EVENT_BAD_APPLE, free_cells, table
+        )
+        bad_apples.append(bad_apple)
+        used_cells.append(bad_apple.position)
+
+    return bad_apples, used_cells
+
+
+def get_all_position(snake: Snake, obstacles: list[GameObject]) -> list:
+    """Возвращает список состоящий из координат всех
+    созданных объектов, змейка в список не входит.
+    """
+    return [obstacle.position for obstacle in obstacles] + list(
+        snake.positions
+    )
+
+
+def respawn(obstacle: GameObject, snake: Snake,
+            obstacles: list[GameObject]) -> None:
+    """Переносит препятствие в случайную свободную клетку. Список занятых
+    клеток строится только для объектов без индекса свободных клеток.
+    """
+    if obstacle.free_cells is None:
+        obstacle.randomize_position(get_all_position(snake, obstacles))
+    else:
+        obstacle.randomize_position()
+
+
+def respawn_all(displaced: Iterable[GameObject], snake: Snake,
+                obstacles: list[GameObject]) -> None:
+    """Переносит препятствия {displaced} в случайные свободные клетки.
+    Для объектов без индекса свободных клеток список занятых клеток
+    строится один раз на все препятствия.
+    """
+    used_cells: Optional[list[tuple[int, int]]] = None
+    for obstacle in displaced:
+        if obstacle.free_cells is not None:
+            obstacle.randomize_position()
+            continue
+        if used_cells is None:
+            used_cells = get_all_position(snake, obstacles)
+        obstacle.randomize_position(used_cells)
+        used_cells.append(obstacle.position)
+
+
+def reuse_obstacles(snake: Snake, obstacles: list[GameObject],
+                    free_cells: Optional[FreeCells] = None
+                    ) -> list[GameObject]:
+    """Расставляет препятствия прошлой игры по полю {free_cells} вместо
+    создания новых: объекты и строки их таблицы используются заново.
+    Клетки выбираются в том же порядке и тем же генератором, что и при
+    создании объектов, поэтому игра с тем же зерном от этого не зависит.
+    """
+    used_cells = list(snake.positions)
+    for obstacle in obstacles:
+        obstacle.free_cells = free_cells
+        if free_cells is None:
+            obstacle.randomize_position(used_cells)
+            used_cells.append(obstacle.position)
+        else:
+            obstacle.place(free_cells.choice())
+
+    return obstacles
+
+
+def init_game_obgects(free_cells: Optional[FreeCells] = None,
+                      obstacles: Optional[list[GameObject]] = None
+                      ) -> tuple[Snake, list[GameObject]]:
+    """Инициализирует все игровые объекты. Объекты отмечают свои клетки
+    в индексе {free_cells}, если он передан. Препятствия прошлой игры
+    {obstacles}, если они переданы и уже убраны с поля, расставляются
+    заново (см. { reuse_obstacles }), иначе создаются в общей таблице
+    { ObstacleTable }.
+    """
+    snake = Snake(free_cells=free_cells)
+    if obstacles is not None:
+        return snake, reuse_obstacles(snake, obstacles, free_cells)
+
+    table = ObstacleTable()
+    used_cells = list(snake.positions)
+    good_apples, used_cells = get_good_apples(
+        used_cells=used_cells, free_cells=free_cells, table=table
+    )
+    bad_apples, used_cells = get_bad_apples(
+        used_cells=used_cells, free_cells=free_cells, table=table
+    )
+    stones, used_cells = get_stones(
+        used_cells=used_cells, free_cells=free_cells, table=table
+    )
+
+    return snake, [*good_apples, *bad_apples, *stones]
+
+
+def reset_game(stats: GameStats,
+               new_game: bool = False,
+               free_cells: Optional[FreeCells] = None,
+               obstacles: Optional[list[GameObject]] = None
+               ) -> tuple[Snake, list[GameObject]]:
+    """Сбрасывает змейку к исходному состоянию и задаёт ей случайное
+    направление. Всем препятствиям задаются новые координаты. Если
+    {new_game} = {True} информация об игре будет сброшена. Если
+    {new_game} = {False} информация об игре будет обновлена.
+    Индекс {free_cells} должен быть очищен от старых объектов, в том
+    числе от препятствий {obstacles}, которые используются заново.
+    """
+    if new_game:
+        stats.reset_info()
+    else:
+        stats.update_snake_length(1)
+        stats.update_count_of_resets()
+
+    return init_game_obgects(free_cells, obstacles)
+
+
+def fly_stone(stone: Stone, direction: tuple[int, int],
+              object_at: Callable[[tuple[int, int]], Optional[GameObject]],
+              displaced: dict[int, GameObject],
+              chain: bool) -> tuple[tuple[int, int], Optional[Stone]]:
+    """Проводит камень по следу в направлении {direction}. Возвращает
+    клетку, куда он упадёт, и камень, перед которым он остановился
+    (если {chain} = {True}), или {None}. Остальные препятствия на следе
+    добавляются в {displaced}. Каждая клетка следа проверяется одним
+    обращением к индексу {object_at}.
+    """
+    trace = stone.iter_trace(direction)
+    landing = next(trace)
+    for cell in trace:
+        obstacle = object_at(cell)
+        if obstacle is not None and obstacle is not stone:
+            if chain and obstacle.name == EVENT_STONE:
+                return landing, obstacle
+            displaced[id(obstacle)] = obstacle
+        landing = cell
+
+    return landing, None
+
+
+def clear_stone_trace(stone: Stone, snake: Snake,
+                      obstacles: list[GameObject],
+                      stats: GameStats,
+                      limit: int = KNOCK_BACK_LIMIT) -> tuple[int, int]:
+    """Камень отлетает по следу в направлении движения змейки и
+    возвращает клетку, куда он упал. Встретив другой камень, камень
+    останавливается перед ним, а встреченный отлетает дальше (не больше
+    {limit} полётов за удар). Остальные препятствия на следах
+    переносятся в свободные клетки после того, как все камни упали. Если
+    камень падает на змейку, он остаётся на месте, а змейка врезается
+    (см. { Snake.stone_falls_on }). Каждая
+    клетка следа проверяется один раз, поэтому удар стоит
+    O({limit} * вес камня) при любом количестве препятствий.
+    """
+    if snake.free_cells is not None:
+        object_at = snake.free_cells.object_at
+        positions = None
+    else:
+        positions = {obstacle.position: obstacle for obstacle in obstacles}
+        object_at = positions.get
+
+    displaced: dict[int, GameObject] = {}
+    current: Optional[Stone] = stone
+    first_landing = None
+    for flight in range(1, limit + 1):
+        landing, hit = fly_stone(
+            current, snake.direction, object_at, displaced, flight < limit
+        )
+        first_landing = first_landing or landing
+        if snake.stone_falls_on(landing, stats):
+            return first_landing
+        if positions is not None:
+            positions.pop(current.position, None)
+            positions[landing] = current
+        current.move(landing)
+        current = hit
+        if current is None:
+            break
+
+    respawn_all(displaced.values(), snake, obstacles)
+    return first_landing
+
+
+def find_obstacle(new_head: tuple[int, int], snake: Snake,
+                  obstacles: list[GameObject]) -> Optional[GameObject]:
+    """Возвращает препятствие в клетке {new_head} или {None}. Если змейка
+    связана с индексом поля, поиск выполняется одним обращением к словарю.
+    """
+    if snake.free_cells is not None:
+        return snake.free_cells.object_at(new_head)
+
+    for obstacle in obstacles:
+        if snake.try_bite(new_head, obstacle):
+            return obstacle
+
+    return None
+
+
+def eat_apple(apple: GameObject, snake: Snake,
+              obstacles: list[GameObject], stats: GameStats) -> None:
+    """Засчитывает съеденное яблоко и переносит его в свободную клетку.
+    Если свободных клеток не осталось, выставляет флаг сброса игры.
+    """
+    stats.update_eaten_apples()
+    field_size = (
+        FIELD_SIZE if snake.free_cells is None else snake.free_cells.size
+    )
+
+    if snake.length + len(obstacles) <= field_size:
+        respawn(apple, snake, obstacles)
+    else:
+        stats.reset = True
+
+
+def eat_good_apple(apple: GameObject, snake: Snake,
+                   obstacles: list[GameObject], stats: GameStats) -> None:
+    """Змейка вырастает на один сегмент."""
+    snake.grow_up(apple.position)
+    eat_apple(apple, snake, obstacles, stats)
+
+
+def eat_bad_apple(apple: GameObject, snake: Snake,
+                  obstacles: list[GameObject], stats: GameStats) -> None:
+    """Змейка уменьшается на один сегмент, но не меньше одного."""
+    if snake.length > 1:
+        snake.cut_tail()
+    eat_apple(apple, snake, obstacles, stats)
+
+
+def hit_stone(stone: Stone, snake: Snake,
+              obstacles: list[GameObject], stats: GameStats) -> None:
+    """Если змейка легче камня - выставляет флаг сброса игры. Иначе
+    змейка теряет {stone.weight} сегментов, а камень отлетает, см.
+    { clear_stone_trace }.
+    """
+    if snake.length <= stone.weight:
+        stats.reset = True
+    else:
+        for _ in range(stone.weight):
+            snake.cut_tail()
+        clear_stone_trace(stone, snake, obstacles, stats)
+
+
+"""Правила столкновения змейки с препятствием по его виду { name }."""
+COLLISIONS = {
+    EVENT_APPLE: eat_good_apple,
+    EVENT_BAD_APPLE: eat_bad_apple,
+    EVENT_STONE: hit_stone,
+}
+
+
+def resolve_move(new_head: tuple[int, int], snake: Snake,
+                 obstacles: list[GameObject], stats: GameStats) -> str:
+    """Применяет правила игры к клетке {new_head} и возвращает событие
+    хода: {EVENT_MOVE} если путь свободен, иначе вид препятствия.
+    В зависимости от препятсвия змейка вырастет, уменьшится или будет
+    выставлен флаг сброса {stats.reset}.
+    """
+    if snake.can_bite_itself(new_head):
+        stats.reset = True
+        return EVENT_BITE
+
+    obstacle = find_obstacle(new_head, snake, obstacles)
+    collision = COLLISIONS.get(obstacle.name) if obstacle else None
+    if collision is None:
+        return EVENT_MOVE
+
+    collision(obstacle, snake, obstacles, stats)
+    return obstacle.name
+
+
+def snake_can_move(new_head: tuple[int, int], snake: Snake,
+                   obstacles: list[GameObject], stats: GameStats) -> bool:
+    """Проверяет есть ли на пути препятствия. Если нет то возвращает {True}
+    и змейка двигается дальше. Если есть препятствие, возвращется {False}.
+    В зависимости от препятсвия змейка вырастет, уменьшится или сбросится
+    в начальное состояние.
+    """
+    return resolve_move(new_head, snake, obstacles, stats) == EVENT_MOVE
+
+
+class GameState():
+    """Полное состояние одной игры: змейка, препятствия и счётчики.
+
+    Все случайные решения игры принимает собственный генератор {rng},
+    заданный зерном {seed}. Поэтому игра с тем же зерном и теми же
+    поворотами змейки повторяется ход в ход (см. { snake_replay }).
+    Игра, загруженная из снимка ({restored} = {True}), началась не с
+    зерна, и повторить её с начала нельзя (см. { snake_snapshot }).
+    """
+
+    def __init__(self, stats: Optional[GameStats] = None,
+                 width: int = SCREEN_WIDTH,
+                 height: int = SCREEN_HEIGHT,
+                 seed: Optional[int] = None,
+                 empty: bool = False) -> None:
+        """Создаёт новую игру на поле {width} x {height} пикселей
+        (по умолчанию - размером с экран). Счётчики {stats} можно
+        передать снаружи, например объект { GameManager } клиента
+        с отрисовкой. Без зерна {seed} выбирается случайное. На пустом
+        поле ({empty} = {True}) только змейка в центре и нет препятствий:
+        игру расставляют снаружи, например из снимка.
+        """
+        self.stats = stats if stats is not None else GameStats()
+        self.width = width
+        self.height = height
+        self.rng = Random()
+        self.obstacles: list[GameObject] = []
+        if empty:
+            self.prepare(seed)
+            self.snake = Snake(free_cells=self.free_cells)
+        else:
+            self.start(seed)
+
+    def prepare(self, seed: Optional[int] = None) -> None:
+        """Задаёт зерно игры {seed} и создаёт пустой индекс поля."""
+        self.seed = seed if seed is not None else getrandbits(SEED_BITS)
+        self.restored = False
+        self.rng.seed(self.seed)
+        self.free_cells = FreeCells(self.width, self.height, self.rng)
+
+    def start(self, seed: Optional[int] = None) -> None:
+        """Начинает игру с зерном {seed}. Индекс поля создаётся заново,
+        чтобы выбор случайных клеток не зависел от прошлой игры, а
+        препятствия прошлой игры используются заново.
+        """
+        self.prepare(seed)
+        self.snake, self.obstacles = init_game_obgects(
+            self.free_cells, self.obstacles or None
+        )
+
+    def reset(self, new_game: bool = False) -> None:
+        """Сбрасывает игру, см. { reset_game }. Новая игра начинается
+        с новым зерном (см. { start }). При сбросе после врезания индекс
+        свободных клеток не пересоздаётся: из него удаляются только
+        клетки объектов, и препятствия расставляются заново.
+        """
+        if new_game:
+            self.stats.reset_info()
+            self.start()
+            return
+
+        self.snake.remove_from_field()
+        for obstacle in self.obstacles:
+            obstacle.remove_from_field()
+        self.snake, self.obstacles = reset_game(
+            self.stats, False, self.free_cells, self.obstacles or None
+        )
+
+
+def step(state: GameState,
+         action: Optional[tuple[int, int]] = None
+         ) -> tuple[GameState, list[str]]:
+    """Выполняет один игровой ход. {action} - новое направление змейки
+    или {None}, если направление не меняется. Разворот змейки назад
+    игнорируется. Возвращает состояние и список событий хода.
+    """
+    snake = state.snake
+    if action is not None and action != OPPOSITE[snake.direction]:
+        snake.update_direction(action)
+
+    new_head = snake.new_head()
+    event = resolve_move(new_head, snake, state.obstacles, state.stats)
+    if event == EVENT_MOVE:
+        snake.move(new_head)
+    state.stats.update_snake_length(snake.length)
+    events = [event]
+
+    if state.stats.reset:
+        state.reset()
+        state.stats.reset = False
+        events.append(EVENT_RESET)
+
+    return state, events
+
+
+class FixedTimestep():
+    """Часы симуляции с фиксированным шагом.
+
+    Прошедшее реальное время накапливается, и за каждый полный интервал
+    {1 / tick_rate} выполняется один игровой ход, независимо от частоты
+    кадров. Если кадр задержался, часы догоняют отставание, но не больше
+    {max_ticks} ходов за кадр - остаток отбрасывается. Доля следующего
+    хода {alpha()} позволяет клиенту интерполировать отрисовку.
+    """
+
+    def __init__(self, tick_rate: float = TICK_RATE,
+                 max_ticks: int = MAX_CATCH_UP_TICKS,
+                 clock: Callable[[], float] = perf_counter) -> None:
+        """Инициализирует часы с частотой {tick_rate} ходов в секунду."""
+        self.tick_rate = tick_rate
+        self.tick_time = 1 / tick_rate
+        self.max_ticks = max_ticks
+        self.tick_count: int = 0
+        self.__clock = clock
+        self.__last_time: Optional[float] = None
+        self.__accumulator: float = 0
+
+    def get_sim_time(self) -> float:
+        """Время симуляции в секундах: количество ходов на их длину."""
+        return self.tick_count * self.tick_time
+
+    def reset(self) -> None:
+        """Останавливает отсчёт, например пока открыто меню. Время до
+        следующего вызова { advance } не учитывается.
+        """
+        self.__last_time = None
+        self.__accumulator = 0
+
+    def advance(self, now: Optional[float] = None) -> int:
+        """Учитывает время, прошедшее с прошлого вызова, и возвращает
+        количество игровых ходов, которые нужно выполнить сейчас.
+        """
+        now = self.__clock() if now is None else now
+        if self.__last_time is not None:
+            self.__accumulator += now - self.__last_time
+        self.__last_time = now
+
+        ticks = int(self.__accumulator // self.tick_time)
+        if ticks > self.max_ticks:
+            ticks = self.max_ticks
+            self.__accumulator %= self.tick_time
+        else:
+            self.__accumulator -= ticks * self.tick_time
+        self.tick_count += ticks
+
+        return ticks
+
+    def alpha(self) -> float:
+        """Возвращает долю (от 0 до 1) времени до следующего хода."""
+        return self.__accumulator / self.tick_time
@@ -0,0 +1,218 @@
+"""Среда обучения с подкреплением для игры змейка.
+
+Интерфейс повторяет { gym }: { SnakeEnv.reset(seed) } и
+{ SnakeEnv.step(action) }, который возвращает наблюдение, награду,
+признаки завершения и обрезки эпизода и словарь с подробностями.
+Правила игры - ядро { snake_engine }.
+
+Наблюдение - заранее выделенная сетка { numpy } формы (высота, ширина)
+с кодами клеток { snake_batch } и отдельным кодом головы змейки. Сетка
+не создаётся заново: после хода в ней обновляются только клетки,
+которые индекс поля отметил изменившимися. Поэтому { step } всегда
+возвращает один и тот же массив - если наблюдение нужно сохранить,
+его копирует вызывающий код.
+
+{ SnakeVecEnv } ведёт несколько сред, наблюдения которых - срезы
+общего массива формы (N, высота, ширина).
+"""
+from typing import Any, Optional
+
+import numpy as np
+
+from snake_batch import (
+    CELL_APPLE, CELL_BAD_APPLE, CELL_EMPTY, CELL_SNAKE, CELL_STONE,
+    DIRECTIONS
+)
+from snake_engine import (
+    EVENT_APPLE, EVENT_BAD_APPLE, EVENT_BITE, EVENT_MOVE, EVENT_RESET,
+    EVENT_STONE, GRID_HEIGHT, GRID_SIZE, GRID_WIDTH, GameState, step
+)
+
+"""Код клетки с головой змейки в наблюдении."""
+CELL_HEAD = 5
+"""Код клетки наблюдения по виду препятствия."""
+OBSTACLE_CELLS = {
+    EVENT_APPLE: CELL_APPLE,
+    EVENT_BAD_APPLE: CELL_BAD_APPLE,
+    EVENT_STONE: CELL_STONE,
+}
+"""Награды за события хода. Эпизод завершается сбросом игры."""
+REWARDS = {
+    EVENT_MOVE: 0.0,
+    EVENT_APPLE: 1.0,
+    EVENT_BAD_APPLE: -1.0,
+    EVENT_STONE: -0.5,
+    EVENT_BITE: 0.0,
+    EVENT_RESET: -1.0,
+}
+"""Количество действий: номера направлений { snake_batch.DIRECTIONS }."""
+ACTION_COUNT = len(DIRECTIONS)
+
+
+class SnakeEnv():
+    """Одна игра змейка в виде среды обучения."""
+
+    def __init__(self, width: int = GRID_WIDTH, height: int = GRID_HEIGHT,
+                 seed: Optional[int] = None,
+                 max_steps: Optional[int] = None,
+                 observation: Optional[np.ndarray] = None) -> None:
+        """Создаёт среду на поле {width} x {height} клеток. Эпизод
+        обрезается после {max_steps} ходов. Наблюдение пишется в массив
+        {observation}, если он передан, например в срез общего массива
+        { SnakeVecEnv }.
+        """
+        self.width = width
+        self.height = height
+        self.max_steps = max_steps
+        self.observation_shape = (height, width)
+        self.action_count = ACTION_COUNT
+        self.observation = (
+            observation if observation is not None
+            else np.zeros(self.observation_shape, dtype=np.int8)
+        )
+        self.state = GameState(
+            width=width * GRID_SIZE, height=height * GRID_SIZE, seed=seed
+        )
+        self.steps: int = 0
+        self.__head: tuple[int, int] = (0, 0)
+        self.__draw_board()
+
+    def cell_code(self, cell: tuple[int, int]) -> int:
+        """Возвращает код клетки поля для наблюдения."""
+        obstacle = self.state.free_cells.object_at(cell)
+        if obstacle is not None:
+            return OBSTACLE_CELLS.get(obstacle.name, CELL_EMPTY)
+        if self.state.snake.occupies(cell):
+            return CELL_SNAKE
+        return CELL_EMPTY
+
+    def __set_cell(self, cell: tuple[int, int], code: int) -> None:
+        """Записывает код клетки поля в наблюдение."""
+        self.observation[cell[1] // GRID_SIZE, cell[0] // GRID_SIZE] = code
+
+    def __set_head(self) -> None:
+        """Переносит код головы в текущую клетку головы змейки."""
+        self.__set_cell(self.__head, self.cell_code(self.__head))
+        self.__head = self.state.snake.get_head_position()
+        self.__set_cell(self.__head, CELL_HEAD)
+
+    def __draw_board(self) -> None:
+        """Заполняет наблюдение целиком, например после новой игры.
+        Включает в индексе поля учёт изменившихся клеток.
+        """
+        state = self.state
+        state.free_cells.track_changes = True
+        state.free_cells.pop_changed()
+        self.observation.fill(CELL_EMPTY)
+        for position in state.snake.positions:
+            self.__set_cell(position, CELL_SNAKE)
+        for obstacle in state.obstacles:
+            self.__set_cell(
+                obstacle.position,
+                OBSTACLE_CELLS.get(obstacle.name, CELL_EMPTY)
+            )
+        self.__head = state.snake.get_head_position()
+        self.__set_head()
+
+    def reset(self, seed: Optional[int] = None
+              ) -> tuple[np.ndarray, dict[str, Any]]:
+        """Начинает новую игру с зерном {seed} и возвращает наблюдение и
+        словарь с подробностями.
+        """
+        self.state.stats.reset_info()
+        self.state.start(seed)
+        self.steps = 0
+        self.__draw_board()
+        return self.observation, self.info()
+
+    def step(self, action: Optional[int] = None
+             ) -> tuple[np.ndarray, float, bool, bool, dict[str, Any]]:
+        """Выполняет ход в направлении {action} (номер из { DIRECTIONS },
+        {None} - без поворота). Возвращает наблюдение, награду, признак
+        завершения эпизода (игра сброшена), признак обрезки по
+        {max_steps} и словарь с подробностями.
+        """
+        _, events = step(
+            self.state, None if action is None else DIRECTIONS[action]
+        )
+        self.steps += 1
+        for cell in self.state.free_cells.pop_changed():
+            self.__set_cell(cell, self.cell_code(cell))
+        self.__set_head()
+
+        reward = sum(REWARDS[event] for event in events)
+        terminated = EVENT_RESET in events
+        truncated = self.max_steps is not None and (
+            self.steps >= self.max_steps
+        )
+        return self.observation, reward, terminated, truncated, self.info(
+            events
+        )
+
+    def info(self, events: Optional[list[str]] = None) -> dict[str, Any]:
+        """Возвращает подробности о текущей игре."""
+        stats = self.state.stats
+        return {
+            'events': events or [],
+            'length': self.state.snake.length,
+            'eaten_apples': stats.eaten_apples,
+            'resets': stats.reset_count,
+        }
+
+
+class SnakeVecEnv():
+    """Несколько сред { SnakeEnv }, которые ходят вместе.
+
+    Наблюдения всех сред - срезы одного массива {observations}, награды
+    и признаки завершения тоже пишутся в заранее выделенные массивы.
+    Среда, эпизод которой обрезан, сразу начинается заново; завершённые
+    среды ядро сбрасывает само.
+    """
+
+    def __init__(self, count: int, width: int = GRID_WIDTH,
+                 height: int = GRID_HEIGHT, seed: Optional[int] = None,
+                 max_steps: Optional[int] = None) -> None:
+        """Создаёт {count} сред. Среда с номером {index} получает зерно
+        {seed + index}.
+        """
+        self.count = count
+        self.observations = np.zeros((count, height, width), dtype=np.int8)
+        self.rewards = np.zeros(count, dtype=np.float32)
+        self.terminated = np.zeros(count, dtype=bool)
+        self.truncated = np.zeros(count, dtype=bool)
+        self.envs = [
+            SnakeEnv(width, height, None if seed is None else seed + index,
+                     max_steps, self.observations[index])
+            for index in range(count)
+        ]
+
+    def reset(self, seed: Optional[int] = None
+              ) -> tuple[np.ndarray, list[dict[str, Any]]]:
+        """Начинает новые игры во всех средах."""
+        infos = [
+            env.reset(None if seed is None else seed + index)[1]
+            for index, env in enumerate(self.envs)
+        ]
+        return self.observations, infos
+
+    def step(self, actions: Optional[Any] = None
+             ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray,
+                        list[dict[str, Any]]]:
+        """Выполняет ход во всех средах. {actions} - номера направлений,
+        -1 или {None} - без поворота.
+        """
+        infos = []
+        for index, env in enumerate(self.envs):
+            action = None if actions is None else int(actions[index])
+            _, reward, terminated, truncated, info = env.step(
+                action if action is not None and action >= 0 else None
+            )
+            if truncated:
+                env.reset()
+            self.rewards[index] = reward
+            self.terminated[index] = terminated
+            self.truncated[index] = truncated
+            infos.append(info)
+
+        return (self.observations, self.rewards, self.terminated,
+                self.truncated, infos)
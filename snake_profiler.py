@@ -0,0 +1,126 @@
+"""Профилировщик кадров игры змейка.
+
+Кадр делится на фазы (опрос событий, ввод, симуляция, отрисовка, вывод
+на экран). Длительность каждой фазы измеряется одним вызовом таймера на
+границе фаз и хранится в скользящем окне последних {PROFILE_WINDOW}
+кадров, по которому считаются перцентили. Отдельно собираются интервалы
+между игровыми ходами. Каждый кадр можно записывать строкой JSONL.
+Модуль не зависит от { pygame }.
+"""
+import json
+from collections import deque
+from time import perf_counter
+from typing import Callable, Optional
+
+"""Размер скользящего окна и перцентили по умолчанию."""
+PROFILE_WINDOW = 300
+PERCENTILES = (50, 95, 99)
+"""Служебные серии: длительность всего кадра и интервал между ходами."""
+FRAME_PHASE = 'total'
+TICK_PHASE = 'tick'
+
+
+class FrameProfiler():
+    """Собирает длительности фаз кадра и интервалы между ходами."""
+
+    def __init__(self, window: int = PROFILE_WINDOW,
+                 dump_path: Optional[str] = None,
+                 clock: Callable[[], float] = perf_counter) -> None:
+        """Инициализирует профилировщик. Если задан {dump_path}, каждый
+        кадр дописывается в этот файл строкой JSONL.
+        """
+        self.window = window
+        self.frame_count: int = 0
+        self.__clock = clock
+        self.__samples: dict[str, deque[float]] = {}
+        self.__frame: dict[str, float] = {}
+        self.__frame_start: float = 0
+        self.__last_mark: float = 0
+        self.__last_tick: Optional[float] = None
+        self.__dump = (
+            open(dump_path, 'a', encoding='utf-8') if dump_path else None
+        )
+
+    def __add_sample(self, phase: str, duration: float) -> None:
+        """Добавляет замер в скользящее окно фазы."""
+        samples = self.__samples.get(phase)
+        if samples is None:
+            samples = self.__samples[phase] = deque(maxlen=self.window)
+        samples.append(duration)
+
+    def start_frame(self) -> None:
+        """Начинает замер нового кадра."""
+        self.__frame = {}
+        self.__frame_start = self.__last_mark = self.__clock()
+
+    def mark(self, phase: str) -> None:
+        """Завершает фазу {phase}: ей засчитывается время с прошлой
+        отметки. Повторные отметки одной фазы за кадр суммируются.
+        """
+        now = self.__clock()
+        self.__frame[phase] = (
+            self.__frame.get(phase, 0) + now - self.__last_mark
+        )
+        self.__last_mark = now
+
+    def end_frame(self) -> None:
+        """Завершает кадр: сохраняет замеры фаз и пишет строку JSONL."""
+        self.__frame[FRAME_PHASE] = self.__last_mark - self.__frame_start
+        for phase, duration in self.__frame.items():
+            self.__add_sample(phase, duration)
+
+        if self.__dump is not None:
+            record = {'frame': self.frame_count}
+            record.update(
+                (phase, round(duration * 1000, 4))
+                for phase, duration in self.__frame.items()
+            )
+            self.__dump.write(json.dumps(record) + '\n')
+
+        self.frame_count += 1
+
+    def record_tick(self, now: Optional[float] = None,
+                    ticks: int = 1) -> None:
+        """Отмечает {ticks} игровых ходов одного кадра. Интервал с прошлой
+        отметки делится между ними поровну: ходы, которые кадр выполнил
+        подряд, догоняя часы, не дают почти нулевых интервалов.
+        """
+        now = self.__clock() if now is None else now
+        if self.__last_tick is not None:
+            interval = (now - self.__last_tick) / ticks
+            for _ in range(ticks):
+                self.__add_sample(TICK_PHASE, interval)
+        self.__last_tick = now
+
+    def pause_ticks(self) -> None:
+        """Прерывает серию ходов, например пока открыто меню."""
+        self.__last_tick = None
+
+    def percentile(self, phase: str, percent: float) -> Optional[float]:
+        """Возвращает перцентиль {percent} длительности фазы в секундах
+        по скользящему окну или {None}, если замеров нет.
+        """
+        samples = self.__samples.get(phase)
+        if not samples:
+            return None
+
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+        return ordered[index]
+
+    def report(self, percents: tuple[float, ...] = PERCENTILES
+               ) -> dict[str, dict[float, float]]:
+        """Возвращает перцентили всех фаз в миллисекундах."""
+        return {
+            phase: {
+                percent: self.percentile(phase, percent) * 1000
+                for percent in percents
+            }
+            for phase in self.__samples
+        }
+
+    def close(self) -> None:
+        """Закрывает файл JSONL."""
+        if self.__dump is not None:
+            self.__dump.close()
+            self.__dump = None
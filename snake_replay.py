@@ -0,0 +1,196 @@
+"""Запись и воспроизведение игр змейка.
+
+Игра на ядре { snake_engine } полностью определяется зерном генератора
+{ GameState.seed } и поворотами змейки. Поэтому повтор хранит только
+заголовок (зерно, размер поля, число ходов) и поток поворотов по два
+бита на ход:
+    0 - направление не изменилось;
+    1 - поворот налево;
+    2 - поворот направо;
+    3 - разворот назад.
+Поток упаковывается по четыре хода в байт и сжимается { zlib }: длинные
+участки без поворотов почти не занимают места.
+
+Воспроизведение не рисует и не ждёт часов - ходы выполняются подряд с
+максимальной скоростью.
+
+Пример запуска:
+    python snake_replay.py game.snkr
+"""
+import argparse
+import struct
+import zlib
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+from snake_engine import OPPOSITE, GameState, step
+
+"""Заголовок файла повтора: сигнатура, версия формата, зерно, ширина и
+высота поля в пикселях, количество ходов.
+"""
+REPLAY_MAGIC = b'SNKR'
+REPLAY_VERSION = 1
+REPLAY_HEADER = struct.Struct('<4sBQIII')
+REPLAY_SUFFIX = '.snkr'
+"""Коды поворотов и количество ходов в одном байте потока."""
+TURN_KEEP = 0
+TURN_LEFT = 1
+TURN_RIGHT = 2
+TURN_BACK = 3
+TURN_BITS = 2
+TURNS_PER_BYTE = 8 // TURN_BITS
+"""Коды поворотов каждого из четырёх ходов для всех значений байта."""
+BYTE_TURNS = tuple(
+    tuple((byte >> (TURN_BITS * index)) & TURN_BACK
+          for index in range(TURNS_PER_BYTE))
+    for byte in range(256)
+)
+
+
+def turn_code(before: tuple[int, int], after: tuple[int, int]) -> int:
+    """Возвращает код поворота от направления {before} к {after}."""
+    if after == before:
+        return TURN_KEEP
+    if after == turn(before, TURN_LEFT):
+        return TURN_LEFT
+    if after == turn(before, TURN_RIGHT):
+        return TURN_RIGHT
+    return TURN_BACK
+
+
+def turn(direction: tuple[int, int], code: int) -> tuple[int, int]:
+    """Возвращает направление после поворота {code}. Ось y экрана
+    направлена вниз, поэтому налево от {RIGHT} - это {UP}.
+    """
+    delta_x, delta_y = direction
+    if code == TURN_LEFT:
+        return delta_y, -delta_x
+    if code == TURN_RIGHT:
+        return -delta_y, delta_x
+    if code == TURN_BACK:
+        return -delta_x, -delta_y
+    return direction
+
+
+class ReplayRecorder():
+    """Записывает повороты змейки одной игры.
+
+    Ходы нужно выполнять через { ReplayRecorder.step } вместо { step }
+    ядра. Поворот считается от направления змейки после прошлого хода,
+    поэтому записываются и повороты, которые клиент задал напрямую через
+    { Snake.update_direction }.
+    """
+
+    def __init__(self, state: GameState) -> None:
+        """Начинает запись игры {state}, см. { ReplayRecorder.start }."""
+        self.start(state)
+
+    def start(self, state: GameState) -> None:
+        """Начинает запись заново для игры {state}, которая ещё не сделала
+        ни одного хода (только что созданной или начатой заново
+        { GameState.start }). Игру, загруженную из снимка, нельзя
+        повторить с зерна: для неё {replayable} = {False}.
+        """
+        self.seed = state.seed
+        self.replayable = not state.restored
+        self.width = state.width
+        self.height = state.height
+        self.tick_count: int = 0
+        self.__turns = bytearray()
+        self.__direction = state.snake.direction
+
+    def record(self, code: int) -> None:
+        """Дописывает в поток код поворота очередного хода."""
+        shift = self.tick_count % TURNS_PER_BYTE
+        if not shift:
+            self.__turns.append(0)
+        self.__turns[-1] |= code << (TURN_BITS * shift)
+        self.tick_count += 1
+
+    def step(self, state: GameState,
+             action: Optional[tuple[int, int]] = None
+             ) -> tuple[GameState, list[str]]:
+        """Выполняет ход { step } и записывает поворот змейки."""
+        snake = state.snake
+        if action is not None and action != OPPOSITE[snake.direction]:
+            snake.update_direction(action)
+        self.record(turn_code(self.__direction, snake.direction))
+
+        state, events = step(state)
+        self.__direction = state.snake.direction
+        return state, events
+
+    def to_bytes(self) -> bytes:
+        """Возвращает повтор в двоичном формате."""
+        return REPLAY_HEADER.pack(
+            REPLAY_MAGIC, REPLAY_VERSION, self.seed, self.width,
+            self.height, self.tick_count
+        ) + zlib.compress(bytes(self.__turns))
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Сохраняет повтор в файл."""
+        Path(path).write_bytes(self.to_bytes())
+
+
+def read_header(data: bytes) -> tuple[int, int, int, int]:
+    """Проверяет заголовок повтора и возвращает зерно, ширину и высоту
+    поля и количество ходов.
+    """
+    magic, version, seed, width, height, ticks = REPLAY_HEADER.unpack_from(
+        data
+    )
+    if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+        raise ValueError('Неизвестный формат повтора.')
+    return seed, width, height, ticks
+
+
+def replay_state(data: bytes) -> GameState:
+    """Создаёт игру с зерном и полем из заголовка повтора."""
+    seed, width, height, _ = read_header(data)
+    return GameState(width=width, height=height, seed=seed)
+
+
+def iter_replay(state: GameState, data: bytes) -> Iterator[list[str]]:
+    """Воспроизводит повтор на игре {state}, созданной { replay_state },
+    и после каждого хода возвращает события хода.
+    """
+    ticks = read_header(data)[-1]
+    turns = zlib.decompress(data[REPLAY_HEADER.size:])
+    snake_turns = (code for byte in turns for code in BYTE_TURNS[byte])
+    for _, code in zip(range(ticks), snake_turns):
+        snake = state.snake
+        snake.update_direction(turn(snake.direction, code))
+        yield step(state)[1]
+
+
+def replay(data: bytes) -> GameState:
+    """Воспроизводит повтор до конца и возвращает итоговое состояние."""
+    state = replay_state(data)
+    for _ in iter_replay(state, data):
+        pass
+    return state
+
+
+def load_replay(path: Union[str, Path]) -> GameState:
+    """Воспроизводит повтор из файла."""
+    return replay(Path(path).read_bytes())
+
+
+def main() -> None:
+    """Точка входа командной строки."""
+    parser = argparse.ArgumentParser(description='Повтор игры змейка.')
+    parser.add_argument('path')
+    args = parser.parse_args()
+
+    data = Path(args.path).read_bytes()
+    seed, _, _, ticks = read_header(data)
+    state = replay(data)
+    print(f'seed: {seed}')
+    print(f'ticks: {ticks}')
+    print(f'length: {state.snake.length}')
+    print(f'eaten_apples: {state.stats.eaten_apples}')
+    print(f'resets: {state.stats.reset_count}')
+
+
+if __name__ == '__main__':
+    main()
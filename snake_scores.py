@@ -0,0 +1,210 @@
+"""Таблица рейтингов игры змейка.
+
+Результаты сыгранных игр хранятся в базе SQLite. Рейтинг упорядочен по
+длине змейки и съеденным яблокам, и по этим столбцам построен индекс,
+поэтому первые N результатов читаются из индекса без сортировки всей
+таблицы.
+
+Запись не задерживает кадр: { ScoreWriter } складывает результаты в
+очередь, а фоновый поток записывает накопившиеся результаты одной
+транзакцией.
+
+Просмотр постраничный: { ScorePages } читает только строки текущей
+страницы. Следующая страница начинается после ключа последней строки
+прошлой страницы (а не через OFFSET), поэтому стоимость страницы не
+зависит ни от её номера, ни от размера таблицы.
+"""
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from queue import Empty, Queue
+from typing import NamedTuple, Optional, Union
+
+"""Схема базы: таблица результатов и индекс рейтинга."""
+SCORES_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS scores ('
+    'id INTEGER PRIMARY KEY, '
+    'length INTEGER NOT NULL, '
+    'eaten_apples INTEGER NOT NULL, '
+    'resets INTEGER NOT NULL, '
+    'duration REAL NOT NULL, '
+    'finished_at REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS scores_rank '
+    'ON scores (length, eaten_apples)',
+)
+"""Запросы записи и чтения страниц рейтинга. Ключ строки - (длина,
+яблоки, id), по нему строки упорядочены в индексе.
+"""
+INSERT_SCORE = (
+    'INSERT INTO scores '
+    '(length, eaten_apples, resets, duration, finished_at) '
+    'VALUES (?, ?, ?, ?, ?)'
+)
+SELECT_SCORES = (
+    'SELECT id, length, eaten_apples, resets, duration, finished_at '
+    'FROM scores'
+)
+SCORES_AFTER = ' WHERE (length, eaten_apples, id) < (?, ?, ?)'
+SCORES_ORDER = ' ORDER BY length DESC, eaten_apples DESC, id DESC LIMIT ?'
+"""Сколько результатов записывается одной транзакцией и сколько строк
+показывается на странице.
+"""
+SCORE_BATCH_SIZE = 256
+SCORES_PAGE_SIZE = 10
+
+
+class Score(NamedTuple):
+    """Результат одной игры."""
+
+    length: int
+    eaten_apples: int
+    resets: int
+    duration: float
+    finished_at: float
+
+
+def open_scores(path: Union[str, Path]) -> sqlite3.Connection:
+    """Открывает базу рейтингов {path} и создаёт схему, если её нет.
+    Журнал WAL позволяет читать рейтинг, пока фоновый поток пишет.
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(path)
+    connection.execute('PRAGMA journal_mode=WAL')
+    with connection:
+        for statement in SCORES_SCHEMA:
+            connection.execute(statement)
+    return connection
+
+
+class ScoreWriter():
+    """Фоновая запись результатов в базу рейтингов.
+
+    Соединение с базой принадлежит потоку записи. Поток ждёт первый
+    результат, забирает из очереди всё, что накопилось (не больше
+    {batch_size}), и записывает пачку одной транзакцией.
+    """
+
+    def __init__(self, path: Union[str, Path],
+                 batch_size: int = SCORE_BATCH_SIZE) -> None:
+        """Запускает поток записи в базу {path}."""
+        self.path = path
+        self.batch_size = batch_size
+        self.__queue: Queue[Optional[Score]] = Queue()
+        self.__thread = threading.Thread(
+            target=self.__run, name='score-writer', daemon=True
+        )
+        self.__thread.start()
+
+    def submit(self, length: int, eaten_apples: int, resets: int,
+               duration: float) -> None:
+        """Ставит результат игры в очередь записи и сразу возвращается."""
+        self.__queue.put(
+            Score(length, eaten_apples, resets, duration, time.time())
+        )
+
+    def flush(self) -> None:
+        """Ждёт, пока все поставленные результаты будут записаны."""
+        self.__queue.join()
+
+    def close(self) -> None:
+        """Записывает оставшиеся результаты и останавливает поток."""
+        self.__queue.put(None)
+        self.__thread.join()
+
+    def __collect(self) -> tuple[list[Score], bool]:
+        """Ждёт результат и забирает накопившиеся. Возвращает пачку и
+        признак остановки потока.
+        """
+        batch: list[Score] = []
+        score = self.__queue.get()
+        while score is not None:
+            batch.append(score)
+            if len(batch) >= self.batch_size:
+                return batch, False
+            try:
+                score = self.__queue.get_nowait()
+            except Empty:
+                return batch, False
+
+        return batch, True
+
+    def __run(self) -> None:
+        """Цикл потока записи."""
+        connection = open_scores(self.path)
+        try:
+            stop = False
+            while not stop:
+                batch, stop = self.__collect()
+                if batch:
+                    with connection:
+                        connection.executemany(INSERT_SCORE, batch)
+                for _ in range(len(batch) + stop):
+                    self.__queue.task_done()
+        finally:
+            connection.close()
+
+
+class ScorePages():
+    """Постраничный просмотр рейтинга.
+
+    Хранятся только строки текущей страницы {rows} и ключи начала уже
+    пройденных страниц, чтобы вернуться назад.
+    """
+
+    def __init__(self, connection: sqlite3.Connection,
+                 size: int = SCORES_PAGE_SIZE) -> None:
+        """Создаёт просмотр по страницам из {size} строк."""
+        self.connection = connection
+        self.size = size
+        self.number: int = 0
+        self.rows: list[Score] = []
+        self.has_next: bool = False
+        self.__starts: list[Optional[tuple[int, int, int]]] = [None]
+        self.__last: Optional[tuple[int, int, int]] = None
+
+    def __load(self) -> None:
+        """Читает строки текущей страницы и одну строку следующей, чтобы
+        узнать, есть ли она.
+        """
+        after = self.__starts[self.number]
+        if after is None:
+            query, parameters = SELECT_SCORES + SCORES_ORDER, ()
+        else:
+            query = SELECT_SCORES + SCORES_AFTER + SCORES_ORDER
+            parameters = after
+        rows = self.connection.execute(
+            query, (*parameters, self.size + 1)
+        ).fetchall()
+        self.has_next = len(rows) > self.size
+        rows = rows[:self.size]
+        self.rows = [Score(*row[1:]) for row in rows]
+        self.__last = (rows[-1][1], rows[-1][2], rows[-1][0]) if rows else None
+
+    def first(self) -> None:
+        """Переходит к первой странице и читает её заново."""
+        self.number = 0
+        self.__starts = [None]
+        self.__load()
+
+    def next(self) -> bool:
+        """Переходит к следующей странице, если она есть."""
+        if not self.has_next:
+            return False
+        del self.__starts[self.number + 1:]
+        self.__starts.append(self.__last)
+        self.number += 1
+        self.__load()
+        return True
+
+    def previous(self) -> bool:
+        """Возвращается к предыдущей странице, если она есть."""
+        if not self.number:
+            return False
+        self.number -= 1
+        self.__load()
+        return True
+
+    def rank(self, index: int) -> int:
+        """Возвращает место в рейтинге строки {index} текущей страницы."""
+        return self.number * self.size + index + 1
@@ -0,0 +1,252 @@
+"""Сервер игры змейка для нескольких игроков.
+
+Сервер на { asyncio } ведёт одно общее поле { snake_arena.Arena } и сам
+выполняет ходы: у каждого подключённого игрока своя змейка. Змейка,
+которая врезалась в чужую змейку, в себя или в тяжёлый камень,
+появляется заново в случайной свободной клетке, поле при этом не
+сбрасывается.
+
+Клиенты подключаются по TCP. Протокол двоичный:
+    - сервер сразу отправляет приветствие {WELCOME_HEADER} с номером
+    игрока и размером поля и затем полный кадр;
+    - каждый ход сервер отправляет кадр {MESSAGE_DELTA} только с теми
+    клетками, которые изменились за ход (новые головы, освободившиеся
+    хвосты, перенесённые яблоки и камни). Изменившиеся клетки отмечает
+    индекс поля { FreeCells }, поэтому кадр собирается за O(изменений) и
+    один раз на всех клиентов;
+    - клиент отправляет байты с номерами направлений
+    { snake_batch.DIRECTIONS }, на ход применяется последний.
+Кадр - заголовок {FRAME_HEADER} (вид кадра, номер хода, число клеток) и
+записи клеток {CELL_RECORD}: координаты клетки, код клетки
+{ snake_batch } и номер игрока для клеток змеек.
+
+Медленный клиент не задерживает ход: если буфер отправки соединения
+больше {SEND_BUFFER_LIMIT}, кадры ему не пишутся, а когда буфер
+освободится, клиент получает полный кадр вместо пропущенных.
+
+Пример запуска:
+    python snake_server.py --port 8765 --seed 1
+"""
+import argparse
+import asyncio
+import struct
+from typing import Iterable, Optional
+
+from snake_arena import NO_PLAYER, Arena
+from snake_batch import CELL_EMPTY, CELL_SNAKE
+from snake_engine import (
+    GRID_SIZE, SCREEN_HEIGHT, SCREEN_WIDTH, TICK_RATE, FixedTimestep
+)
+from snake_env import OBSTACLE_CELLS
+
+"""Адрес сервера по умолчанию."""
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT = 8765
+"""Приветствие: сигнатура, версия протокола, номер игрока, ширина и
+высота поля в клетках.
+"""
+PROTOCOL_MAGIC = b'SNKM'
+PROTOCOL_VERSION = 1
+WELCOME_HEADER = struct.Struct('<4sBIII')
+"""Заголовок кадра: вид кадра, номер хода, количество записей клеток.
+Запись клетки: x и y в клетках, код клетки и номер игрока.
+"""
+MESSAGE_FULL = 0
+MESSAGE_DELTA = 1
+FRAME_HEADER = struct.Struct('<BII')
+CELL_RECORD = struct.Struct('<IIBI')
+"""Сколько байт может ждать отправки, прежде чем клиент считается
+отстающим, и сколько байт ввода читается за раз.
+"""
+SEND_BUFFER_LIMIT = 64 * 1024
+INPUT_CHUNK = 64
+
+
+def cell_record(arena: Arena, cell: tuple[int, int]) -> bytes:
+    """Возвращает запись клетки поля для кадра."""
+    player = arena.owners.get(cell)
+    if player is not None:
+        code = CELL_SNAKE
+    else:
+        player = NO_PLAYER
+        obstacle = arena.free_cells.object_at(cell)
+        code = CELL_EMPTY if obstacle is None else OBSTACLE_CELLS.get(
+            obstacle.name, CELL_EMPTY
+        )
+    return CELL_RECORD.pack(
+        cell[0] // GRID_SIZE, cell[1] // GRID_SIZE, code, player
+    )
+
+
+def encode_frame(arena: Arena, kind: int, tick: int,
+                 cells: Iterable[tuple[int, int]]) -> bytes:
+    """Возвращает кадр вида {kind} с записями клеток {cells}."""
+    records = [cell_record(arena, cell) for cell in cells]
+    return FRAME_HEADER.pack(kind, tick, len(records)) + b''.join(records)
+
+
+def full_frame(arena: Arena, tick: int) -> bytes:
+    """Возвращает кадр со всеми непустыми клетками поля."""
+    cells = {obstacle.position for obstacle in arena.obstacles}
+    cells.update(arena.owners)
+    return encode_frame(arena, MESSAGE_FULL, tick, cells)
+
+
+def delta_frame(arena: Arena, tick: int) -> bytes:
+    """Возвращает кадр с клетками, изменившимися с прошлого кадра."""
+    return encode_frame(
+        arena, MESSAGE_DELTA, tick, arena.free_cells.pop_changed()
+    )
+
+
+class Connection():
+    """Соединение с клиентом и учёт его отставания."""
+
+    def __init__(self, player: int, writer: asyncio.StreamWriter) -> None:
+        """Запоминает игрока {player} и поток записи клиента."""
+        self.player = player
+        self.writer = writer
+        self.lagging: bool = False
+
+    def send(self, delta: bytes, full: 'FullFrame') -> None:
+        """Отправляет кадр хода. Отстающему клиенту кадры не пишутся, а
+        после того как его буфер освободится, он получает полный кадр.
+        """
+        if self.writer.transport.get_write_buffer_size() > SEND_BUFFER_LIMIT:
+            self.lagging = True
+        elif self.lagging:
+            self.lagging = False
+            self.writer.write(full.get())
+        else:
+            self.writer.write(delta)
+
+
+class FullFrame():
+    """Полный кадр хода, который собирается, только если он кому-то
+    нужен, и не больше одного раза за ход.
+    """
+
+    def __init__(self, arena: Arena, tick: int) -> None:
+        """Запоминает поле и номер хода."""
+        self.arena = arena
+        self.tick = tick
+        self.__frame: Optional[bytes] = None
+
+    def get(self) -> bytes:
+        """Возвращает полный кадр."""
+        if self.__frame is None:
+            self.__frame = full_frame(self.arena, self.tick)
+        return self.__frame
+
+
+class GameServer():
+    """Сервер общего поля: принимает клиентов и рассылает кадры ходов."""
+
+    def __init__(self, width: int = SCREEN_WIDTH,
+                 height: int = SCREEN_HEIGHT,
+                 seed: Optional[int] = None,
+                 tick_rate: float = TICK_RATE) -> None:
+        """Создаёт поле {width} x {height} пикселей и часы ходов."""
+        self.arena = Arena(width, height, seed)
+        self.scheduler = FixedTimestep(tick_rate)
+        self.connections: dict[int, Connection] = {}
+        self.tick_count: int = 0
+
+    async def start(self, host: str = SERVER_HOST,
+                    port: int = SERVER_PORT) -> asyncio.AbstractServer:
+        """Начинает принимать клиентов. Порт 0 - любой свободный."""
+        return await asyncio.start_server(self.handle_client, host, port)
+
+    async def handle_client(self, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter) -> None:
+        """Ведёт одного клиента: добавляет его змейку, отправляет
+        приветствие и полный кадр и читает повороты до отключения.
+        """
+        arena = self.arena
+        player = arena.add_player()
+        free_cells = arena.free_cells
+        writer.write(WELCOME_HEADER.pack(
+            PROTOCOL_MAGIC, PROTOCOL_VERSION, player,
+            free_cells.width // GRID_SIZE, free_cells.height // GRID_SIZE
+        ))
+        writer.write(full_frame(arena, self.tick_count))
+        self.connections[player] = Connection(player, writer)
+        try:
+            while data := await reader.read(INPUT_CHUNK):
+                arena.turn(player, data[-1])
+        except ConnectionError:
+            pass
+        finally:
+            del self.connections[player]
+            arena.remove_player(player)
+            writer.close()
+
+    def tick(self) -> dict[int, str]:
+        """Выполняет ход и рассылает кадр изменений всем клиентам."""
+        events = self.arena.tick()
+        self.tick_count += 1
+        delta = delta_frame(self.arena, self.tick_count)
+        full = FullFrame(self.arena, self.tick_count)
+        for connection in self.connections.values():
+            connection.send(delta, full)
+        return events
+
+    async def run(self) -> None:
+        """Выполняет ходы с частотой часов { FixedTimestep }."""
+        scheduler = self.scheduler
+        while True:
+            for _ in range(scheduler.advance()):
+                self.tick()
+            await asyncio.sleep(scheduler.tick_time * (1 - scheduler.alpha()))
+
+
+async def read_welcome(reader: asyncio.StreamReader
+                       ) -> tuple[int, int, int]:
+    """Читает приветствие сервера и возвращает номер игрока, ширину и
+    высоту поля в клетках.
+    """
+    magic, version, player, width, height = WELCOME_HEADER.unpack(
+        await reader.readexactly(WELCOME_HEADER.size)
+    )
+    if magic != PROTOCOL_MAGIC or version != PROTOCOL_VERSION:
+        raise ValueError('Неизвестный протокол сервера.')
+    return player, width, height
+
+
+async def read_frame(reader: asyncio.StreamReader
+                     ) -> tuple[int, int, list[tuple[int, int, int, int]]]:
+    """Читает кадр и возвращает его вид, номер хода и записи клеток
+    (x, y, код клетки, номер игрока).
+    """
+    kind, tick, count = FRAME_HEADER.unpack(
+        await reader.readexactly(FRAME_HEADER.size)
+    )
+    records = await reader.readexactly(CELL_RECORD.size * count)
+    return kind, tick, list(CELL_RECORD.iter_unpack(records))
+
+
+async def serve(host: str, port: int, server: GameServer) -> None:
+    """Запускает сервер и ходы до остановки процесса."""
+    async with await server.start(host, port):
+        await server.run()
+
+
+def main() -> None:
+    """Точка входа командной строки."""
+    parser = argparse.ArgumentParser(description='Сервер игры змейка.')
+    parser.add_argument('--host', default=SERVER_HOST)
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    parser.add_argument('--width', type=int, default=SCREEN_WIDTH)
+    parser.add_argument('--height', type=int, default=SCREEN_HEIGHT)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    server = GameServer(args.width, args.height, args.seed)
+    try:
+        asyncio.run(serve(args.host, args.port, server))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""Снимки незавершённых игр змейка.
+
+Снимок - двоичный файл с фиксированной раскладкой в порядке байтов
+машины:
+    - заголовок {SNAPSHOT_HEADER}: размер поля, зерно, направление
+    змейки, количество сегментов и препятствий, счётчики { GameStats };
+    - состояние генератора случайных чисел игры ({RNG_STATE_SIZE} чисел);
+    - сегменты змейки от головы к хвосту - пары координат;
+    - препятствия - четвёрки (x, y, код вида { KIND_NAMES }, вес камня).
+Все числа, кроме зерна, направления и времени игры в заголовке, -
+беззнаковые 32-битные. Файл открывается через { mmap }, а
+массивы читаются срезами { memoryview } без разбора каждой записи на
+Python, поэтому снимок с очень длинной змейкой загружается почти сразу.
+Запись атомарная: снимок сначала пишется во временный файл.
+"""
+import mmap
+import os
+import struct
+from array import array
+from itertools import chain
+from pathlib import Path
+from typing import Optional, Union
+
+from snake_engine import (
+    GRID_SIZE, KIND_NAMES, KIND_STONE, OPPOSITE, Apple, GameObject,
+    GameState, GameStats, ObstacleTable, Stone
+)
+
+"""Заголовок снимка: сигнатура, версия формата, ширина и высота поля,
+зерно, направление змейки, количество сегментов и препятствий, длина
+змейки, съеденные яблоки, врезания, лучшая длина и время игры в
+секундах из счётчиков игры.
+"""
+SNAPSHOT_MAGIC = b'SNKS'
+SNAPSHOT_VERSION = 2
+SNAPSHOT_HEADER = struct.Struct('=4sB3xIIQiiIIIIIId')
+"""Количество чисел в состоянии генератора { random.Random }."""
+RNG_STATE_SIZE = 625
+"""Размер числа в байтах и чисел на одну запись сегмента и препятствия."""
+NUMBER_SIZE = array('I').itemsize
+SEGMENT_FIELDS = 2
+OBSTACLE_FIELDS = 4
+
+
+def snapshot_bytes(state: GameState) -> bytes:
+    """Возвращает снимок игры {state}."""
+    stats = state.stats
+    snake = state.snake
+    _, rng_state, _ = state.rng.getstate()
+    obstacles = array('I', chain.from_iterable(
+        (*obstacle.position, obstacle.kind, getattr(obstacle, 'weight', 0))
+        for obstacle in state.obstacles
+    ))
+    header = SNAPSHOT_HEADER.pack(
+        SNAPSHOT_MAGIC, SNAPSHOT_VERSION, state.width, state.height,
+        state.seed, *snake.direction, snake.length, len(state.obstacles),
+        stats.snake_length, stats.eaten_apples, stats.reset_count,
+        stats.best_length, stats.duration
+    )
+    return b''.join((
+        header,
+        array('I', rng_state).tobytes(),
+        array('I', chain.from_iterable(snake.positions)).tobytes(),
+        obstacles.tobytes(),
+    ))
+
+
+def save_snapshot(state: GameState, path: Union[str, Path]) -> None:
+    """Атомарно сохраняет снимок игры в файл {path}."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(path.name + '.tmp')
+    temporary.write_bytes(snapshot_bytes(state))
+    os.replace(temporary, path)
+
+
+def restore_obstacle(state: GameState, table: ObstacleTable, kind: int,
+                     position: tuple[int, int], weight: int) -> GameObject:
+    """Создаёт в таблице {table} препятствие вида {kind} сразу в клетке
+    {position}.
+    """
+    if kind == KIND_STONE:
+        return Stone(weight=weight, free_cells=state.free_cells,
+                     table=table, position=position)
+    return Apple(name=KIND_NAMES[kind], free_cells=state.free_cells,
+                 table=table, position=position)
+
+
+def cells_on_board(xs: memoryview, ys: memoryview,
+                   width: int, height: int) -> bool:
+    """Проверяет, что координаты {xs} и {ys} лежат на поле {width} x
+    {height} и на сетке клеток. Проверяются только различные значения,
+    которых не больше, чем клеток по стороне поля, поэтому длинная
+    змейка проверяется почти так же быстро, как короткая.
+    """
+    return all(
+        value < limit and not value % GRID_SIZE
+        for values, limit in ((set(xs), width), (set(ys), height))
+        for value in values
+    )
+
+
+def check_records(numbers: memoryview, header: tuple) -> bool:
+    """Проверяет направление змейки, клетки сегментов и препятствий и
+    виды препятствий снимка.
+    """
+    _, _, width, height, _, direction_x, direction_y, length = header[:8]
+    segments_end = RNG_STATE_SIZE + SEGMENT_FIELDS * length
+    segments = numbers[RNG_STATE_SIZE:segments_end]
+    obstacles = numbers[segments_end:]
+    return (
+        length > 0 and (direction_x, direction_y) in OPPOSITE
+        and cells_on_board(segments[0::2], segments[1::2], width, height)
+        and cells_on_board(obstacles[0::OBSTACLE_FIELDS],
+                           obstacles[1::OBSTACLE_FIELDS], width, height)
+        and max(obstacles[2::OBSTACLE_FIELDS], default=0) < len(KIND_NAMES)
+    )
+
+
+def check_snapshot(view: memoryview) -> tuple:
+    """Проверяет размер, формат и записи снимка и возвращает поля
+    заголовка. Повреждённый снимок вызывает { ValueError }. Срезы
+    {view} здесь не сохраняются, чтобы при ошибке файл, отображённый в
+    память, можно было закрыть.
+    """
+    if len(view) < SNAPSHOT_HEADER.size:
+        raise ValueError('Снимок повреждён.')
+    header = SNAPSHOT_HEADER.unpack_from(view)
+    magic, version, *_, length, count = header[:9]
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError('Неизвестный формат снимка.')
+
+    size = RNG_STATE_SIZE + SEGMENT_FIELDS * length + OBSTACLE_FIELDS * count
+    if len(view) != SNAPSHOT_HEADER.size + size * NUMBER_SIZE:
+        raise ValueError('Снимок повреждён.')
+    with view[SNAPSHOT_HEADER.size:].cast('I') as numbers:
+        valid = check_records(numbers, header)
+    if not valid:
+        raise ValueError('Снимок повреждён.')
+    return header
+
+
+def restore(data: Union[bytes, memoryview],
+            stats: Optional[GameStats] = None) -> GameState:
+    """Восстанавливает игру из снимка. Счётчики записываются в {stats},
+    например объект { GameManager } клиента. Повреждённый снимок
+    вызывает { ValueError }.
+    """
+    with memoryview(data) as view:
+        (_, _, width, height, seed, direction_x, direction_y, length,
+         _, snake_length, eaten_apples, reset_count, best_length,
+         duration) = check_snapshot(view)
+        segments_end = RNG_STATE_SIZE + SEGMENT_FIELDS * length
+        numbers = view[SNAPSHOT_HEADER.size:].cast('I')
+    rng_state = numbers[:RNG_STATE_SIZE]
+    segments = numbers[RNG_STATE_SIZE:segments_end]
+    obstacles = numbers[segments_end:]
+
+    state = GameState(stats, width, height, seed, empty=True)
+    table = ObstacleTable()
+    state.obstacles = [
+        restore_obstacle(state, table, kind, (pos_x, pos_y), weight)
+        for pos_x, pos_y, kind, weight in zip(
+            *(obstacles[field::OBSTACLE_FIELDS]
+              for field in range(OBSTACLE_FIELDS))
+        )
+    ]
+    state.snake.set_body(zip(segments[0::2], segments[1::2]))
+    state.snake.update_direction((direction_x, direction_y))
+    state.stats.snake_length = snake_length
+    state.stats.eaten_apples = eaten_apples
+    state.stats.reset_count = reset_count
+    state.stats.best_length = best_length
+    state.stats.duration = duration
+    state.rng.setstate((3, tuple(rng_state), None))
+    state.restored = True
+    return state
+
+
+def load_snapshot(path: Union[str, Path],
+                  stats: Optional[GameStats] = None) -> GameState:
+    """Восстанавливает игру из файла снимка, отображённого в память."""
+    with open(path, 'rb') as file, mmap.mmap(
+            file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        with memoryview(mapped) as view:
+            return restore(view, stats)
@@ -0,0 +1,194 @@
+"""Турнир ботов на ядре { snake_engine }.
+
+Запускает тысячи игр с заданными зёрнами на всех ядрах процессора.
+Каждая игра - собственное состояние { GameState } и собственный бот
+внутри процесса пула, без глобального { GameManager }, экрана и модуля
+{ random }, поэтому игры можно играть и в потоках одного процесса.
+Игры раздаются процессам пачками по {--chunk-size}, результаты сводятся
+в конце.
+
+Пример запуска:
+    python snake_tournament.py --games 10000 --ticks 2000 --bot greedy
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from importlib import import_module
+from random import Random
+from typing import Callable, Iterable, NamedTuple, Optional
+
+from snake_autopilot import Autopilot
+from snake_engine import (
+    GRID_SIZE, OPPOSITE, SCREEN_HEIGHT, SCREEN_WIDTH, GameState, step
+)
+
+"""Параметры турнира по умолчанию."""
+DEFAULT_GAMES = 1000
+DEFAULT_TICKS = 1000
+DEFAULT_CHUNK_SIZE = 32
+DEFAULT_BOT = 'greedy'
+
+Policy = Callable[[GameState], Optional[tuple[int, int]]]
+
+
+class GameResult(NamedTuple):
+    """Итог одной игры."""
+
+    seed: int
+    length: int
+    eaten_apples: int
+    resets: int
+
+
+class RandomBot():
+    """Бот, который поворачивает в случайную сторону. Генератор бота
+    создаётся по зерну игры на первом ходу.
+    """
+
+    def __init__(self) -> None:
+        """Создаёт бота без генератора."""
+        self.__rng: Optional[Random] = None
+
+    def __call__(self, state: GameState) -> Optional[tuple[int, int]]:
+        """Возвращает случайное направление."""
+        if self.__rng is None:
+            self.__rng = Random(state.seed)
+        return self.__rng.choice(tuple(OPPOSITE))
+
+
+def _distance(cell: tuple[int, int], other: tuple[int, int],
+              width: int = SCREEN_WIDTH, height: int = SCREEN_HEIGHT) -> int:
+    """Расстояние между клетками поля {width} x {height} с учётом
+    перехода сквозь стены.
+    """
+    delta_x = abs(cell[0] - other[0]) % width
+    delta_y = abs(cell[1] - other[1]) % height
+    return (min(delta_x, width - delta_x)
+            + min(delta_y, height - delta_y)) // GRID_SIZE
+
+
+def greedy_bot(state: GameState) -> Optional[tuple[int, int]]:
+    """Бот, который идёт к ближайшему хорошему яблоку и не заходит в
+    клетки со своим телом, плохими яблоками и камнями.
+    """
+    snake = state.snake
+    size = state.free_cells.width, state.free_cells.height
+    head = snake.get_head_position()
+    target = min((obstacle.position for obstacle in state.obstacles
+                  if obstacle.name == 'apple'),
+                 key=lambda apple: _distance(head, apple, *size),
+                 default=head)
+    best, best_distance = None, None
+    for direction in OPPOSITE:
+        if direction == OPPOSITE[snake.direction]:
+            continue
+        cell = snake.new_head(direction)
+        obstacle = state.free_cells.object_at(cell)
+        if snake.occupies(cell) or (obstacle and obstacle.name != 'apple'):
+            continue
+        distance = _distance(cell, target, *size)
+        if best_distance is None or distance < best_distance:
+            best, best_distance = direction, distance
+
+    return best
+
+
+"""Встроенные боты по имени. Бот-класс создаётся заново для каждой
+игры, поэтому он может хранить состояние игры между ходами.
+"""
+BOTS = {
+    'random': RandomBot,
+    'greedy': greedy_bot,
+    'autopilot': Autopilot,
+}
+
+
+def load_bot(name: str) -> Policy:
+    """Возвращает бота по имени из {BOTS} или по пути 'модуль:функция'."""
+    if name in BOTS:
+        bot = BOTS[name]
+    else:
+        module, _, function = name.partition(':')
+        bot = getattr(import_module(module), function)
+    return bot() if isinstance(bot, type) else bot
+
+
+def play_game(seed: int, bot: str = DEFAULT_BOT,
+              ticks: int = DEFAULT_TICKS) -> GameResult:
+    """Играет одну игру из {ticks} ходов с зерном {seed}. Зерно задаёт
+    и генератор игры, и генератор случайного бота.
+    """
+    policy = load_bot(bot)
+    state = GameState(seed=seed)
+    for _ in range(ticks):
+        step(state, policy(state))
+
+    return GameResult(
+        seed, state.snake.length, state.stats.eaten_apples,
+        state.stats.reset_count
+    )
+
+
+def _play_seed(task: tuple[int, str, int]) -> GameResult:
+    """Распаковывает задачу пула и играет игру."""
+    return play_game(*task)
+
+
+def summarize(results: Iterable[GameResult]) -> dict[str, float]:
+    """Сводит итоги игр в общую таблицу."""
+    summary = {
+        'games': 0, 'max_length': 0, 'total_length': 0,
+        'eaten_apples': 0, 'resets': 0,
+    }
+    for result in results:
+        summary['games'] += 1
+        summary['total_length'] += result.length
+        summary['max_length'] = max(summary['max_length'], result.length)
+        summary['eaten_apples'] += result.eaten_apples
+        summary['resets'] += result.resets
+
+    games = summary['games'] or 1
+    summary['mean_length'] = summary['total_length'] / games
+    summary['mean_eaten_apples'] = summary['eaten_apples'] / games
+    summary['mean_resets'] = summary['resets'] / games
+    return summary
+
+
+def run_tournament(games: int = DEFAULT_GAMES, ticks: int = DEFAULT_TICKS,
+                   bot: str = DEFAULT_BOT, workers: Optional[int] = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   first_seed: int = 0) -> dict[str, float]:
+    """Играет {games} игр с зёрнами начиная с {first_seed} на пуле из
+    {workers} процессов ({None} - по числу ядер, 0 - в текущем процессе)
+    и возвращает сводку.
+    """
+    tasks = [(seed, bot, ticks)
+             for seed in range(first_seed, first_seed + games)]
+    if workers == 0:
+        return summarize(map(_play_seed, tasks))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return summarize(pool.map(_play_seed, tasks, chunksize=chunk_size))
+
+
+def main() -> None:
+    """Точка входа командной строки."""
+    parser = argparse.ArgumentParser(description='Турнир ботов змейки.')
+    parser.add_argument('--games', type=int, default=DEFAULT_GAMES)
+    parser.add_argument('--ticks', type=int, default=DEFAULT_TICKS)
+    parser.add_argument('--bot', default=DEFAULT_BOT,
+                        help='random, greedy, autopilot или модуль:функция')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    summary = run_tournament(
+        args.games, args.ticks, args.bot, args.workers, args.chunk_size,
+        args.seed
+    )
+    for key, value in summary.items():
+        print(f'{key}: {value:g}')
+
+
+if __name__ == '__main__':
+    main()
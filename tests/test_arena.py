@@ -0,0 +1,184 @@
+import snake_arena
+import snake_engine
+
+
+def _empty_arena(players):
+    arena = snake_arena.Arena(seed=0)
+    for obstacle in arena.obstacles:
+        obstacle.remove_from_field()
+    arena.obstacles = []
+    for _ in range(players):
+        arena.add_player()
+    return arena
+
+
+def _place(snake, cells, direction):
+    snake.set_body(cells)
+    snake.update_direction(direction)
+
+
+def test_snake_bites_other_snake():
+    arena = _empty_arena(2)
+    first, second = arena.snakes[1], arena.snakes[2]
+    _place(first, [(100, 100)], snake_engine.RIGHT)
+    _place(second, [(120, 100), (120, 80)], snake_engine.DOWN)
+
+    events = arena.tick()
+
+    assert events == {
+        1: snake_engine.EVENT_BITE, 2: snake_engine.EVENT_MOVE
+    }
+    assert first.stats.reset_count == 1
+    assert first.get_head_position() not in {(120, 100), (120, 120)}
+    assert arena.owners == {
+        first.get_head_position(): 1, (120, 120): 2, (120, 100): 2
+    }
+
+
+def test_head_to_head_crashes_both_in_any_order():
+    for order in ((1, 2), (2, 1)):
+        arena = _empty_arena(2)
+        arena.snakes = {player: arena.snakes[player] for player in order}
+        _place(arena.snakes[1], [(100, 100)], snake_engine.RIGHT)
+        _place(arena.snakes[2], [(140, 100)], snake_engine.LEFT)
+
+        events = arena.tick()
+
+        assert events == {
+            1: snake_engine.EVENT_BITE, 2: snake_engine.EVENT_BITE
+        }
+        assert (120, 100) not in arena.owners
+
+
+def test_head_follows_leaving_tail():
+    arena = _empty_arena(2)
+    first, second = arena.snakes[1], arena.snakes[2]
+    _place(first, [(100, 100)], snake_engine.RIGHT)
+    _place(second, [(120, 80), (120, 100)], snake_engine.UP)
+
+    events = arena.tick()
+
+    assert events == {
+        1: snake_engine.EVENT_MOVE, 2: snake_engine.EVENT_MOVE
+    }
+    assert arena.owners == {(120, 100): 1, (120, 60): 2, (120, 80): 2}
+
+
+def test_growing_tail_stays_solid():
+    arena = _empty_arena(2)
+    first, second = arena.snakes[1], arena.snakes[2]
+    _place(first, [(100, 100)], snake_engine.RIGHT)
+    _place(second, [(120, 80), (120, 100)], snake_engine.UP)
+    apple = snake_engine.Apple(free_cells=arena.free_cells)
+    apple.set_position((120, 60))
+    arena.obstacles = [apple]
+
+    events = arena.tick()
+
+    assert events[1] == snake_engine.EVENT_BITE
+    assert events[2] == snake_engine.EVENT_APPLE
+    assert second.positions[-1] == (120, 100)
+
+
+def test_short_snake_keeps_tail_on_bad_apple():
+    arena = _empty_arena(2)
+    first, second = arena.snakes[1], arena.snakes[2]
+    _place(first, [(100, 100)], snake_engine.RIGHT)
+    _place(second, [(120, 100)], snake_engine.UP)
+    apple = snake_engine.Apple(
+        name=snake_engine.EVENT_BAD_APPLE, free_cells=arena.free_cells
+    )
+    apple.set_position((120, 80))
+    arena.obstacles = [apple]
+
+    events = arena.tick()
+
+    assert events == {
+        1: snake_engine.EVENT_BITE, 2: snake_engine.EVENT_BAD_APPLE
+    }
+    assert list(second.positions) == [(120, 100)]
+    assert arena.owners[(120, 100)] == 2
+    assert first.get_head_position() != (120, 100)
+
+
+def test_crashed_snake_keeps_tail():
+    arena = _empty_arena(3)
+    first, second, third = (arena.snakes[player] for player in (1, 2, 3))
+    _place(first, [(100, 100)], snake_engine.RIGHT)
+    _place(second, [(120, 80), (120, 100)], snake_engine.UP)
+    _place(third, [(120, 40)], snake_engine.DOWN)
+
+    events = arena.tick()
+
+    assert set(events.values()) == {snake_engine.EVENT_BITE}
+    cells = [cell for snake in arena.snakes.values()
+             for cell in snake.positions]
+    assert len(cells) == len(set(cells)) == len(arena.owners)
+
+
+def _knock_stone(order, second_cells):
+    arena = _empty_arena(2)
+    arena.snakes = {player: arena.snakes[player] for player in order}
+    first, second = arena.snakes[1], arena.snakes[2]
+    _place(first, [(100, 100), (80, 100), (60, 100)], snake_engine.RIGHT)
+    _place(second, second_cells, snake_engine.DOWN)
+    stone = snake_engine.Stone(weight=2, free_cells=arena.free_cells)
+    stone.set_position((120, 100))
+    arena.obstacles = [stone]
+    return arena, first, second, stone, arena.tick()
+
+
+def test_knocked_stone_crashes_other_snake():
+    for order in ((1, 2), (2, 1)):
+        arena, first, second, stone, events = _knock_stone(
+            order, [(140, 80)]
+        )
+
+        assert events == {
+            1: snake_engine.EVENT_STONE, 2: snake_engine.EVENT_MOVE
+        }
+        assert stone.position == (120, 100)
+        assert list(first.positions) == [(100, 100)]
+        assert second.stats.reset_count == 1
+        assert stone.position not in arena.owners
+
+
+def test_knocked_stone_lands_on_leaving_tail():
+    for order in ((1, 2), (2, 1)):
+        arena, first, second, stone, events = _knock_stone(
+            order, [(140, 100)]
+        )
+
+        assert events == {
+            1: snake_engine.EVENT_STONE, 2: snake_engine.EVENT_MOVE
+        }
+        assert stone.position == (140, 100)
+        assert list(second.positions) == [(140, 120)]
+        assert second.stats.reset_count == 0
+        assert arena.owners == {(100, 100): 1, (140, 120): 2}
+
+
+def test_bots_share_board_with_players():
+    arena = snake_arena.Arena(seed=3)
+    for _ in range(20):
+        arena.add_player(snake_arena.cautious_bot)
+    human = arena.add_player()
+
+    for tick in range(200):
+        arena.turn(human, tick % 4)
+        arena.tick()
+        cells = [cell for snake in arena.snakes.values()
+                 for cell in snake.positions]
+        assert len(cells) == len(set(cells)) == len(arena.owners)
+        assert not any(map(arena.free_cells.object_at, cells))
+
+
+def test_arena_does_not_use_shared_rng():
+    shared = snake_engine.DEFAULT_RNG.getstate()
+
+    arena = snake_arena.Arena(seed=5)
+    for _ in range(10):
+        arena.add_player()
+    arena.tick()
+
+    assert snake_engine.DEFAULT_RNG.getstate() == shared
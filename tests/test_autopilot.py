@@ -0,0 +1,85 @@
+import random
+from collections import deque
+
+import snake_autopilot
+import snake_engine
+import snake_tournament
+
+
+def _bfs(field):
+    distances = [None] * len(field.walls)
+    queue = deque()
+    for source in field.sources:
+        if not field.walls[source]:
+            distances[source] = 0
+            queue.append(source)
+    while queue:
+        cell = queue.popleft()
+        for neighbour in field.neighbours(cell):
+            if not field.walls[neighbour] and distances[neighbour] is None:
+                distances[neighbour] = distances[cell] + 1
+                queue.append(neighbour)
+    return distances
+
+
+def test_repaired_field_matches_full_search():
+    rng = random.Random(5)
+    field = snake_autopilot.DistanceField(13, 9)
+    size = 13 * 9
+    walls = []
+    for _ in range(400):
+        operation = rng.random()
+        if operation < 0.35:
+            walls.append(rng.randrange(size))
+            field.block(walls[-1])
+        elif operation < 0.6 and walls:
+            field.unblock(walls.pop(rng.randrange(len(walls))))
+        elif operation < 0.8 or not field.sources:
+            field.add_source(rng.randrange(size))
+        else:
+            field.remove_source(rng.choice(sorted(field.sources)))
+        if rng.random() < 0.3:
+            while field.pending:
+                field.update(rng.randrange(1, 20))
+            assert [field.distance(cell) for cell in range(size)] == (
+                _bfs(field)
+            )
+
+
+def test_field_wraps_around_edges():
+    field = snake_autopilot.DistanceField(10, 10)
+    field.add_source(0)
+    field.update()
+
+    assert field.distance(9) == 1
+    assert field.distance(90) == 1
+    assert field.distance(99) == 2
+
+
+def test_update_respects_budget():
+    field = snake_autopilot.DistanceField(100, 100)
+    field.add_source(0)
+
+    assert field.update(50) == 50
+    assert field.pending
+
+
+def test_autopilot_eats_apples_and_avoids_walls():
+    state = snake_engine.GameState(seed=4)
+    pilot = snake_autopilot.Autopilot()
+    events = []
+    for _ in range(500):
+        events.extend(snake_engine.step(state, pilot(state))[1])
+
+    assert state.stats.eaten_apples > 30
+    assert snake_engine.EVENT_BAD_APPLE not in events
+
+
+def test_tournament_creates_autopilot_per_game():
+    first = snake_tournament.load_bot('autopilot')
+
+    assert isinstance(first, snake_autopilot.Autopilot)
+    assert snake_tournament.load_bot('autopilot') is not first
+    assert snake_tournament.play_game(3, 'autopilot', 200) == (
+        snake_tournament.play_game(3, 'autopilot', 200)
+    )
@@ -0,0 +1,144 @@
+import numpy as np
+
+import snake_batch
+import snake_engine
+from snake_engine import GRID_SIZE, RIGHT
+
+RIGHT_ACTION = snake_batch.direction_index(RIGHT)
+
+
+def _empty_batch(count=1):
+    batch = snake_batch.SnakeBatch(count, seed=1)
+    batch.boards[batch.boards != snake_batch.CELL_SNAKE] = 0
+    batch.direction[:] = RIGHT_ACTION
+    return batch
+
+
+def _ahead(batch, distance=1):
+    return batch.next_cells(batch.head_cells(), batch.direction, distance)
+
+
+def _put(batch, cells, code):
+    batch.boards.reshape(batch.count, -1)[np.arange(batch.count), cells] = code
+
+
+def test_batch_counts_objects():
+    batch = snake_batch.SnakeBatch(16, apples=3, bad_apples=2, stones=4)
+
+    for code, count in ((snake_batch.CELL_SNAKE, 1),
+                        (snake_batch.CELL_APPLE, 3),
+                        (snake_batch.CELL_BAD_APPLE, 2),
+                        (snake_batch.CELL_STONE, 4)):
+        assert ((batch.boards == code).sum(axis=(1, 2)) == count).all()
+
+
+def test_batch_head_wraps_around():
+    batch = _empty_batch()
+    for _ in range(batch.width):
+        events, reset = batch.step()
+
+    assert (events == snake_batch.BATCH_MOVE).all()
+    assert not reset.any()
+    assert (batch.head_cells() == batch.body[0, 0]).all()
+
+
+def test_batch_apples():
+    batch = _empty_batch()
+    _put(batch, _ahead(batch), snake_batch.CELL_APPLE)
+
+    events, _ = batch.step()
+
+    assert events[0] == snake_batch.BATCH_APPLE
+    assert batch.length[0] == 2
+    assert (batch.boards == snake_batch.CELL_APPLE).sum() == 1
+
+    _put(batch, _ahead(batch), snake_batch.CELL_BAD_APPLE)
+    events, _ = batch.step()
+
+    assert events[0] == snake_batch.BATCH_BAD_APPLE
+    assert batch.length[0] == 1
+    assert batch.eaten_apples[0] == 2
+
+
+def test_batch_stone_rules():
+    batch = _empty_batch(2)
+    weight = batch.stone_weight
+    for _ in range(weight + 1):
+        _put(batch, _ahead(batch), snake_batch.CELL_APPLE)
+        batch.step()
+    batch.boards[batch.boards == snake_batch.CELL_APPLE] = 0
+
+    stone = _ahead(batch)
+    landing = _ahead(batch, weight)
+    _put(batch, stone, snake_batch.CELL_STONE)
+    _put(batch, _ahead(batch, 2), snake_batch.CELL_APPLE)
+    batch.length[1] = weight
+
+    events, reset = batch.step()
+
+    assert (events == snake_batch.BATCH_STONE).all()
+    assert reset.tolist() == [False, True]
+    assert batch.reset_count.tolist() == [0, 1]
+    assert batch.length[0] == 2
+    cells = batch.boards.reshape(2, -1)[0]
+    assert cells[stone[0]] == snake_batch.CELL_EMPTY
+    assert cells[landing[0]] == snake_batch.CELL_STONE
+    assert (cells == snake_batch.CELL_APPLE).sum() == 1
+
+
+def _engine_row(body, objects):
+    state = snake_engine.GameState(seed=0)
+    for obstacle in state.obstacles:
+        obstacle.remove_from_field()
+    state.obstacles = []
+    state.snake.set_body([(x * GRID_SIZE, 0) for x in body])
+    state.snake.update_direction(RIGHT)
+    for x, obstacle in objects:
+        obstacle.free_cells = state.free_cells
+        obstacle.place((x * GRID_SIZE, 0))
+        state.obstacles.append(obstacle)
+    return state
+
+
+def _batch_row(body, objects, weight):
+    batch = snake_batch.SnakeBatch(1, stone_weight=weight, seed=1)
+    batch.boards[:] = snake_batch.CELL_EMPTY
+    batch.boards[0, 0, body] = snake_batch.CELL_SNAKE
+    batch.body[0, :len(body)] = body[::-1]
+    batch.head[0] = len(body) - 1
+    batch.length[0] = len(body)
+    batch.direction[:] = RIGHT_ACTION
+    for x, code in objects:
+        batch.boards[0, 0, x] = code
+    return batch
+
+
+def test_batch_stone_chain_matches_engine():
+    weight = 3
+    body = list(range(10, 0, -1))
+    layout = ((11, snake_batch.CELL_STONE), (12, snake_batch.CELL_APPLE),
+              (13, snake_batch.CELL_STONE), (15, snake_batch.CELL_STONE))
+    state = _engine_row(body, [
+        (x, snake_engine.Stone(weight=weight)
+         if code == snake_batch.CELL_STONE else snake_engine.Apple())
+        for x, code in layout
+    ])
+    batch = _batch_row(body, layout, weight)
+
+    state, events = snake_engine.step(state)
+    batch_events, reset = batch.step()
+
+    assert events == [snake_engine.EVENT_STONE]
+    assert batch_events[0] == snake_batch.BATCH_STONE
+    assert not reset[0]
+    stones = sorted(
+        (obstacle.position[1] // GRID_SIZE) * batch.width
+        + obstacle.position[0] // GRID_SIZE
+        for obstacle in state.obstacles
+        if obstacle.name == snake_engine.EVENT_STONE
+    )
+    assert stones == [12, 14, 17]
+    cells = batch.boards.reshape(-1)
+    assert np.flatnonzero(cells == snake_batch.CELL_STONE).tolist() == stones
+    assert batch.length[0] == state.snake.length == len(body) - weight
+    assert (cells == snake_batch.CELL_APPLE).sum() == 1
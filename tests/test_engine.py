@@ -0,0 +1,297 @@
+import subprocess
+import sys
+
+import snake_engine
+from conftest import BASE_DIR
+
+
+def _empty_state():
+    state = snake_engine.GameState()
+    for obstacle in state.obstacles:
+        obstacle.remove_from_field()
+    state.obstacles = []
+    state.snake.update_direction(snake_engine.RIGHT)
+    return state
+
+
+def _place(state, obstacle, position):
+    obstacle.remove_from_field()
+    obstacle.free_cells = state.free_cells
+    obstacle.position = position
+    obstacle.occupy(position)
+    state.obstacles.append(obstacle)
+
+
+def test_engine_has_no_pygame_dependency():
+    code = 'import sys, snake_engine; sys.exit("pygame" in sys.modules)'
+    result = subprocess.run([sys.executable, '-c', code], cwd=BASE_DIR)
+    assert result.returncode == 0, (
+        'Модуль `snake_engine` не должен импортировать `pygame`.'
+    )
+
+
+def test_step_moves_snake():
+    state = _empty_state()
+    head_x, head_y = state.snake.get_head_position()
+
+    state, events = snake_engine.step(state)
+
+    assert events == [snake_engine.EVENT_MOVE]
+    assert state.snake.get_head_position() == (
+        head_x + snake_engine.GRID_SIZE, head_y
+    )
+
+
+def test_step_ignores_reverse_action():
+    state = _empty_state()
+
+    snake_engine.step(state, snake_engine.LEFT)
+
+    assert state.snake.direction == snake_engine.RIGHT
+
+
+def test_step_eats_apple():
+    state = _empty_state()
+    _place(state, snake_engine.Apple(), state.snake.new_head())
+
+    state, events = snake_engine.step(state)
+
+    assert events == [snake_engine.EVENT_APPLE]
+    assert state.snake.length == 2
+    assert state.stats.eaten_apples == 1
+    assert state.stats.snake_length == 2
+
+
+def test_step_resets_after_heavy_stone():
+    state = _empty_state()
+    _place(state, snake_engine.Stone(), state.snake.new_head())
+
+    state, events = snake_engine.step(state)
+
+    assert events == [snake_engine.EVENT_STONE, snake_engine.EVENT_RESET]
+    assert state.stats.reset_count == 1
+    assert not state.stats.reset
+
+
+def _stone_row(state, limit=snake_engine.KNOCK_BACK_LIMIT):
+    size = snake_engine.GRID_SIZE
+    snake = state.snake
+    snake.set_body(
+        [(x * size, 0) for x in range(10, 0, -1)]
+    )
+    head_x = snake.get_head_position()[0]
+    first = snake_engine.Stone(weight=3)
+    second = snake_engine.Stone(weight=3)
+    apple = snake_engine.Apple()
+    _place(state, first, (head_x + size, 0))
+    _place(state, apple, (head_x + 2 * size, 0))
+    _place(state, second, (head_x + 3 * size, 0))
+
+    landing = snake_engine.clear_stone_trace(
+        first, snake, state.obstacles, state.stats, limit
+    )
+    return head_x, landing, first, second, apple
+
+
+def test_stone_knock_back_chain():
+    state = _empty_state()
+    size = snake_engine.GRID_SIZE
+
+    head_x, landing, first, second, apple = _stone_row(state)
+
+    assert landing == first.position == (head_x + 2 * size, 0)
+    assert second.position == (head_x + 5 * size, 0)
+    assert apple.position not in {first.position, second.position}
+    assert state.free_cells.object_at(apple.position) is apple
+    assert state.free_cells.object_at(first.position) is first
+    assert not state.stats.reset
+
+
+def test_stone_knock_back_limit():
+    state = _empty_state()
+    size = snake_engine.GRID_SIZE
+
+    head_x, landing, first, second, _ = _stone_row(state, limit=1)
+
+    assert landing == first.position == (head_x + 3 * size, 0)
+    assert second.position != first.position
+    assert state.free_cells.object_at(second.position) is second
+
+
+def test_stone_knock_back_without_index():
+    snake = snake_engine.Snake()
+    snake.positions[0] = (0, 0)
+    snake.update_direction(snake_engine.RIGHT)
+    stone = snake_engine.Stone(weight=4)
+    stone.position = (20, 0)
+    apple = snake_engine.Apple()
+    apple.position = (40, 0)
+    stats = snake_engine.GameStats()
+
+    landing = snake_engine.clear_stone_trace(
+        stone, snake, [stone, apple], stats
+    )
+
+    assert landing == stone.position == (80, 0)
+    assert apple.position not in {(0, 0), (80, 0)}
+
+
+def test_free_cells_swap_remove():
+    free_cells = snake_engine.FreeCells(60, 40)
+    cell = (20, 20)
+
+    free_cells.take(cell)
+    free_cells.take(cell)
+    free_cells.release(cell)
+
+    assert len(free_cells) == 5
+    assert not free_cells.is_free(cell)
+
+    free_cells.release(cell)
+
+    assert len(free_cells) == 6
+    assert free_cells.is_free(cell)
+
+
+def test_take_all_counts_like_take():
+    counts = {(0, 0): 2, (20, 20): 1, (60, 0): 1, (5, 0): 1}
+    for size in (60, 2000 * snake_engine.GRID_SIZE):
+        bulk = snake_engine.FreeCells(size, 40)
+        single = snake_engine.FreeCells(size, 40)
+        bulk.take((20, 20))
+        single.take((20, 20))
+
+        bulk.take_all(counts)
+        for cell, count in counts.items():
+            for _ in range(count):
+                single.take(cell)
+
+        assert len(bulk) == len(single)
+        if not bulk.sparse:
+            assert set(bulk) == set(single)
+
+
+def test_huge_board_is_sparse_and_wraps():
+    size = 2000 * snake_engine.GRID_SIZE
+    state = snake_engine.GameState(width=size, height=size)
+    free_cells = state.free_cells
+    used = len(state.obstacles) + state.snake.length
+
+    assert free_cells.sparse
+    assert len(free_cells) == 2000 * 2000 - used
+    assert all(not free_cells.is_free(obstacle.position)
+               for obstacle in state.obstacles)
+
+    snake = state.snake
+    snake.positions[0] = (size - snake_engine.GRID_SIZE, 0)
+    snake.update_direction(snake_engine.RIGHT)
+
+    assert snake.new_head() == (0, 0)
+    assert free_cells.is_free(free_cells.choice())
+
+
+def test_free_cells_follow_objects():
+    state = snake_engine.GameState()
+    turns = (snake_engine.UP, snake_engine.LEFT)
+    for tick in range(2000):
+        snake_engine.step(state, turns[tick % 2])
+
+    used = set(snake_engine.get_all_position(state.snake, state.obstacles))
+    assert set(state.free_cells) == snake_engine.FIELD_CELLS - used
+
+
+def test_snake_body_occupancy():
+    snake = snake_engine.Snake()
+    snake.update_direction(snake_engine.RIGHT)
+    for _ in range(5):
+        snake.grow_up(snake.new_head())
+    tail = snake.positions[-1]
+
+    snake.move(snake.new_head())
+
+    assert snake.length == 6
+    assert snake.last == tail
+    assert not snake.can_bite_itself(tail)
+    assert snake.can_bite_itself(snake.positions[-1])
+
+    snake.cut_tail()
+
+    assert snake.length == 5
+    assert all(snake.occupies(cell) for cell in snake.positions)
+
+
+def test_obstacle_lookup_follows_moves():
+    state = snake_engine.GameState()
+    stone = state.obstacles[-1]
+    old_position = stone.position
+
+    stone.randomize_position()
+
+    assert state.free_cells.object_at(stone.position) is stone
+    assert state.free_cells.object_at(old_position) is None
+    assert snake_engine.find_obstacle(
+        stone.position, state.snake, state.obstacles
+    ) is stone
+
+
+def test_obstacles_are_views_into_shared_table():
+    state = snake_engine.GameState(seed=6)
+    table = state.obstacles[0].table
+    stone = state.obstacles[-1]
+
+    assert all(obstacle.table is table for obstacle in state.obstacles)
+    assert len(table) == len(state.obstacles)
+    assert not hasattr(stone, '__dict__')
+    assert not hasattr(state.snake, '__dict__')
+    assert (stone.name, stone.body_color, stone.weight) == (
+        snake_engine.EVENT_STONE, snake_engine.STONE_COLOR,
+        snake_engine.DEFAULT_STONE_WEIGHT
+    )
+    assert state.obstacles[-21].name == snake_engine.EVENT_BAD_APPLE
+    assert isinstance(stone, snake_engine.GameObject)
+    bad_apple = state.obstacles[-21]
+    assert bad_apple.body_color == snake_engine.BAD_APPLE_COLOR
+    assert snake_engine.Apple((1, 2, 3)).body_color == (1, 2, 3)
+    stone.weight = 2
+    assert table.weights[stone.index] == 2
+    stone.weight = 100_000
+    assert stone.weight == 100_000
+    assert (table.xs[stone.index], table.ys[stone.index]) == stone.position
+
+
+def test_resets_reuse_obstacles():
+    state = snake_engine.GameState(seed=6)
+    obstacles = list(state.obstacles)
+    layout = [obstacle.position for obstacle in obstacles]
+    turns = (snake_engine.UP, snake_engine.LEFT)
+    for tick in range(300):
+        snake_engine.step(state, turns[tick % 2])
+
+    state.reset()
+    assert all(old is new for old, new in zip(obstacles, state.obstacles))
+    assert len(state.free_cells) == (
+        snake_engine.FIELD_SIZE - len(obstacles) - 1
+    )
+    assert all(state.free_cells.object_at(obstacle.position) is obstacle
+               for obstacle in state.obstacles)
+
+    state.start(6)
+    assert state.obstacles[0] is obstacles[0]
+    assert len(obstacles[0].table) == len(obstacles)
+    assert [obstacle.position for obstacle in state.obstacles] == layout
+
+
+def test_fixed_timestep_is_independent_of_frames():
+    scheduler = snake_engine.FixedTimestep(tick_rate=10, max_ticks=3)
+
+    assert scheduler.advance(0.0) == 0
+    assert scheduler.advance(0.05) == 0
+    assert abs(scheduler.alpha() - 0.5) < 1e-9
+    assert scheduler.advance(0.25) == 2
+    assert scheduler.advance(10.0) == 3
+    assert scheduler.tick_count == 5
+
+    scheduler.reset()
+
+    assert scheduler.advance(20.0) == 0
+    assert scheduler.get_sim_time() == 0.5
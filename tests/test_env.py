@@ -0,0 +1,66 @@
+import numpy as np
+
+import snake_batch
+import snake_engine
+import snake_env
+
+
+def _full_observation(env):
+    expected = np.zeros_like(env.observation)
+    for x in range(env.width):
+        for y in range(env.height):
+            cell = (x * snake_engine.GRID_SIZE, y * snake_engine.GRID_SIZE)
+            expected[y, x] = env.cell_code(cell)
+    head = env.state.snake.get_head_position()
+    expected[head[1] // snake_engine.GRID_SIZE,
+             head[0] // snake_engine.GRID_SIZE] = snake_env.CELL_HEAD
+    return expected
+
+
+def test_observation_is_updated_in_place():
+    env = snake_env.SnakeEnv(seed=2)
+    observation, _ = env.reset(seed=2)
+    rng = np.random.default_rng(0)
+    rewards = []
+    terminated_count = 0
+    for _ in range(2000):
+        result, reward, terminated, _, _ = env.step(
+            int(rng.integers(snake_env.ACTION_COUNT))
+        )
+        assert result is observation
+        rewards.append(reward)
+        terminated_count += terminated
+
+    assert (observation == _full_observation(env)).all()
+    assert terminated_count == env.state.stats.reset_count > 0
+    assert set(rewards) > {0.0, snake_env.REWARDS[snake_engine.EVENT_RESET]}
+
+
+def test_apple_reward():
+    env = snake_env.SnakeEnv(seed=1)
+    state = env.state
+    new_head = state.snake.new_head()
+    apple = next(obstacle for obstacle in state.obstacles
+                 if obstacle.name == snake_engine.EVENT_APPLE)
+    apple.set_position(new_head)
+
+    _, reward, terminated, _, info = env.step()
+
+    assert reward == snake_env.REWARDS[snake_engine.EVENT_APPLE]
+    assert not terminated
+    assert info['length'] == 2
+    assert (env.observation == snake_batch.CELL_SNAKE).sum() == 1
+
+
+def test_vector_env_shares_buffers():
+    vec_env = snake_env.SnakeVecEnv(4, seed=0, max_steps=10)
+    observations, _ = vec_env.reset(seed=0)
+
+    for _ in range(10):
+        result, rewards, _, truncated, infos = vec_env.step([0, 1, 2, -1])
+
+    assert result is observations
+    assert truncated.all()
+    assert all(env.steps == 0 for env in vec_env.envs)
+    assert np.shares_memory(observations, vec_env.envs[3].observation)
+    assert (observations[3] == _full_observation(vec_env.envs[3])).all()
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+import snake_profiler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_phase_percentiles_and_dump(tmp_path):
+    clock = FakeClock()
+    dump = tmp_path / 'frames.jsonl'
+    profiler = snake_profiler.FrameProfiler(
+        window=10, dump_path=str(dump), clock=clock
+    )
+    for frame in range(20):
+        profiler.start_frame()
+        clock.now += 0.001
+        profiler.mark('events')
+        clock.now += 0.002 * (frame % 10 + 1)
+        profiler.mark('drawing')
+        profiler.end_frame()
+    profiler.close()
+
+    assert profiler.percentile('events', 50) == pytest.approx(0.001)
+    assert profiler.percentile('drawing', 99) == pytest.approx(0.02)
+    assert profiler.percentile(
+        snake_profiler.FRAME_PHASE, 0
+    ) == pytest.approx(0.003)
+    records = [json.loads(line) for line in dump.read_text().splitlines()]
+    assert len(records) == 20
+    assert records[-1]['frame'] == 19
+    assert records[-1]['drawing'] == pytest.approx(20.0)
+
+
+def test_tick_intervals():
+    profiler = snake_profiler.FrameProfiler()
+    for now in (0.0, 0.2, 0.4, 5.0, 5.2):
+        if now == 5.0:
+            profiler.pause_ticks()
+        profiler.record_tick(now)
+
+    assert profiler.percentile(
+        snake_profiler.TICK_PHASE, 99
+    ) == pytest.approx(0.2)
+    assert profiler.percentile('unknown', 50) is None
+
+
+def test_catch_up_ticks_share_frame_interval():
+    profiler = snake_profiler.FrameProfiler()
+    for now, ticks in ((0.0, 1), (0.2, 1), (0.8, 3), (1.0, 1)):
+        profiler.record_tick(now, ticks)
+
+    assert profiler.percentile(
+        snake_profiler.TICK_PHASE, 0
+    ) == pytest.approx(0.2)
@@ -0,0 +1,199 @@
+import snake_engine
+import the_snake
+
+
+def _rect_cells(rects):
+    return {(rect.x, rect.y) for rect in rects}
+
+
+def test_dirty_rendering_updates_only_changed_cells():
+    state = snake_engine.GameState()
+    for obstacle in state.obstacles:
+        obstacle.remove_from_field()
+    state.obstacles = []
+    context = the_snake.GameContext()
+    assert the_snake.render_game(context, state, full=True) is None
+
+    tail = state.snake.positions[-1]
+    snake_engine.step(state)
+    rects = the_snake.render_game(context, state, full=False)
+
+    assert _rect_cells(rects) == {tail, state.snake.get_head_position()}
+    assert the_snake.render_game(context, state, full=False) == []
+
+
+def test_texture_is_seeded_and_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(the_snake, 'TEXTURE_CACHE_DIR', str(tmp_path))
+    width, height = 23, 11
+
+    pixels = the_snake.load_texture(width, height, seed=7)
+
+    assert pixels.shape == (width, height, 3)
+    assert abs(
+        pixels.astype(int) - the_snake.BOARD_BACKGROUND_COLOR
+    ).max() <= the_snake.NOISE_STRENGTH
+    assert len(list(tmp_path.iterdir())) == 1
+    assert (the_snake.load_texture(width, height, seed=7) == pixels).all()
+    assert (the_snake.generate_texture(width, height, 7) == pixels).all()
+
+
+def test_cell_sprites_are_cached():
+    sprite = the_snake.get_cell_sprite(snake_engine.APPLE_COLOR)
+
+    assert the_snake.get_cell_sprite(snake_engine.APPLE_COLOR) is sprite
+    assert sprite.get_at((0, 0))[:3] == the_snake.BORDER_COLOR
+    assert sprite.get_at((5, 5))[:3] == snake_engine.APPLE_COLOR
+    tail = the_snake.get_cell_sprite(snake_engine.APPLE_COLOR, tail=True)
+    assert tail.get_at((0, 0))[:3] == snake_engine.APPLE_COLOR
+
+
+def test_idle_menu_is_not_redrawn():
+    context = the_snake.GameContext()
+    assert the_snake.draw_menu(context, force=True) == [
+        context.screen.get_rect()
+    ]
+    assert the_snake.draw_menu(context) == []
+
+    context.game.menu_down()
+    assert the_snake.draw_menu(context) == [the_snake.main_menu_rect]
+    assert the_snake.draw_menu(context) == []
+
+
+def test_status_line_is_cached():
+    game = the_snake.GameManager()
+    info = game.info()
+
+    assert game.info() is info
+
+    game.update_eaten_apples()
+
+    assert game.info() is not info
+
+
+def test_profiler_overlay_is_added_to_update_rects():
+    context = the_snake.GameContext()
+    update_rects = []
+
+    the_snake.draw_profiler_overlay(context, update_rects)
+
+    assert update_rects == [context.text_cache.overlay.get_rect()]
+
+
+def test_camera_follows_head_on_huge_board():
+    size = 2000 * snake_engine.GRID_SIZE
+    state = snake_engine.GameState(width=size, height=size)
+    state.snake.update_direction(snake_engine.RIGHT)
+    context = the_snake.GameContext()
+    camera = context.camera
+
+    assert the_snake.render_game(context, state, full=True) is None
+    head = state.snake.get_head_position()
+    assert camera.to_screen(head, state.free_cells) == (
+        the_snake.MIDDLE_SCREEN
+    )
+    visible = list(camera.visible_cells(state.free_cells))
+    assert len(visible) == snake_engine.FIELD_SIZE
+
+    snake_engine.step(state)
+
+    assert the_snake.render_game(context, state, full=False) is None
+    assert camera.to_screen((0, 0), state.free_cells) is None
+
+
+def _press(*keys):
+    for key in keys:
+        the_snake.pg.event.post(
+            the_snake.pg.event.Event(the_snake.pg.KEYDOWN, key=key)
+        )
+
+
+def test_quick_turns_are_buffered_between_ticks():
+    pg = the_snake.pg
+    context = the_snake.GameContext()
+    queue = context.input_queue
+    state = snake_engine.GameState(seed=0)
+    for obstacle in state.obstacles:
+        obstacle.remove_from_field()
+    state.obstacles = []
+    state.snake.update_direction(snake_engine.RIGHT)
+    pg.event.clear()
+    _press(pg.K_UP, pg.K_LEFT)
+    queue.poll()
+    the_snake.handle_keys(context, state.snake)
+
+    for direction in (snake_engine.UP, snake_engine.LEFT, None):
+        turn = queue.pop_turn()
+        assert turn == direction
+        if turn is not None:
+            state.snake.update_direction(turn)
+        snake_engine.step(state)
+    assert state.snake.direction == snake_engine.LEFT
+
+
+def test_turns_are_validated_against_queued_direction():
+    queue = the_snake.InputQueue(size=2)
+    right, up = snake_engine.RIGHT, snake_engine.UP
+
+    assert not queue.push_turn(snake_engine.LEFT, right)
+    assert queue.push_turn(up, right)
+    assert not queue.push_turn(snake_engine.DOWN, right)
+    assert not queue.push_turn(up, right)
+    assert queue.push_turn(snake_engine.LEFT, right)
+    assert not queue.push_turn(snake_engine.DOWN, right)
+    assert [queue.pop_turn(), queue.pop_turn()] == [up, snake_engine.LEFT]
+
+
+def test_input_queue_filters_events_and_flags_quit():
+    pg = the_snake.pg
+    queue = the_snake.InputQueue()
+    queue.filter_events()
+    try:
+        pg.event.clear()
+        pg.event.post(pg.event.Event(pg.MOUSEMOTION, pos=(0, 0)))
+        _press(pg.K_SPACE, pg.K_ESCAPE)
+        queue.poll()
+
+        assert queue.pop_keys() == [pg.K_SPACE]
+        assert queue.pop_quit()
+        assert not queue.pop_quit()
+        assert not queue.pop_exposed()
+    finally:
+        pg.event.set_allowed(None)
+
+
+def test_contexts_draw_independent_games():
+    first, second = the_snake.GameContext(), the_snake.GameContext()
+    first_state = snake_engine.GameState(seed=1)
+    second_state = snake_engine.GameState(seed=2)
+
+    the_snake.render_game(first, first_state)
+    the_snake.render_game(second, second_state)
+    first.game.menu_down()
+    the_snake.draw_menu(first, force=True)
+    the_snake.draw_menu(second, force=True)
+
+    assert second.game.menu_title() == 'Новая игра'
+    assert first.game.menu_title() == 'Продолжить'
+    assert the_snake.pg.image.tobytes(first.screen, 'RGB') != (
+        the_snake.pg.image.tobytes(second.screen, 'RGB')
+    )
+    assert the_snake.draw_menu(first) == the_snake.draw_menu(second) == []
+
+
+def test_exposed_window_is_redrawn_in_full():
+    pg = the_snake.pg
+    context = the_snake.GameContext()
+    state = snake_engine.GameState(seed=1)
+    recorder = the_snake.ReplayRecorder(state)
+    context.input_queue.filter_events()
+    try:
+        pg.event.clear()
+        the_snake.menu_frame(context, state, recorder, True)
+        assert the_snake.menu_frame(context, state, recorder, False) == []
+
+        pg.event.post(pg.event.Event(pg.WINDOWEXPOSED))
+        assert the_snake.menu_frame(context, state, recorder, False) == [
+            context.screen.get_rect()
+        ]
+    finally:
+        pg.event.set_allowed(None)
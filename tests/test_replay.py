@@ -0,0 +1,60 @@
+import random
+
+import snake_engine
+import snake_replay
+
+
+def _snapshot(state):
+    return (
+        list(state.snake.positions),
+        [obstacle.position for obstacle in state.obstacles],
+        state.stats.eaten_apples,
+        state.stats.reset_count,
+    )
+
+
+def test_seed_reproduces_placement():
+    first = snake_engine.GameState(seed=5)
+    second = snake_engine.GameState(seed=5)
+
+    assert _snapshot(first) == _snapshot(second)
+
+    second.reset(new_game=True)
+
+    assert second.seed != 5
+
+
+def test_replay_reproduces_game():
+    state = snake_engine.GameState(seed=11)
+    recorder = snake_replay.ReplayRecorder(state)
+    turns = random.Random(1)
+    for tick in range(3000):
+        action = turns.choice(
+            (None, None, None, *snake_engine.OPPOSITE)
+        )
+        if tick % 7:
+            recorder.step(state, action)
+        else:
+            state.snake.update_direction(action or snake_engine.UP)
+            recorder.step(state)
+
+    data = recorder.to_bytes()
+
+    assert state.stats.reset_count > 0
+    assert len(data) < snake_replay.REPLAY_HEADER.size + 3000 // 4
+    assert _snapshot(snake_replay.replay(data)) == _snapshot(state)
+
+
+def test_replay_iterates_events(tmp_path):
+    state = snake_engine.GameState(seed=3)
+    recorder = snake_replay.ReplayRecorder(state)
+    events = [recorder.step(state)[1] for _ in range(50)]
+    path = tmp_path / f'game{snake_replay.REPLAY_SUFFIX}'
+    recorder.save(path)
+
+    replayed = snake_replay.replay_state(path.read_bytes())
+
+    assert list(
+        snake_replay.iter_replay(replayed, path.read_bytes())
+    ) == events
+    assert _snapshot(snake_replay.load_replay(path)) == _snapshot(state)
@@ -0,0 +1,83 @@
+import snake_scores
+import the_snake
+
+
+def test_writer_batches_and_pages_are_ranked(tmp_path):
+    path = tmp_path / 'scores.db'
+    writer = snake_scores.ScoreWriter(path, batch_size=4)
+    for index in range(25):
+        writer.submit(index % 7, index, 0, 1.5)
+    writer.close()
+
+    pages = snake_scores.ScorePages(snake_scores.open_scores(path), size=10)
+    pages.first()
+    seen = []
+    while True:
+        seen.extend(pages.rows)
+        if not pages.next():
+            break
+
+    assert pages.number == 2 and not pages.has_next
+    assert len(seen) == 25
+    keys = [(score.length, score.eaten_apples) for score in seen]
+    assert keys == sorted(keys, reverse=True)
+    assert pages.previous() and pages.rank(0) == 11
+    assert pages.rows == seen[10:20]
+
+
+def test_rank_queries_use_index(tmp_path):
+    connection = snake_scores.open_scores(tmp_path / 'scores.db')
+    query = snake_scores.SELECT_SCORES + snake_scores.SCORES_AFTER + (
+        snake_scores.SCORES_ORDER
+    )
+
+    plan = ' '.join(row[-1] for row in connection.execute(
+        'EXPLAIN QUERY PLAN ' + query, (5, 5, 5, 11)
+    ))
+
+    assert 'scores_rank' in plan
+    assert 'TEMP B-TREE' not in plan
+
+
+def test_leaderboard_menu_records_finished_game(tmp_path):
+    context = the_snake.GameContext()
+    leaderboard = context.leaderboard
+    game = the_snake.GameManager()
+    game.update_snake_length(4)
+    game.update_snake_length(2)
+    game.update_duration(3)
+    leaderboard.connect(str(tmp_path / 'scores.db'))
+    try:
+        leaderboard.submit(game)
+        leaderboard.submit(the_snake.GameManager())
+        leaderboard.disconnect()
+        leaderboard.connect(str(tmp_path / 'scores.db'))
+        leaderboard.open()
+
+        assert leaderboard.pop_redraw()
+        assert the_snake.draw_scores(context, True) == [
+            context.screen.get_rect()
+        ]
+        assert [score[:4] for score in leaderboard.pages.rows] == [
+            (4, 0, 0, 3)
+        ]
+    finally:
+        leaderboard.close()
+        leaderboard.disconnect()
+
+
+def test_restored_game_keeps_best_length_and_duration(tmp_path,
+                                                      monkeypatch):
+    monkeypatch.setattr(the_snake, 'SNAPSHOT_PATH', str(tmp_path / 'g.snks'))
+    context = the_snake.GameContext()
+    state = the_snake.load_game(context)
+    context.game.update_snake_length(7)
+    context.game.update_duration(40)
+    context.game.new_game = False
+    the_snake.save_game(context, state)
+
+    restored = the_snake.GameContext()
+    the_snake.load_game(restored)
+
+    assert not restored.game.new_game
+    assert (restored.game.best_length, restored.game.duration) == (7, 40)
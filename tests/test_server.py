@@ -0,0 +1,105 @@
+import asyncio
+
+import snake_batch
+import snake_engine
+import snake_server
+
+
+class _Transport:
+    def __init__(self):
+        self.buffered = 0
+
+    def get_write_buffer_size(self):
+        return self.buffered
+
+
+class _Writer:
+    def __init__(self):
+        self.transport = _Transport()
+        self.frames = []
+
+    def write(self, data):
+        self.frames.append(data)
+
+
+def _apply(board, records):
+    for x, y, code, player in records:
+        if code == snake_batch.CELL_EMPTY:
+            board.pop((x, y), None)
+        else:
+            board[(x, y)] = (code, player)
+
+
+def test_clients_track_board_on_loopback():
+    async def play():
+        server = snake_server.GameServer(seed=1)
+        listener = await server.start(port=0)
+        port = listener.sockets[0].getsockname()[1]
+        clients = []
+        for _ in range(3):
+            reader, writer = await asyncio.open_connection(
+                snake_server.SERVER_HOST, port
+            )
+            player, width, height = await snake_server.read_welcome(reader)
+            kind, _, records = await snake_server.read_frame(reader)
+            assert kind == snake_server.MESSAGE_FULL
+            board = {}
+            _apply(board, records)
+            clients.append((reader, writer, board))
+        assert (width, height) == (
+            snake_engine.GRID_WIDTH, snake_engine.GRID_HEIGHT
+        )
+        assert player == len(server.arena.snakes) == 3
+
+        for index, (_, writer, _) in enumerate(clients):
+            writer.write(bytes([index]))
+            await writer.drain()
+        await asyncio.sleep(0.05)
+        ticks = 100
+        for _ in range(ticks):
+            server.tick()
+
+        for reader, _, board in clients:
+            for tick in range(1, ticks + 1):
+                kind, frame_tick, records = await snake_server.read_frame(
+                    reader
+                )
+                assert (kind, frame_tick) == (
+                    snake_server.MESSAGE_DELTA, tick
+                )
+                assert len(records) < 20
+                _apply(board, records)
+        expected = {}
+        frame = snake_server.full_frame(server.arena, ticks)
+        _apply(expected, snake_server.CELL_RECORD.iter_unpack(
+            frame[snake_server.FRAME_HEADER.size:]
+        ))
+        for _, writer, board in clients:
+            assert board == expected
+            writer.close()
+        await asyncio.sleep(0.05)
+        assert server.arena.snakes == server.arena.owners == {}
+        listener.close()
+        await listener.wait_closed()
+
+    asyncio.run(play())
+
+
+def test_lagging_client_gets_full_frame():
+    server = snake_server.GameServer(seed=2)
+    writer = _Writer()
+    player = server.arena.add_player()
+    server.connections[player] = snake_server.Connection(player, writer)
+
+    server.tick()
+    writer.transport.buffered = snake_server.SEND_BUFFER_LIMIT + 1
+    server.tick()
+    server.tick()
+    writer.transport.buffered = 0
+    server.tick()
+
+    kinds = [snake_server.FRAME_HEADER.unpack_from(frame)[:2]
+             for frame in writer.frames]
+    assert kinds == [
+        (snake_server.MESSAGE_DELTA, 1), (snake_server.MESSAGE_FULL, 4)
+    ]
@@ -0,0 +1,87 @@
+import pytest
+
+import snake_engine
+import snake_snapshot
+
+
+def _played_state(ticks=500):
+    state = snake_engine.GameState(seed=4)
+    turns = (snake_engine.UP, snake_engine.LEFT)
+    for tick in range(ticks):
+        snake_engine.step(state, turns[tick % 2])
+    return state
+
+
+def test_snapshot_round_trip(tmp_path):
+    state = _played_state()
+    state.stats.update_duration(12.5)
+    path = tmp_path / 'game.snks'
+    snake_snapshot.save_snapshot(state, path)
+    stats = snake_engine.GameStats()
+
+    restored = snake_snapshot.load_snapshot(path, stats)
+
+    assert restored.stats is stats
+    assert restored.restored
+    assert list(restored.snake.positions) == list(state.snake.positions)
+    assert restored.snake.direction == state.snake.direction
+    assert [
+        (obstacle.name, obstacle.position, getattr(obstacle, 'weight', 0))
+        for obstacle in restored.obstacles
+    ] == [
+        (obstacle.name, obstacle.position, getattr(obstacle, 'weight', 0))
+        for obstacle in state.obstacles
+    ]
+    assert (stats.snake_length, stats.eaten_apples, stats.reset_count,
+            stats.best_length, stats.duration) == (
+        state.stats.snake_length, state.stats.eaten_apples,
+        state.stats.reset_count, state.stats.best_length, 12.5
+    )
+    assert stats.best_length > stats.snake_length
+    assert set(restored.free_cells) == set(state.free_cells)
+    assert restored.free_cells.object_at(
+        state.obstacles[0].position
+    ) is restored.obstacles[0]
+
+
+def test_long_snake_on_huge_board(tmp_path):
+    size = 2000 * snake_engine.GRID_SIZE
+    state = snake_engine.GameState(width=size, height=size, seed=1)
+    state.snake.set_body(
+        (x * snake_engine.GRID_SIZE, y * snake_engine.GRID_SIZE)
+        for y in range(20) for x in range(2000)
+    )
+    path = tmp_path / 'game.snks'
+    snake_snapshot.save_snapshot(state, path)
+
+    restored = snake_snapshot.load_snapshot(path)
+
+    assert restored.snake.length == 40000
+    assert len(restored.free_cells) == len(state.free_cells)
+    assert restored.snake.occupies(state.snake.positions[-1])
+
+
+def test_damaged_snapshot_is_rejected(tmp_path):
+    data = snake_snapshot.snapshot_bytes(_played_state(10))
+    bad_kind = bytearray(data)
+    bad_kind[-8] = len(snake_engine.KIND_NAMES)
+    bad_direction = bytearray(data)
+    bad_direction[24] = 2
+    segments = snake_snapshot.SNAPSHOT_HEADER.size + (
+        snake_snapshot.RNG_STATE_SIZE * snake_snapshot.NUMBER_SIZE
+    )
+    off_grid = bytearray(data)
+    off_grid[segments] += 5
+    off_board = bytearray(data)
+    off_board[-13] = 1
+    path = tmp_path / 'game.snks'
+
+    with pytest.raises(ValueError):
+        snake_snapshot.restore(data[:-4])
+    with pytest.raises(ValueError):
+        snake_snapshot.restore(b'SNKR' + data[4:])
+    for damaged in (data[:-4], bad_kind, bad_direction, off_grid,
+                    off_board):
+        path.write_bytes(damaged)
+        with pytest.raises(ValueError):
+            snake_snapshot.load_snapshot(path)
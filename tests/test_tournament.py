@@ -0,0 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import snake_tournament
+
+
+def test_games_are_reproducible():
+    first = snake_tournament.play_game(3, 'greedy', 200)
+
+    assert snake_tournament.play_game(3, 'greedy', 200) == first
+    assert first.eaten_apples > 0
+
+
+def test_pool_matches_single_process():
+    kwargs = {'games': 6, 'ticks': 100, 'bot': 'random', 'chunk_size': 2}
+
+    summary = snake_tournament.run_tournament(workers=2, **kwargs)
+
+    assert summary == snake_tournament.run_tournament(workers=0, **kwargs)
+    assert summary['games'] == 6
+
+
+def test_threads_match_sequential_games():
+    seeds = range(8)
+    sequential = [snake_tournament.play_game(seed, 'random', 150)
+                  for seed in seeds]
+
+    with ThreadPoolExecutor(4) as pool:
+        threaded = list(pool.map(
+            lambda seed: snake_tournament.play_game(seed, 'random', 150),
+            seeds
+        ))
+
+    assert threaded == sequential
@@ -23,257 +23,151 @@
 Реализация игры:
     - Игра реализована с помощью библиотеки { pygame }.
     - В игре реализовано 'игровое меню' позволяющее: начать 'Новую игру',
-    'Продолжить' текущюю или 'Выйти' из игры.
+    'Продолжить' текущюю, посмотреть 'Рейтинги' или 'Выйти' из игры.
     - Все настройки игры осуществляются через блок констант.
+    - Игровые объекты и правила находятся в ядре { snake_engine }, которое
+    не зависит от { pygame }. Этот модуль - клиент ядра: он рисует игру,
+    обрабатывает клавиши и вызывает { step } для каждого игрового хода.
 """
-from random import choice, randint
-from typing import Optional
-from time import time
+from collections import deque
+from pathlib import Path
+from random import Random
+from typing import Iterator, Optional
 
 import pygame as pg
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from snake_autopilot import Autopilot
+from snake_profiler import TICK_PHASE, FrameProfiler
+from snake_replay import REPLAY_SUFFIX, ReplayRecorder
+from snake_scores import ScorePages, ScoreWriter, open_scores
+from snake_snapshot import load_snapshot, save_snapshot
+from snake_engine import (  # noqa: F401
+    DOWN, GRID_HEIGHT, GRID_SIZE, GRID_WIDTH, LEFT, MAX_CATCH_UP_TICKS,
+    MIDDLE_SCREEN, OPPOSITE, RIGHT, SCREEN_HEIGHT, SCREEN_WIDTH, SNAKE_COLOR,
+    TICK_RATE, UP, Apple, FixedTimestep, FreeCells, GameObject, GameState,
+    GameStats, Snake, Stone, step
+)
+
 pg.init()
-"""Настройки экрана, игорового поля и меню."""
-SCREEN_WIDTH, SCREEN_HEIGHT = 640, 480
+"""Настройки экрана и меню."""
 MENU_WIDTH, MENU_HEIGHT = 200, 200
 TITLE_MENU_WIDTH, TITLE_MENU_HEIGHT = MENU_WIDTH, 50
-MIDDLE_SCREEN = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
-GRID_SIZE = 20
 MENU_FONT_SIZE = 35
 TITLE_FONT_SIZE = 60
-GRID_WIDTH = SCREEN_WIDTH // GRID_SIZE
-GRID_HEIGHT = SCREEN_HEIGHT // GRID_SIZE
-FIELD_SIZE = GRID_WIDTH * GRID_HEIGHT
-FIELD_CELLS = set(
-    (x * GRID_SIZE, y * GRID_SIZE)
-    for x in range(GRID_WIDTH)
-    for y in range(GRID_HEIGHT)
-)
 NOISE_SIZE = 5
 NOISE_STRENGTH = 4
-"""Направления движения змейки."""
-UP = (0, -1)
-DOWN = (0, 1)
-LEFT = (-1, 0)
-RIGHT = (1, 0)
-"""Цвета объектов и игрового поля."""
+"""Текстура фона: зерно генератора шума ({None} - случайная текстура)
+и каталог кэша. Кэш используется только для текстур с заданным зерном.
+"""
+TEXTURE_SEED: Optional[int] = None
+TEXTURE_CACHE_DIR: Optional[str] = None
+"""Цвета игрового поля и меню."""
 BOARD_BACKGROUND_COLOR = (181, 130, 81)
 BORDER_COLOR = (93, 216, 228)
 MAIN_MENU_COLOR = (200, 200, 200)
 MENU_BORDER_COLOR = (25, 25, 25)
-APPLE_COLOR = (255, 0, 0)
-BAD_APPLE_COLOR = (255, 100, 55)
-SNAKE_COLOR = (0, 255, 0)
-STONE_COLOR = (107, 99, 92)
-DEFAULT_COLOR = (0, 0, 0)
-"""Управление скорость и замедлением игры."""
+"""Частота кадров. Частота игровых ходов { TICK_RATE } от кадров не
+зависит и задана в ядре.
+"""
 GAME_SPEED = 60
-SLOW_SPEED = 10
-"""Количество игровых объектов на поле."""
-DEFAULT_COUNT_APPLES = 20
-DEFAULT_COUNT_BAD_APPLES = 20
-DEFAULT_COUNT_STONES = 20
-DEFAULT_STONE_WEIGHT = 5
+"""Перерисовывать только изменившиеся клетки вместо всего экрана."""
+DIRTY_RENDERING = True
+"""Размер игрового поля в клетках. Поле может быть больше экрана
+(например, 2000 x 2000 клеток): тогда камера следует за головой змейки,
+а рисуются только клетки в окне просмотра.
+"""
+BOARD_GRID_WIDTH, BOARD_GRID_HEIGHT = GRID_WIDTH, GRID_HEIGHT
+"""Профилирование кадров: показ перцентилей фаз поверх игры (обновляется
+раз в {OVERLAY_PERIOD} кадров) и файл для записи кадров в формате JSONL.
+"""
+SHOW_PROFILER_OVERLAY = False
+OVERLAY_PERIOD = 30
+OVERLAY_FONT_SIZE = 18
+PROFILE_DUMP_PATH: Optional[str] = None
+"""Каталог, в который сохраняется повтор каждой сыгранной игры
+({None} - повторы не сохраняются), см. { snake_replay }.
+"""
+REPLAY_DIR: Optional[str] = None
+"""Файл снимка незавершённой игры ({None} - снимки не сохраняются).
+Снимок сохраняется при выходе в меню и из игры, а также раз в
+{SNAPSHOT_PERIOD} ходов. После перезапуска игру из снимка можно
+продолжить пунктом меню 'Продолжить'.
+"""
+SNAPSHOT_PATH: Optional[str] = None
+SNAPSHOT_PERIOD = 100
+"""База рейтингов ({None} - результаты не сохраняются), см.
+{ snake_scores }. Результат записывается, когда игра заканчивается:
+при начале новой игры и при выходе, если игра не сохраняется снимком
+для продолжения. Размер окна рейтингов.
+"""
+SCORES_PATH: Optional[str] = None
+SCORES_WIDTH, SCORES_HEIGHT = 360, 280
+"""Демо-режим: змейкой управляет автопилот { snake_autopilot } вместо
+клавиш, поле расстояний чинится не больше {AUTOPILOT_BUDGET} клеток за
+ход.
+"""
+AUTOPILOT = False
+AUTOPILOT_BUDGET = 1024
 """Клавиши."""
 KEY_ENTER = 13
+MENU_SELECT_KEYS = (KEY_ENTER, pg.K_KP_ENTER)
+KEY_DIRECTIONS = {
+    pg.K_UP: UP,
+    pg.K_DOWN: DOWN,
+    pg.K_LEFT: LEFT,
+    pg.K_RIGHT: RIGHT,
+}
+"""Сколько поворотов змейки запоминается до следующих ходов и какие
+события pygame принимаются (остальные отбрасываются ещё в SDL). После
+событий {EXPOSE_EVENTS} окно перерисовывается целиком: перерисовка
+только изменившихся клеток не восстановит закрытую часть окна.
+"""
+TURN_BUFFER_SIZE = 3
+INPUT_EVENTS = (pg.QUIT, pg.KEYDOWN)
+EXPOSE_EVENTS = (pg.WINDOWEXPOSED, pg.VIDEOEXPOSE)
 """Основной эран игры."""
 screen = pg.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), 0, 32)
-"""Меню игры."""
-main_menu = pg.Surface((MENU_WIDTH, MENU_HEIGHT))
-main_menu_rect = main_menu.get_rect(center=MIDDLE_SCREEN)
-"""    """
-title_menu = pg.Surface((TITLE_MENU_WIDTH, TITLE_MENU_HEIGHT))
-title_menu_rect = main_menu.get_rect(
-    center=(SCREEN_WIDTH // 2, main_menu_rect.y + TITLE_MENU_HEIGHT)
+"""Положение меню и заголовка меню на экране."""
+main_menu_rect = pg.Rect(0, 0, MENU_WIDTH, MENU_HEIGHT)
+main_menu_rect.center = MIDDLE_SCREEN
+title_menu_rect = pg.Rect(0, 0, MENU_WIDTH, MENU_HEIGHT)
+title_menu_rect.center = (
+    SCREEN_WIDTH // 2, main_menu_rect.y + TITLE_MENU_HEIGHT
 )
-"""Оюъект в котором будет хранится фон для игры."""
-background_surface = pg.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-"""Создание фона для созданиея на ней текстуры (например песка)."""
-background_surface.fill(BOARD_BACKGROUND_COLOR)
-"""Отрисовка фона на экране"""
-screen.blit(background_surface, (0, 0))
-"""Создаем объект для управления заголовком игры."""
-game_caption = pg.display.set_caption
-game_caption('Змейка')
+"""Задаём заголовок окна игры."""
+pg.display.set_caption('Змейка')
 """Создаем объект текст."""
 menu_font = pg.font.Font(None, MENU_FONT_SIZE)
 title_font = pg.font.Font(None, TITLE_FONT_SIZE)
+overlay_font = pg.font.Font(None, OVERLAY_FONT_SIZE)
 """Объект для управления временем."""
 clock = pg.time.Clock()
+"""Кэш спрайтов клеток по ключу (цвет, без рамки). Спрайт не меняется
+после создания, поэтому кэш общий для всех контекстов игры.
+"""
+cell_sprites: dict[tuple[tuple[int, int, int], bool], pg.Surface] = {}
 
 
-class GameObject():
-    """Базовый класс от которого наследуются все игровые объекты."""
-
-    def __init__(self,
-                 body_color: tuple[int, int, int] = DEFAULT_COLOR,
-                 name: Optional[str] = None) -> None:
-        """Инициализирует новый экземпляр класса {GameObject}."""
-        self.position: tuple[int, int] = MIDDLE_SCREEN
-        self.body_color = body_color
-        self.name = name or str(type(self).__name__).lower()
-
-    def draw(self) -> None:
-        """Базовый метод рисования объектов. Определяется для
-        каждого подкласса отдельно.
-        """
-
-    def draw_cell(self, position: tuple[int, int],
-                  color: Optional[tuple[int, int, int]] = None,
-                  tail: bool = False) -> None:
-        """Отрисовывает ячейку заданых размеров."""
-        color = color or self.body_color
-
-        rect = pg.Rect(
-            position,
-            (GRID_SIZE, GRID_SIZE)
-        )
-        pg.draw.rect(screen, color, rect)
-        if not tail:
-            pg.draw.rect(screen, BORDER_COLOR, rect, 1)
-
-    def randomize_position(self,
-                           used_cells: list[tuple[int, int]] = []) -> None:
-        """Задаёт объекту случайные координаты."""
-        self.position = choice(tuple(FIELD_CELLS - set(used_cells)))
-
-
-class Apple(GameObject):
-    """Класс описывающий игровой объект Яблоко."""
-
-    def __init__(self,
-                 body_color: tuple[int, int, int] = APPLE_COLOR,
-                 used_cells: list = [],
-                 name: Optional[str] = None) -> None:
-        """Инициализирует экземпляр класса {Apple}."""
-        super().__init__(body_color, name)
-        self.randomize_position(used_cells)
-
-    def draw(self) -> None:
-        """Рисует объект на экране."""
-        self.draw_cell(self.position)
-
-
-class Stone(GameObject):
-    """Класс описывающий игровой объект Камень."""
-
-    def __init__(self,
-                 body_color: tuple[int, int, int] = STONE_COLOR,
-                 used_cells: list = [],
-                 weight: int = DEFAULT_STONE_WEIGHT) -> None:
-        """Инициализирует экземпляр класса."""
-        super().__init__(body_color)
-        self.randomize_position(used_cells)
-        self.weight = weight
-
-    def draw(self) -> None:
-        """Рисует объет на экране."""
-        self.draw_cell(self.position)
-
-    def get_trace(self, direction: tuple[int, int]) -> list[tuple[int, int]]:
-        """Возвращает след по которому пролетит камень."""
-        pos_x, pos_y = self.position
-        length = self.weight
-        new_x, new_y = (GRID_SIZE * direction[0], GRID_SIZE * direction[1])
-
-        return [
-            (pos_x + new_x * step, pos_y + new_y * step)
-            for step in range(length)
-        ]
-
-    def move(self, new_position: tuple[int, int]) -> None:
-        """Сдивгает камень в новую позицию."""
-        self.position = new_position
-
-
-class Snake(GameObject):
-    """Класс описывающий игровой объект 'Змейка'."""
-
-    def __init__(self,
-                 body_color: tuple[int, int, int] = SNAKE_COLOR) -> None:
-        """Инициализирует экземпляр класса {Snake}."""
-        super().__init__(body_color)
-        self.reset()
-        self.direction: tuple[int, int] = RIGHT
-
-    def reset(self) -> None:
-        """Сбрасывает змейку в начальное состояние."""
-        self.positions = [self.position]
-        self.length = 1
-        self.last: Optional[tuple[int, int]] = None
-        self.direction = choice([RIGHT, LEFT, UP, DOWN])
-
-    def update_direction(self, direction: tuple[int, int]) -> None:
-        """Обновляет направление движения змейки."""
-        self.direction = direction
-
-    def new_head(self) -> tuple[int, int]:
-        """Возвращает координаты новой головы."""
-        pos_x, pos_y = self.get_head_position()
-        return (
-            (pos_x + self.direction[0] * GRID_SIZE) % SCREEN_WIDTH,
-            (pos_y + self.direction[1] * GRID_SIZE) % SCREEN_HEIGHT
-        )
-
-    def grow_up(self, new_segment: tuple[int, int]) -> None:
-        """Увиличивает змейку на один сегмент."""
-        self.positions.insert(0, new_segment)
-        self.update_size_info()
-
-    def cut_tail(self) -> None:
-        """Уменьшает змейку на один сегмент с конца."""
-        self.positions.pop()
-        self.update_size_info()
-
-    def update_size_info(self) -> None:
-        """Обновляет информацию о размере змейки."""
-        self.length = len(self.positions)
-        game.update_snake_length(self.length)
-
-    def get_head_position(self) -> tuple[int, int]:
-        """Возвращает позицию головы змейки."""
-        return self.positions[0]
-
-    def draw(self) -> None:
-        """Отрисовывает змейку на экране и если {last} содержит
-        координаты старого сегмента, затирает его.
-        """
-        for position in self.positions:
-            self.draw_cell(position, SNAKE_COLOR)
-
-        if self.last:
-            self.draw_cell(self.last, BOARD_BACKGROUND_COLOR, True)
-
-    def move(self, new_head: tuple[int, int]) -> None:
-        """Сдвигает змейку на одну клетку игрового поля."""
-        self.positions.insert(0, new_head)
-        self.last = self.positions.pop()
-
-    def can_bite_itself(self, new_head: tuple[int, int]) -> bool:
-        """Проверяет может ли следующим ходом змейка укусить сама себя."""
-        return new_head in self.positions
-
-    def try_bite(self, new_head: tuple[int, int], object: GameObject) -> bool:
-        """Принимает на вход объект и проверяет можно ли его укусить."""
-        return object.position == new_head
-
-
-class GameManager():
-    """Класс для управления общей логикой игры."""
+class GameManager(GameStats):
+    """Класс для управления общей логикой игры. Счётчики игры
+    наследуются от { GameStats } ядра и обновляются правилами игры.
+    """
 
     def __init__(self) -> None:
         """Инициализирует экземпляр класса
         и базовые атрибуты.
         """
-        self.reset: bool = False
+        super().__init__()
         self.new_game: bool = True
         self.__game_is_run: bool = False
-        self.__slow_count: int = 0
-        self.__snake_length: int = 1
         self.__snake_speed: float = 0
-        self.__start_time: Optional[float] = None
-        self.__eaten_apples: int = 0
-        self.__reset_count: int = 0
+        self.__info_key: Optional[tuple] = None
+        self.__info: str = ''
         self.__status_menu: bool = True
         self.__menu_value: int = 0
         self.__menu_sections: list = [
@@ -333,271 +227,656 @@ class GameManager():
         """Возвращает списо из пунктов меню."""
         return self.__menu_sections
 
-    def slow_mode(self, how_slow: int = SLOW_SPEED) -> bool:
-        """Возвращает {False} пока действует замедление для выбранного
-        блока кода, и {True} в момент когда код должен быть выполнен.
-        Работает по принципу пропуска кадров, количество пропущенных
-        кадров по умолчанию = {SLOW_SPEED}. Чем больше значение
-        тем сильнее замедление.
+    def update_snake_speed(self, tick_interval: Optional[float]) -> None:
+        """Обновляет скорость движения змейки по интервалу между ходами
+        в секундах (медиане по профилировщику кадров).
+        """
+        if tick_interval:
+            self.__snake_speed = round(60 / tick_interval)
+
+    def info(self) -> str:
+        """Выводит информацию об игре. Строка собирается заново только
+        при изменении счётчиков.
         """
-        self.__slow_count += 1
-        if self.__slow_count > how_slow:
-            self.__slow_count = 0
+        key = (self.snake_length, self.eaten_apples, self.reset_count,
+               self.__snake_speed)
+        if key != self.__info_key:
+            self.__info_key = key
+            self.__info = (
+                f'Длина змейки: {self.snake_length} || '
+                f'Яблок съедено: {self.eaten_apples} || '
+                f'Врезаний: {self.reset_count} || '
+                f'Скорость {self.__snake_speed} клеток в минуту!'
+            )
+        return self.__info
 
-        return self.__slow_count == how_slow
+    def over(self) -> None:
+        """Реализует логику при проигрыше"""
+        pass
 
-    def update_snake_speed(self, end_time: float) -> None:
-        """Обновляет скорость движения змейки."""
-        if self.__start_time:
-            self.__snake_speed = round(60 / (end_time - self.__start_time))
 
-        self.__start_time = end_time
+class TextCache():
+    """Кэш текстового слоя: отрисованные надписи, текущий заголовок
+    окна и состояние, для которого последний раз рисовалось меню.
+    """
 
-    def update_eaten_apples(self) -> None:
-        """Обновляет количество съеденных яблок."""
-        self.__eaten_apples += 1
+    def __init__(self) -> None:
+        """Инициализирует пустой кэш."""
+        self.menu_key: Optional[tuple] = None
+        self.overlay: Optional[pg.Surface] = None
+        self.__caption: Optional[str] = None
+        self.__surfaces: dict[tuple, pg.Surface] = {}
+
+    def render(self, font: pg.font.Font, text: str,
+               color: str) -> pg.Surface:
+        """Возвращает надпись, отрисовывая её только при первом запросе."""
+        key = (font, text, color)
+        surface = self.__surfaces.get(key)
+        if surface is None:
+            surface = font.render(text, True, color)
+            self.__surfaces[key] = surface
+
+        return surface
+
+    def caption(self, text: str) -> None:
+        """Обновляет заголовок окна, только если текст изменился."""
+        if text != self.__caption:
+            self.__caption = text
+            pg.display.set_caption(text)
+
+
+class Leaderboard():
+    """Пункт меню 'Рейтинги': запись результатов игр и постраничный
+    просмотр таблицы рейтингов { snake_scores }. Без базы
+    {SCORES_PATH} таблица пуста.
+    """
 
-    def update_count_of_resets(self) -> None:
-        """Обновляет количество врезаний в препятствие."""
-        self.__reset_count += 1
+    def __init__(self) -> None:
+        """Создаёт закрытую таблицу без базы."""
+        self.is_open: bool = False
+        self.redraw: bool = False
+        self.pages: Optional[ScorePages] = None
+        self.__writer: Optional[ScoreWriter] = None
+
+    def connect(self, path: Optional[str]) -> None:
+        """Открывает базу рейтингов {path} и запускает поток записи."""
+        if path is None:
+            return
+        self.__writer = ScoreWriter(path)
+        self.pages = ScorePages(open_scores(path))
+
+    def disconnect(self) -> None:
+        """Дописывает результаты из очереди и закрывает базу."""
+        if self.__writer is not None:
+            self.__writer.close()
+            self.__writer = None
+        if self.pages is not None:
+            self.pages.connection.close()
+            self.pages = None
+
+    def submit(self, stats: 'GameManager') -> None:
+        """Ставит в очередь записи результат игры, в которой был
+        сделан хотя бы один ход.
+        """
+        if self.__writer is not None and stats.duration:
+            self.__writer.submit(stats.best_length, stats.eaten_apples,
+                                 stats.reset_count, stats.duration)
+
+    def open(self) -> None:
+        """Показывает первую страницу рейтинга."""
+        self.is_open = self.redraw = True
+        if self.pages is not None:
+            self.pages.first()
+
+    def close(self) -> None:
+        """Возвращает к меню."""
+        self.is_open = False
+        self.redraw = True
+
+    def turn_page(self, forward: bool) -> None:
+        """Листает рейтинг вперёд или назад."""
+        if self.pages is not None and (
+                self.pages.next() if forward else self.pages.previous()):
+            self.redraw = True
+
+    def pop_redraw(self) -> bool:
+        """Возвращает и сбрасывает признак перерисовки экрана."""
+        redraw, self.redraw = self.redraw, False
+        return redraw
+
+
+class InputQueue():
+    """Очередь ввода, управляемая событиями pygame.
+
+    Нажатия клавиш читаются из очереди событий один раз за кадр и не
+    теряются между ходами: повороты змейки копятся в буфере (не больше
+    {size}) и применяются по одному на ход. Разворот проверяется
+    относительно последнего поворота в буфере, а не текущего направления
+    змейки, поэтому быстрый двойной поворот (например, вверх и налево
+    при движении направо) выполняется за два хода.
+    """
 
-    def update_snake_length(self, length: int) -> None:
-        """Обновляет значение длины зъмейки."""
-        self.__snake_length = length
+    def __init__(self, size: int = TURN_BUFFER_SIZE) -> None:
+        """Создаёт пустую очередь с буфером на {size} поворотов."""
+        self.size = size
+        self.quit: bool = False
+        self.exposed: bool = False
+        self.__keys: list[int] = []
+        self.__turns: deque[tuple[int, int]] = deque()
+
+    def filter_events(self) -> None:
+        """Оставляет в очереди событий pygame только {INPUT_EVENTS} и
+        {EXPOSE_EVENTS}.
+        """
+        pg.event.set_blocked(None)
+        pg.event.set_allowed(INPUT_EVENTS + EXPOSE_EVENTS)
 
-    def reset_info(self) -> None:
-        """Сбрасывает информаци о текущей игре."""
-        self.__snake_length = 1
-        self.__eaten_apples = 0
-        self.__reset_count = 0
+    def poll(self) -> None:
+        """Забирает события pygame. Закрытие окна и ESCAPE выставляют
+        флаг {quit}, события {EXPOSE_EVENTS} - флаг {exposed}, остальные
+        нажатия клавиш сохраняются по порядку.
+        """
+        for event in pg.event.get():
+            if event.type == pg.QUIT or (
+                    event.type == pg.KEYDOWN and event.key == pg.K_ESCAPE):
+                self.quit = True
+            elif event.type in EXPOSE_EVENTS:
+                self.exposed = True
+            elif event.type == pg.KEYDOWN:
+                self.__keys.append(event.key)
+
+    def pop_keys(self) -> list[int]:
+        """Возвращает клавиши, нажатые с прошлого вызова."""
+        keys, self.__keys = self.__keys, []
+        return keys
+
+    def pop_quit(self) -> bool:
+        """Возвращает и сбрасывает флаг {quit}."""
+        quit_requested, self.quit = self.quit, False
+        return quit_requested
+
+    def pop_exposed(self) -> bool:
+        """Возвращает и сбрасывает флаг {exposed}."""
+        exposed, self.exposed = self.exposed, False
+        return exposed
+
+    def push_turn(self, direction: tuple[int, int],
+                  current: tuple[int, int]) -> bool:
+        """Ставит поворот в буфер. Поворот сравнивается с последним
+        поворотом в буфере или с направлением {current}, если буфер пуст:
+        то же направление и разворот назад отбрасываются, как и повороты
+        сверх {size}. Возвращает {True}, если поворот принят.
+        """
+        last = self.__turns[-1] if self.__turns else current
+        if len(self.__turns) >= self.size or direction in (
+                last, OPPOSITE[last]):
+            return False
 
-    def info(self) -> str:
-        """Выводит информацию об игре."""
-        info = (
-            f'Длина змейки: {self.__snake_length} || '
-            f'Яблок съедено: {self.__eaten_apples} || '
-            f'Врезаний: {self.__reset_count} || '
-            f'Скорость {self.__snake_speed} клеток в минуту!'
-        )
-        return info
+        self.__turns.append(direction)
+        return True
 
-    def over(self) -> None:
-        """Реализует логику при проигрыше"""
-        pass
+    def pop_turn(self) -> Optional[tuple[int, int]]:
+        """Возвращает следующий поворот для хода или {None}."""
+        return self.__turns.popleft() if self.__turns else None
+
+    def clear(self) -> None:
+        """Забывает необработанные нажатия и повороты."""
+        self.__keys.clear()
+        self.__turns.clear()
 
 
-"""Инициализируем {GameManager} для возможнисти управлять всей логикой."""
-game = GameManager()
+class Camera():
+    """Окно просмотра размером с экран над игровым полем.
 
+    Смещение окна {offset} - координаты поля в левом верхнем углу экрана,
+    кратные размеру клетки. Поле замкнуто, поэтому окно у края поля
+    показывает клетки с противоположной стороны. Клетки в окне находятся
+    обращением к индексу поля по каждой клетке окна, так что стоимость
+    отрисовки зависит от размера экрана, а не поля.
+    """
+
+    def __init__(self, width: int = SCREEN_WIDTH,
+                 height: int = SCREEN_HEIGHT) -> None:
+        """Создаёт окно размером {width} x {height} пикселей."""
+        self.width = width
+        self.height = height
+        self.offset: tuple[int, int] = (0, 0)
+
+    def follow(self, target: tuple[int, int], field: FreeCells) -> bool:
+        """Ставит клетку {target} в центр окна. По оси, вдоль которой
+        поле помещается в окне, окно не сдвигается. Возвращает {True},
+        если окно сдвинулось.
+        """
+        offset = tuple(
+            0 if size <= view
+            else (pos - view // 2 // GRID_SIZE * GRID_SIZE) % size
+            for pos, view, size in zip(
+                target, (self.width, self.height), (field.width, field.height)
+            )
+        )
+        moved = offset != self.offset
+        self.offset = offset
+        return moved
+
+    def to_screen(self, cell: tuple[int, int],
+                  field: FreeCells) -> Optional[tuple[int, int]]:
+        """Возвращает координаты клетки поля на экране или {None}, если
+        клетка не попадает в окно.
+        """
+        pos_x = (cell[0] - self.offset[0]) % field.width
+        pos_y = (cell[1] - self.offset[1]) % field.height
+        if pos_x >= self.width or pos_y >= self.height:
+            return None
+        return pos_x, pos_y
+
+    def visible_cells(self, field: FreeCells
+                      ) -> Iterator[tuple[tuple[int, int], tuple[int, int]]]:
+        """Перебирает клетки окна: пары (клетка поля, позиция на экране)."""
+        offset_x, offset_y = self.offset
+        for pos_x in range(0, min(self.width, field.width), GRID_SIZE):
+            for pos_y in range(0, min(self.height, field.height), GRID_SIZE):
+                yield (
+                    field.wrap((offset_x + pos_x, offset_y + pos_y)),
+                    (pos_x, pos_y)
+                )
+
+
+class GameContext():
+    """Изменяемое состояние одного клиента игры.
+
+    Контекст объединяет счётчики и меню {game}, поверхность {screen}, на
+    которую рисуется игра, фон и поверхности меню, камеру, очередь
+    ввода, кэш текста, профилировщик, таблицу рейтингов и автопилот.
+    Функции ввода и отрисовки получают контекст явно, поэтому в одном
+    процессе можно вести несколько независимых игр, каждую на своей
+    поверхности. Общими остаются только настройки, шрифты и кэш
+    спрайтов клеток.
+    """
+
+    def __init__(self, surface: Optional[pg.Surface] = None,
+                 profile_path: Optional[str] = None) -> None:
+        """Создаёт контекст, который рисует на поверхность {surface}
+        (по умолчанию - на новую поверхность размером с экран) и пишет
+        кадры профилировщика в файл {profile_path}.
+        """
+        self.screen = surface if surface is not None else pg.Surface(
+            (SCREEN_WIDTH, SCREEN_HEIGHT)
+        )
+        self.game = GameManager()
+        self.background = pg.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.background.fill(BOARD_BACKGROUND_COLOR)
+        self.main_menu = pg.Surface((MENU_WIDTH, MENU_HEIGHT))
+        self.title_menu = pg.Surface((TITLE_MENU_WIDTH, TITLE_MENU_HEIGHT))
+        self.camera = Camera()
+        self.input_queue = InputQueue()
+        self.text_cache = TextCache()
+        self.profiler = FrameProfiler(dump_path=profile_path)
+        self.leaderboard = Leaderboard()
+        self.autopilot = Autopilot(AUTOPILOT_BUDGET)
+
+
+def generate_texture(width: int, height: int,
+                     seed: Optional[int] = None) -> 'np.ndarray':
+    """Возвращает массив пикселей текстуры формы (ширина, высота, 3).
+    Цвет всех плиток шума {NOISE_SIZE} x {NOISE_SIZE} генерируется
+    одной операцией, затем плитки растягиваются до размера в пикселях.
+    """
+    rng = np.random.default_rng(seed)
+    columns = -(-width // NOISE_SIZE)
+    rows = -(-height // NOISE_SIZE)
+    low = np.array(BOARD_BACKGROUND_COLOR) - NOISE_STRENGTH
+    tiles = rng.integers(
+        low, low + 2 * NOISE_STRENGTH + 1, size=(columns, rows, 3)
+    )
+    pixels = tiles.repeat(NOISE_SIZE, axis=0).repeat(NOISE_SIZE, axis=1)
+    return np.clip(pixels[:width, :height], 0, 255).astype(np.uint8)
+
+
+def load_texture(width: int, height: int,
+                 seed: Optional[int] = None) -> 'np.ndarray':
+    """Возвращает текстуру из кэша {TEXTURE_CACHE_DIR}, а если её там
+    нет - генерирует и сохраняет. Ключ кэша - размеры, параметры шума,
+    цвет фона и зерно генератора.
+    """
+    if TEXTURE_CACHE_DIR is None or seed is None:
+        return generate_texture(width, height, seed)
+
+    color = '-'.join(map(str, BOARD_BACKGROUND_COLOR))
+    path = Path(TEXTURE_CACHE_DIR) / (
+        f'texture_{width}x{height}_{NOISE_SIZE}_{NOISE_STRENGTH}'
+        f'_{color}_{seed}.npy'
+    )
+    if path.exists():
+        return np.load(path)
+
+    pixels = generate_texture(width, height, seed)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.save(path, pixels)
+    return pixels
+
+
+def draw_texture_on_background(context: GameContext) -> None:
+    """Рисует текстуру на фоне контекста. При наличии { numpy } текстура
+    записывается в поверхность одной операцией, иначе рисуется по
+    плиткам.
+    """
+    if np is not None:
+        pixels = load_texture(SCREEN_WIDTH, SCREEN_HEIGHT, TEXTURE_SEED)
+        pg.surfarray.blit_array(context.background, pixels)
+        return
 
-def draw_texture_on_background() -> None:
-    """Рисует текстуру на поверхности."""
     color = BOARD_BACKGROUND_COLOR
     noise = NOISE_STRENGTH
+    rng = Random(TEXTURE_SEED)
     for pos_x in range(0, SCREEN_WIDTH, NOISE_SIZE):
         for pos_y in range(0, SCREEN_HEIGHT, NOISE_SIZE):
             pg.draw.rect(
-                background_surface,
-                [randint(color[index] - noise, color[index] + noise)
+                context.background,
+                [rng.randint(color[index] - noise, color[index] + noise)
                  for index in range(3)],
                 (pos_x, pos_y, NOISE_SIZE, NOISE_SIZE)
             )
 
 
-def handle_keys(snake: Snake) -> None:
-    """Отслеживает нажатые клавиши для управления змейкой."""
-    keys = pg.key.get_pressed()
-    direction: Optional[tuple[int, int]] = None
-
-    if keys[pg.K_UP] and snake.direction != DOWN:
-        direction = UP
-    elif keys[pg.K_DOWN] and snake.direction != UP:
-        direction = DOWN
-    elif keys[pg.K_LEFT] and snake.direction != RIGHT:
-        direction = LEFT
-    elif keys[pg.K_RIGHT] and snake.direction != LEFT:
-        direction = RIGHT
-
-    if direction:
-        snake.update_direction(direction)
-
+def get_cell_sprite(color: tuple[int, int, int],
+                    tail: bool = False) -> pg.Surface:
+    """Возвращает заранее отрисованную клетку цвета {color} (с рамкой
+    {BORDER_COLOR}, если {tail} = {False}). Спрайт создаётся один раз
+    и хранится в {cell_sprites}.
+    """
+    key = (tuple(color), tail)
+    sprite = cell_sprites.get(key)
+    if sprite is None:
+        sprite = pg.Surface((GRID_SIZE, GRID_SIZE)).convert()
+        sprite.fill(color)
+        if not tail:
+            pg.draw.rect(sprite, BORDER_COLOR, sprite.get_rect(), 1)
+        cell_sprites[key] = sprite
 
-def handle_keys_menu() -> None:
-    """Отслеживает нажатые клавиши для управления в меню."""
-    keys = pg.key.get_pressed()
+    return sprite
 
-    if keys[KEY_ENTER] and game.menu_title() == 'Новая игра':
-        if game.new_game:
-            game.new_game = False
-        else:
-            game.reset = True
-        game.close_menu()
-    elif (keys[KEY_ENTER] and game.menu_title() == 'Продолжить'
-          and not game.new_game):
-        game.close_menu()
-    elif keys[KEY_ENTER] and game.menu_title() == 'Выход':
-        game.switch_off()
-        game.close_menu()
 
-    if game.slow_mode(1):
-        if keys[pg.K_UP]:
-            game.menu_up()
-        elif keys[pg.K_DOWN]:
-            game.menu_down()
+def get_cell_contents(state: GameState,
+                      cell: tuple[int, int]) -> Optional[pg.Surface]:
+    """Возвращает спрайт объекта в клетке поля или {None}, если клетка
+    пуста.
+    """
+    obstacle = state.free_cells.object_at(cell)
+    if obstacle is not None:
+        return get_cell_sprite(obstacle.body_color)
+    if state.snake.occupies(cell):
+        return get_cell_sprite(SNAKE_COLOR)
+    return None
 
 
-def quit_game() -> None:
-    """Завершает игру."""
-    pg.quit()
-    raise SystemExit
+def background_area(cell: tuple[int, int]) -> pg.Rect:
+    """Возвращает область фона под клеткой поля. Фон - текстура размером
+    с экран, повторённая по всему полю.
+    """
+    return pg.Rect(
+        (cell[0] % SCREEN_WIDTH, cell[1] % SCREEN_HEIGHT),
+        (GRID_SIZE, GRID_SIZE)
+    )
 
 
-def quit_pressed() -> bool:
-    """Реализует логику нажатия на клавишу ESCAPE."""
-    keys = pg.key.get_pressed()
-    for event in pg.event.get():
-        if event.type == pg.QUIT or keys[pg.K_ESCAPE]:
-            if game.new_game:
-                game.switch_off()
-            else:
-                return True
+def split_span(start: int, length: int,
+               period: int) -> list[tuple[int, int, int]]:
+    """Делит отрезок [{start}, {start} + {length}) замкнутой оси длиной
+    {period} на куски без перехода через край. Возвращает тройки
+    (начало на оси, сдвиг от начала отрезка, длина куска).
+    """
+    pieces = []
+    shift = 0
+    while shift < length:
+        pos = (start + shift) % period
+        piece = min(length - shift, period - pos)
+        pieces.append((pos, shift, piece))
+        shift += piece
+    return pieces
+
+
+def background_spans(offset: int, view: int, size: int,
+                     period: int) -> list[tuple[int, int, int]]:
+    """Делит окно по одной оси на куски, в которых фон непрерывен: по
+    краю поля длиной {size} и по краю текстуры длиной {period}.
+    Возвращает тройки (начало в текстуре, позиция на экране, длина).
+    """
+    return [
+        (texture_pos, screen_pos + shift, piece)
+        for world_pos, screen_pos, length in split_span(
+            offset, min(view, size), size
+        )
+        for texture_pos, shift, piece in split_span(
+            world_pos, length, period
+        )
+    ]
 
-    return False
 
+def background_blits(context: GameContext, field: FreeCells
+                     ) -> list[tuple[pg.Surface, tuple[int, int], pg.Rect]]:
+    """Возвращает вызовы отрисовки фона окна камеры: не больше четырёх
+    кусков текстуры по каждой оси, а если поле помещается на экране -
+    одну текстуру целиком.
+    """
+    camera = context.camera
+    return [
+        (context.background, (screen_x, screen_y),
+         pg.Rect(texture_x, texture_y, width, height))
+        for texture_x, screen_x, width in background_spans(
+            camera.offset[0], camera.width, field.width, SCREEN_WIDTH
+        )
+        for texture_y, screen_y, height in background_spans(
+            camera.offset[1], camera.height, field.height, SCREEN_HEIGHT
+        )
+    ]
 
-def get_good_apples(count: int = DEFAULT_COUNT_APPLES,
-                    used_cells: list = []) -> tuple[list, list]:
-    """Создает список хороших яблок. И возвращает его."""
-    apples = []
-    for _ in range(count):
-        apple = Apple(used_cells=used_cells)
-        apples.append(apple)
-        used_cells.append(apple.position)
 
-    return apples, used_cells
+def draw_game(context: GameContext, state: GameState) -> None:
+    """Отрисовывает фон и объекты в окне камеры. Объекты находятся
+    запросом к индексу поля по клеткам окна.
+    """
+    blits = []
+    for cell, position in context.camera.visible_cells(state.free_cells):
+        sprite = get_cell_contents(state, cell)
+        if sprite is not None:
+            blits.append((sprite, position))
 
+    context.screen.blits(background_blits(context, state.free_cells), False)
+    context.screen.blits(blits, False)
 
-def get_stones(count: int = DEFAULT_COUNT_STONES,
-               used_cells: list = []) -> tuple[list, list]:
-    """Создает список камней. И возвращает его."""
-    stones = []
-    for _ in range(count):
-        stone = Stone(used_cells=used_cells)
-        stones.append(stone)
-        used_cells.append(stone.position)
 
-    return stones, used_cells
+def draw_changed_cells(context: GameContext,
+                       state: GameState) -> list[pg.Rect]:
+    """Перерисовывает только клетки окна, изменившиеся с прошлого кадра:
+    под освободившимися клетками восстанавливается фон. Возвращает
+    области для { pg.display.update }.
+    """
+    rects = []
+    background = []
+    blits = []
+    for cell in state.free_cells.pop_changed():
+        position = context.camera.to_screen(cell, state.free_cells)
+        if position is None:
+            continue
+        rect = pg.Rect(position, (GRID_SIZE, GRID_SIZE))
+        rects.append(rect)
+        background.append((context.background, rect, background_area(cell)))
+        sprite = get_cell_contents(state, cell)
+        if sprite is not None:
+            blits.append((sprite, position))
+
+    context.screen.blits(background, False)
+    context.screen.blits(blits, False)
+    return rects
+
+
+def render_game(context: GameContext, state: GameState,
+                full: bool = True) -> Optional[list[pg.Rect]]:
+    """Отрисовывает игру. Камера сначала следует за головой змейки. Если
+    {full} = {True}, камера сдвинулась или режим {DIRTY_RENDERING}
+    выключен, перерисовывается весь экран и возвращается {None}. Иначе
+    перерисовываются только изменённые клетки и возвращается список их
+    областей.
+    """
+    state.free_cells.track_changes = DIRTY_RENDERING
+    moved = context.camera.follow(
+        state.snake.get_head_position(), state.free_cells
+    )
+    if full or moved or not DIRTY_RENDERING:
+        state.free_cells.pop_changed()
+        draw_game(context, state)
+        return None
 
+    return draw_changed_cells(context, state)
 
-def get_bad_apples(count: int = DEFAULT_COUNT_BAD_APPLES,
-                   used_cells: list = []) -> tuple[list, list]:
-    """Создает список плохих яблок. И возвращает его."""
-    bad_apples = []
-    for _ in range(0, count):
-        bad_apple = Apple(BAD_APPLE_COLOR, used_cells, 'bad_apple')
-        bad_apples.append(bad_apple)
-        used_cells.append(bad_apple.position)
 
-    return bad_apples, used_cells
+def handle_keys(context: GameContext, snake: Snake) -> None:
+    """Переводит нажатые стрелки из очереди ввода в буфер поворотов
+    змейки.
+    """
+    input_queue = context.input_queue
+    for key in input_queue.pop_keys():
+        direction = KEY_DIRECTIONS.get(key)
+        if direction is not None:
+            input_queue.push_turn(direction, snake.direction)
 
 
-def get_all_position(snake: Snake, obstacles: list[GameObject]) -> list:
-    """Возвращает список состоящий из координат всех
-    созданных объектов, змейка в список не входит.
+def next_turn(context: GameContext,
+              state: GameState) -> Optional[tuple[int, int]]:
+    """Возвращает поворот змейки на ход: из буфера поворотов или, в
+    демо-режиме, от автопилота (нажатые стрелки тогда не действуют).
     """
-    return [obstacle.position for obstacle in obstacles] + snake.positions
+    turn = context.input_queue.pop_turn()
+    return context.autopilot(state) if AUTOPILOT else turn
 
 
-def init_game_obgects() -> tuple[Snake, list[GameObject]]:
-    """Инициализирует все игровые объекты."""
-    snake = Snake()
-    used_cells = list.copy(snake.positions)
-    good_apples, used_cells = get_good_apples(used_cells=used_cells)
-    bad_apples, used_cells = get_bad_apples(used_cells=used_cells)
-    stones, used_cells = get_stones(used_cells=used_cells)
-
-    return snake, [*good_apples, *bad_apples, *stones]
+def select_menu_item(context: GameContext) -> None:
+    """Выполняет выбранный пункт меню."""
+    game = context.game
+    title = game.menu_title()
+    if title == 'Новая игра':
+        if game.new_game:
+            game.new_game = False
+        else:
+            game.reset = True
+        game.close_menu()
+    elif title == 'Продолжить' and not game.new_game:
+        game.close_menu()
+    elif title == 'Рейтинги':
+        context.leaderboard.open()
+    elif title == 'Выход':
+        game.switch_off()
+        game.close_menu()
 
 
-def reset_game(new_game: bool = False) -> tuple[Snake, list[GameObject]]:
-    """Сбрасывает змейку к исходному состоянию и задаёт ей случайное
-    направление. Всем препятствиям задаются новые координаты. Если
-    {new_game} = {True} информация об игре будет сброшена. Если
-    {new_game} = {False} информация об игре будет обновлена.
+def handle_keys_scores(context: GameContext) -> None:
+    """Обрабатывает клавиши в таблице рейтингов: стрелки листают
+    страницы, Enter возвращает к меню.
     """
-    if new_game:
-        game.reset_info()
-    else:
-        game.update_snake_length(1)
-        game.update_count_of_resets()
-
-    return init_game_obgects()
+    leaderboard = context.leaderboard
+    for key in context.input_queue.pop_keys():
+        if key in MENU_SELECT_KEYS:
+            leaderboard.close()
+        elif key in (pg.K_DOWN, pg.K_RIGHT):
+            leaderboard.turn_page(True)
+        elif key in (pg.K_UP, pg.K_LEFT):
+            leaderboard.turn_page(False)
+
+
+def handle_keys_menu(context: GameContext) -> None:
+    """Обрабатывает нажатые в меню клавиши из очереди ввода."""
+    if context.leaderboard.is_open:
+        handle_keys_scores(context)
+        return
+
+    game = context.game
+    for key in context.input_queue.pop_keys():
+        if key in MENU_SELECT_KEYS:
+            select_menu_item(context)
+        elif key == pg.K_UP:
+            game.menu_up()
+        elif key == pg.K_DOWN:
+            game.menu_down()
 
 
-def clear_stone_trace(stone: Stone, snake: Snake,
-                      obstacles: list[GameObject]) -> tuple[int, int]:
-    """Очищает путь камня, задавая всем встреченым препятствиям новые
-    координаты. И возвращает новое расположение камяня.
+def save_replay(recorder: ReplayRecorder) -> None:
+    """Сохраняет повтор игры в каталог {REPLAY_DIR}, если он задан и
+    в игре был сделан хотя бы один ход. Игры, загруженные из снимка,
+    не сохраняются.
     """
-    trace = stone.get_trace(snake.direction)
-    if trace[-1] not in snake.positions:
-        for obstacle in obstacles:
-            if obstacle.position in trace:
-                all_positons = get_all_position(snake, obstacles)
-                obstacle.randomize_position(all_positons)
-    else:
-        game.reset = True
+    if (REPLAY_DIR is None or not recorder.tick_count
+            or not recorder.replayable):
+        return
 
-    return trace[-1]
+    path = Path(REPLAY_DIR) / f'{recorder.seed}{REPLAY_SUFFIX}'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    recorder.save(path)
 
 
-def snake_can_move(new_head: tuple[int, int], snake: Snake,
-                   obstacles) -> bool:
-    """Проверяет есть ли на пути препятствия. Если нет то возвращает {True}
-    и змейка двигается дальше. Если есть препятствие, возвращется {False}.
-    В зависимости от препятсвия змейка вырастет, уменьшится или сбросится
-    в начальное состояние.
+def load_game(context: GameContext) -> GameState:
+    """Создаёт игру со счётчиками контекста. Если сохранён снимок
+    {SNAPSHOT_PATH}, игра загружается из него вместе со счётчиками, в
+    том числе лучшей длиной и временем игры, и её можно продолжить из
+    меню. Повреждённый снимок пропускается.
     """
-    if snake.can_bite_itself(new_head):
-        game.reset = True
-        return False
-
-    for obstacle in obstacles:
+    game = context.game
+    if SNAPSHOT_PATH is not None and Path(SNAPSHOT_PATH).exists():
+        try:
+            state = load_snapshot(SNAPSHOT_PATH, game)
+        except (OSError, ValueError):
+            pass
+        else:
+            game.new_game = False
+            return state
 
-        if snake.try_bite(new_head, obstacle) and type(obstacle) is Apple:
-            if obstacle.name == 'apple':
-                snake.grow_up(obstacle.position)
-            elif obstacle.name == 'bad_apple' and snake.length > 1:
-                snake.cut_tail()
+    return GameState(
+        game, BOARD_GRID_WIDTH * GRID_SIZE, BOARD_GRID_HEIGHT * GRID_SIZE
+    )
 
-            game.update_eaten_apples()
 
-            if snake.length + len(obstacles) <= FIELD_SIZE:
-                all_positons = get_all_position(snake, obstacles)
-                obstacle.randomize_position(all_positons)
-            else:
-                game.reset = True
+def save_game(context: GameContext, state: GameState) -> None:
+    """Сохраняет снимок начатой игры в файл {SNAPSHOT_PATH}."""
+    if SNAPSHOT_PATH is not None and not context.game.new_game:
+        save_snapshot(state, SNAPSHOT_PATH)
 
-            return False
 
-        elif snake.try_bite(new_head, obstacle) and type(obstacle) is Stone:
-            if snake.length <= obstacle.weight:
-                game.reset = True
-            else:
-                for _ in range(obstacle.weight):
-                    snake.cut_tail()
-                new_position = clear_stone_trace(obstacle, snake, obstacles)
-                obstacle.move(new_position)
+def quit_game(context: GameContext) -> None:
+    """Завершает игру."""
+    context.profiler.close()
+    context.leaderboard.disconnect()
+    pg.quit()
+    raise SystemExit
 
-            return False
 
+def quit_pressed(context: GameContext) -> bool:
+    """Реализует логику нажатия на клавишу ESCAPE и закрытия окна: до
+    начала игры выключает игру, иначе возвращает {True}.
+    """
+    if not context.input_queue.pop_quit():
+        return False
+    if context.game.new_game:
+        context.game.switch_off()
+        return False
     return True
 
 
-def draw_menu():
-    """Отрисовывает главное меню."""
+def draw_menu(context: GameContext, force: bool = False) -> list[pg.Rect]:
+    """Отрисовывает главное меню. Меню перерисовывается, только если
+    изменился выбранный пункт или доступность пункта 'Продолжить'.
+    При {force} = {True} заново рисуется весь экран. Возвращает
+    изменённые области экрана для { pg.display.update }.
+    """
+    game, text_cache = context.game, context.text_cache
+    screen, main_menu, title_menu = (
+        context.screen, context.main_menu, context.title_menu
+    )
+    menu_key = (game.menu_title(), game.new_game)
+    if not force and menu_key == text_cache.menu_key:
+        return []
+    text_cache.menu_key = menu_key
+
     title_menu.fill('Black')
-    text = title_font.render('Змейка', True, 'White')
+    text = text_cache.render(title_font, 'Змейка', 'White')
     txt_x, txt_y = TITLE_MENU_WIDTH // 2, TITLE_MENU_HEIGHT // 2
     text_rect = text.get_rect(center=(txt_x, txt_y))
     title_menu.blit(text, text_rect)
@@ -611,9 +890,9 @@ def draw_menu():
 
     for item in game.get_menu_list():
         if item == 'Продолжить' and game.new_game:
-            text = menu_font.render(item, True, 'DarkGray')
+            text = text_cache.render(menu_font, item, 'DarkGray')
         else:
-            text = menu_font.render(item, True, 'Black')
+            text = text_cache.render(menu_font, item, 'Black')
 
         text_rect = text.get_rect(center=(MENU_WIDTH // 2, y_tmp))
         main_menu.blit(text, text_rect)
@@ -624,56 +903,194 @@ def draw_menu():
 
         y_tmp += step
 
+    if force:
+        screen.blit(context.background, (0, 0))
     screen.blit(main_menu, main_menu_rect)
     screen.blit(title_menu, title_menu_rect)
 
+    return [screen.get_rect()] if force else [main_menu_rect]
 
-def main():
-    """Реализует базовую логику игры и инициализацию всех объектов."""
-    draw_texture_on_background()
-    snake, obstacles = init_game_obgects()
-    game.switch_on()
-
-    while game.is_run():
-        screen.blit(background_surface, (0, 0))
-
-        if game.menu_is_open():
-            game_caption('Змейка || Основное меню')
-            if quit_pressed():
-                game.close_menu()
-
-            draw_menu()
-            handle_keys_menu()
-            if game.reset:
-                snake, obstacles = reset_game(True)
-                game.reset = False
-        else:
-            if quit_pressed():
-                game.open_menu()
 
-            snake.draw()
-            for obstacle in obstacles:
-                obstacle.draw()
+def draw_scores(context: GameContext,
+                force: bool = False) -> list[pg.Rect]:
+    """Отрисовывает текущую страницу рейтинга. Страница рисуется заново
+    только при {force} = {True} (открытие таблицы или новая страница).
+    """
+    if not force:
+        return []
+
+    panel = pg.Surface((SCORES_WIDTH, SCORES_HEIGHT))
+    panel.fill(MAIN_MENU_COLOR)
+    pg.draw.rect(panel, MENU_BORDER_COLOR, panel.get_rect(), 4)
+    title = context.text_cache.render(menu_font, 'Рейтинги', 'Black')
+    panel.blit(title, title.get_rect(midtop=(SCORES_WIDTH // 2, 10)))
+
+    pages = context.leaderboard.pages
+    lines = ['Место   Длина   Яблоки   Врезаний   Время, с']
+    if pages is not None:
+        lines.extend(
+            f'{pages.rank(index)}.   {score.length}   '
+            f'{score.eaten_apples}   {score.resets}   {score.duration:.0f}'
+            for index, score in enumerate(pages.rows)
+        )
+    if len(lines) == 1:
+        lines.append('Нет результатов')
+    number = pages.number + 1 if pages is not None else 1
+    lines.append(f'Страница {number}   (стрелки - листать, Enter - меню)')
+
+    line_height = overlay_font.get_linesize()
+    for index, line in enumerate(lines):
+        text = overlay_font.render(line, True, 'Black')
+        panel.blit(text, (12, 50 + index * line_height))
+
+    screen = context.screen
+    screen.blit(context.background, (0, 0))
+    screen.blit(panel, panel.get_rect(center=MIDDLE_SCREEN))
+    return [screen.get_rect()]
+
+
+def draw_profiler_overlay(context: GameContext,
+                          update_rects: Optional[list[pg.Rect]]) -> None:
+    """Рисует перцентили фаз кадра в левом верхнем углу экрана. Текст
+    перерисовывается раз в {OVERLAY_PERIOD} кадров, область оверлея
+    добавляется к {update_rects}.
+    """
+    text_cache, profiler = context.text_cache, context.profiler
+    if text_cache.overlay is None or not (
+            profiler.frame_count % OVERLAY_PERIOD):
+        lines = [
+            f'{phase}: ' + ' / '.join(f'{value:.2f}'
+                                      for value in values.values())
+            for phase, values in profiler.report().items()
+        ]
+        lines.insert(0, 'ms: p50 / p95 / p99')
+        line_height = overlay_font.get_linesize()
+        overlay = pg.Surface((MENU_WIDTH, line_height * len(lines)))
+        for index, line in enumerate(lines):
+            text = overlay_font.render(line, True, 'White')
+            overlay.blit(text, (2, index * line_height))
+        text_cache.overlay = overlay
+
+    rect = context.screen.blit(text_cache.overlay, (0, 0))
+    if update_rects is not None:
+        update_rects.append(rect)
+
+
+def menu_frame(context: GameContext, state: GameState,
+               recorder: ReplayRecorder, full_redraw: bool) -> list[pg.Rect]:
+    """Выполняет кадр меню и возвращает изменённые области экрана. При
+    начале новой игры повтор прошлой сохраняется и запись начинается
+    заново.
+    """
+    game, leaderboard = context.game, context.leaderboard
+    input_queue, profiler = context.input_queue, context.profiler
+    context.text_cache.caption('Змейка || Основное меню')
+    input_queue.poll()
+    if leaderboard.is_open:
+        if input_queue.pop_quit():
+            leaderboard.close()
+    elif quit_pressed(context):
+        game.close_menu()
+    profiler.mark('events')
 
-            handle_keys(snake)
+    exposed = input_queue.pop_exposed()
+    full_redraw = leaderboard.pop_redraw() or exposed or full_redraw
+    if leaderboard.is_open:
+        update_rects = draw_scores(context, full_redraw)
+    else:
+        update_rects = draw_menu(context, full_redraw)
+    profiler.mark('drawing')
+
+    handle_keys_menu(context)
+    profiler.mark('input')
+    if game.reset:
+        leaderboard.submit(game)
+        save_replay(recorder)
+        state.reset(True)
+        recorder.start(state)
+        game.reset = False
+    profiler.pause_ticks()
+    profiler.mark('simulation')
+
+    return update_rects
+
+
+def game_frame(context: GameContext, state: GameState,
+               scheduler: FixedTimestep, recorder: ReplayRecorder,
+               full_redraw: bool) -> Optional[list[pg.Rect]]:
+    """Выполняет игровой кадр: отрисовку, ввод и положенные игровые ходы.
+    Ходы записываются в повтор {recorder}. Возвращает изменённые области
+    экрана.
+    """
+    game, input_queue = context.game, context.input_queue
+    profiler = context.profiler
+    input_queue.poll()
+    if quit_pressed(context):
+        game.open_menu()
+        input_queue.clear()
+        save_game(context, state)
+    profiler.mark('events')
+
+    full_redraw = input_queue.pop_exposed() or full_redraw
+    update_rects = render_game(context, state, full_redraw)
+    profiler.mark('drawing')
+
+    handle_keys(context, state.snake)
+    profiler.mark('input')
+
+    ticks = scheduler.advance()
+    for _ in range(ticks):
+        recorder.step(state, next_turn(context, state))
+    if ticks:
+        profiler.record_tick(ticks=ticks)
+        game.update_duration(ticks * scheduler.tick_time)
+        game.update_snake_speed(profiler.percentile(TICK_PHASE, 50))
+    if scheduler.tick_count % SNAPSHOT_PERIOD < ticks:
+        save_game(context, state)
+    context.text_cache.caption(game.info())
+    profiler.mark('simulation')
+
+    return update_rects
 
-            if game.slow_mode():
-                new_head = snake.new_head()
 
-                if snake_can_move(new_head, snake, obstacles):
-                    snake.move(new_head)
-                elif game.reset:
-                    snake, obstacles = reset_game()
-                    game.reset = False
+def main():
+    """Реализует базовую логику игры и инициализацию всех объектов."""
+    context = GameContext(screen, PROFILE_DUMP_PATH)
+    game, profiler = context.game, context.profiler
+    draw_texture_on_background(context)
+    context.input_queue.filter_events()
+    context.leaderboard.connect(SCORES_PATH)
+    state = load_game(context)
+    scheduler = FixedTimestep(TICK_RATE, MAX_CATCH_UP_TICKS)
+    recorder = ReplayRecorder(state)
+    game.switch_on()
+    full_redraw = True
 
-                game.update_snake_speed(time())
+    while game.is_run():
+        profiler.start_frame()
+        menu_is_open = game.menu_is_open()
 
-            game_caption(game.info())
+        if menu_is_open:
+            update_rects = menu_frame(context, state, recorder, full_redraw)
+            scheduler.reset()
+        else:
+            update_rects = game_frame(
+                context, state, scheduler, recorder, full_redraw
+            )
 
+        if SHOW_PROFILER_OVERLAY:
+            draw_profiler_overlay(context, update_rects)
+        full_redraw = menu_is_open != game.menu_is_open()
         clock.tick(GAME_SPEED)
-        pg.display.update()
-
-    quit_game()
+        pg.display.update(update_rects)
+        profiler.mark('present')
+        profiler.end_frame()
+
+    if SNAPSHOT_PATH is None:
+        context.leaderboard.submit(game)
+    save_replay(recorder)
+    save_game(context, state)
+    quit_game(context)
 
 
 if __name__ == '__main__':